@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+
+import metrics
+from main import fetch_quote_batch, get_copilot_suggested_stocks, quote_cache, suggestion_engine
+from stock_analyzer_app import StockDataAnalyzer
+
+# HTTP API over the Python fetch and screening code, used by the Next.js UI
+# (nextjs-ui/src/app/api/stocks/route.ts proxies to it).
+#
+#   uvicorn api_server:app --port 8000
+#   XTRADE_PROVIDER=fake uvicorn api_server:app --port 8000   # offline data
+#
+# Identical concurrent requests share one upstream fetch (RequestCoalescer),
+# upstream work runs on one shared thread pool, and JSON responses carry an
+# ETag and are gzip-compressed when large enough. Every response carries a
+# Server-Timing header with its per-stage breakdown; /metrics exports the
+# Prometheus metrics. /api/symbols?q= is the symbol typeahead.
+
+COUNTRIES = ['India', 'USA', 'Australia']
+MAX_STOCKS = 50
+
+
+class RequestCoalescer:
+    """Share one in-flight computation between concurrent identical requests"""
+
+    def __init__(self):
+        self._inflight = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def run(self, key, compute):
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.started += 1
+        task = asyncio.ensure_future(compute())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+
+def _clean(value):
+    """Convert NumPy scalars and NaN into plain JSON values"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _clean_rows(rows):
+    return [{key: _clean(value) for key, value in row.items()} for row in rows]
+
+
+def _route_label(request):
+    """Route template for metric labels, so /api/stocks/{symbol} is one series rather than one per symbol"""
+    route = request.scope.get('route')
+    return route.path if route is not None else 'unmatched'
+
+
+def json_response(request, payload, status_code=200, max_age=5):
+    """JSON response with an ETag; answers a matching If-None-Match with 304"""
+    body = json.dumps(payload, separators=(',', ':'), default=str).encode()
+    if status_code != 200:
+        return Response(content=body, media_type='application/json', status_code=status_code)
+    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    headers = {'ETag': etag, 'Cache-Control': f'public, max-age={max_age}'}
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
+def create_api(data_path=None, max_workers=16):
+    """Build the ASGI application"""
+    api = FastAPI(title="xTradeStockAI API")
+    api.add_middleware(GZipMiddleware, minimum_size=1000)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='api-upstream')
+    coalescer = RequestCoalescer()
+    analyzer = StockDataAnalyzer(data_path)
+    suggestion_engine.use_analyzer(analyzer)
+    api.state.coalescer = coalescer
+
+    @api.middleware("http")
+    async def trace_requests(request, call_next):
+        # The route is only known once routing ran inside call_next
+        with metrics.request_trace('unmatched', profile=False) as trace:
+            try:
+                response = await call_next(request)
+            finally:
+                trace.name = _route_label(request)
+        response.headers['Server-Timing'] = trace.server_timing()
+        metrics.count('http_requests_total', path=trace.name, status=response.status_code)
+        return response
+
+    async def in_pool(fn, *args):
+        # Run in a copy of the request context so pool-thread timers land in its trace
+        return await asyncio.get_running_loop().run_in_executor(executor, metrics.run_in_context(fn), *args)
+
+    def load_suggestions(country, analysis_type, num_stocks):
+        prompt = f"Top {num_stocks} stocks for {country} based on {analysis_type} indicators"
+        return get_copilot_suggested_stocks(prompt, country)[:num_stocks]
+
+    def load_stocks(country, analysis_type, num_stocks):
+        symbols = load_suggestions(country, analysis_type, num_stocks)
+        return fetch_quote_batch(symbols, country).to_records()
+
+    def search_symbols(q, limit):
+        # The first search builds the symbol index
+        index = analyzer.symbols
+        return [
+            {'key': index.key(i), 'symbol': index.symbols[i], 'exchange': index.exchanges[i],
+             'company': index.companies[i]}
+            for i in index.search(q, limit).tolist()
+        ]
+
+    async def stocks(request, country, analysis_type, num_stocks):
+        if country not in COUNTRIES:
+            return json_response(request, {'error': f"Unknown country {country}"}, status_code=400)
+        try:
+            num_stocks = max(1, min(int(num_stocks), MAX_STOCKS))
+        except (TypeError, ValueError):
+            return json_response(request, {'error': f"Invalid numStocks {num_stocks!r}"}, status_code=400)
+        key = ('stocks', country, analysis_type, num_stocks)
+        rows = await coalescer.run(key, lambda: in_pool(load_stocks, country, analysis_type, num_stocks))
+        return json_response(request, {'stocks': rows})
+
+    @api.post("/api/stocks")
+    async def post_stocks(request: Request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return json_response(request, {'error': "Request body is not valid JSON"}, status_code=400)
+        if not isinstance(body, dict):
+            return json_response(request, {'error': "Request body must be a JSON object"}, status_code=400)
+        return await stocks(request, body.get('country'), body.get('analysisType', 'both'), body.get('numStocks', 10))
+
+    @api.get("/api/stocks")
+    async def get_stocks(request: Request, country: str, type: str = 'both', count: int = 10):
+        return await stocks(request, country, type, count)
+
+    @api.get("/api/suggestions")
+    async def suggestions(request: Request, country: str, type: str = 'both', count: int = 10):
+        if country not in COUNTRIES:
+            return json_response(request, {'error': f"Unknown country {country}"}, status_code=400)
+        # The model call can take seconds (and ranks the dataset on a fallback): keep it off the loop
+        count = max(1, min(count, MAX_STOCKS))
+        key = ('suggestions', country, type, count)
+        symbols = await coalescer.run(key, lambda: in_pool(load_suggestions, country, type, count))
+        return json_response(request, {'symbols': symbols})
+
+    @api.get("/api/screener")
+    async def screener(request: Request, country: str = "All", sector: str = "All", min_pe: float = 0,
+                       max_pe: float = 50, min_roe: float = 10, recommendation: str = "All",
+                       sort_by: str = "Market_Cap", count: int = 10):
+        args = (country, sector, min_pe, max_pe, min_roe, recommendation, sort_by, max(1, count))
+        df = await coalescer.run(('screener',) + args, lambda: in_pool(analyzer.screen, *args))
+        return json_response(request, {'stocks': _clean_rows(df.to_dict('records'))})
+
+    @api.get("/api/symbols")
+    async def symbols(request: Request, q: str = "", limit: int = 20):
+        limit = max(1, min(limit, 100))
+        rows = await coalescer.run(('symbols', q, limit), lambda: in_pool(search_symbols, q, limit))
+        return json_response(request, {'symbols': rows}, max_age=60)
+
+    @api.get("/api/stocks/{symbol}")
+    async def stock_details(request: Request, symbol: str):
+        record = await in_pool(analyzer.get_stock_record, symbol)
+        if record is None:
+            return json_response(request, {'error': "Stock not found"}, status_code=404)
+        return json_response(request, {'stock': {k: _clean(v) for k, v in record.items()}})
+
+    @api.get("/api/stats")
+    async def stats(request: Request):
+        return json_response(request, {
+            'quote_cache': quote_cache.stats(),
+            'coalescer': {'started': coalescer.started, 'coalesced': coalescer.coalesced}
+        }, max_age=0)
+
+    @api.get("/metrics")
+    async def prometheus_metrics():
+        return Response(content=metrics.export_prometheus(), media_type='text/plain; version=0.0.4')
+
+    @api.get("/healthz")
+    async def healthz():
+        return {'status': 'ok'}
+
+    return api
+
+
+app = create_api(os.environ.get('XTRADE_DATA_PATH'))
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get('XTRADE_API_PORT', 8000)))
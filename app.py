@@ -1,6 +1,18 @@
+import os
+import threading
+import time
+import uuid
+
 import streamlit as st
-import pandas as pd
-from main import get_copilot_suggested_stocks, fetch_stock_data
+import metrics
+from main import get_copilot_suggested_stocks, fetch_quote_batch, quote_cache
+from providers import exchange_for
+from streaming import QuoteStreamer, patch_frame
+
+# Seconds between quote polls in live mode
+STREAM_INTERVAL = float(os.environ.get('XTRADE_STREAM_INTERVAL', 5))
+# Seconds a session may go without a rerun before its streamer is stopped
+STREAM_IDLE_TIMEOUT = float(os.environ.get('XTRADE_STREAM_IDLE_TIMEOUT', 60))
 
 st.set_page_config(page_title="xTradeStockAI Mobile Simulator", layout="centered")
 st.title("📱 xTradeStockAI - Mobile App Simulator")
@@ -15,24 +27,105 @@ num_stocks = st.number_input("How many top stocks do you want to see?", min_valu
 prompt = f"Top {num_stocks} stocks for {country} based on {suggestion_type} indicators"
 suggestion_btn_label = f"Suggest for {country} ({suggestion_type})"
 
+profile = st.sidebar.checkbox("Profile requests (debug)")
+
 if st.button(suggestion_btn_label):
     st.subheader(f"Copilot-suggested stocks for {country} ({prompt})")
-    stocks = get_copilot_suggested_stocks(prompt, country)[:num_stocks]
-    data_list = []
-    for symbol in stocks:
-        if country == "India":
-            exchange = "NSE"
-        elif country == "USA":
-            exchange = "NASDAQ"
-        elif country == "Australia":
-            exchange = "ASX"
-        else:
-            exchange = "Unknown"
-        data = fetch_stock_data(symbol, country)
-        data['Exchange'] = exchange
-        data_list.append(data)
-    df = pd.DataFrame(data_list)
+    with metrics.request_trace('stock suggestions', profile=profile or None) as trace:
+        stocks = get_copilot_suggested_stocks(prompt, country)[:num_stocks]
+        exchange = exchange_for(country)
+        df = fetch_quote_batch(stocks, country).to_frame()
+        df['Exchange'] = exchange
     st.dataframe(df)
+    stats = quote_cache.stats()
+    st.caption(f"Quote cache: {stats['hits'] + stats['stale_hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions")
     st.download_button("Download CSV", df.to_csv(index=False), f"copilot_suggested_stocks_{country}.csv", "text/csv")
+    with st.expander("🐞 Debug: request timing"):
+        st.markdown(trace.to_markdown())
+
+
+@st.cache_resource
+def live_streamers():
+    """Streamers of every session as {session id: [streamer, last rerun]}, kept across reruns"""
+    return {}, threading.Lock()
+
+
+def sweep_streamers():
+    """Stop the streamers of sessions that have not rerun within STREAM_IDLE_TIMEOUT"""
+    registry, lock = live_streamers()
+    now = time.monotonic()
+    with lock:
+        idle = [session for session, (_, seen) in registry.items() if now - seen > STREAM_IDLE_TIMEOUT]
+        stopped = [registry.pop(session)[0] for session in idle]
+    for streamer in stopped:
+        streamer.stop()
+
+
+def touch_stream():
+    """Mark this session's streamer as in use; False once it was swept as idle"""
+    registry, lock = live_streamers()
+    with lock:
+        entry = registry.get(st.session_state.session_id)
+        if entry is not None:
+            entry[1] = time.monotonic()
+    if entry is None:
+        st.session_state.pop('streamer', None)
+    return entry is not None
+
+
+def register_stream(streamer):
+    registry, lock = live_streamers()
+    with lock:
+        registry[st.session_state.session_id] = [streamer, time.monotonic()]
+    st.session_state.streamer = streamer
+
+
+def stop_stream():
+    streamer = st.session_state.pop('streamer', None)
+    if streamer is not None:
+        registry, lock = live_streamers()
+        with lock:
+            registry.pop(st.session_state.session_id, None)
+        streamer.stop()
+
+
+@st.fragment(run_every=STREAM_INTERVAL)
+def live_quotes():
+    # Reruns on its own timer; only the rows that changed are patched in
+    sweep_streamers()
+    streamer = st.session_state.get('streamer')
+    if streamer is None or not touch_stream():
+        return
+    rows = streamer.changes()
+    st.session_state.live_table = patch_frame(st.session_state.live_table, rows)
+    st.dataframe(st.session_state.live_table, hide_index=True)
+    st.caption(f"{streamer.polls} polls, {streamer.ticks} ticks, last poll "
+               f"{streamer.poll_seconds * 1000:.0f} ms, {len(rows)} rows changed")
+
+
+# Sessions whose tab was closed stop rerunning; their streamers are stopped by the next rerun or live refresh of any session
+st.session_state.setdefault('session_id', uuid.uuid4().hex)
+sweep_streamers()
+if 'streamer' in st.session_state:
+    touch_stream()
+
+st.subheader("📡 Live quotes")
+if st.toggle("Stream live quotes for the suggested stocks"):
+    watch_key = (country, suggestion_type, num_stocks)
+    if st.session_state.get('streamer_key') != watch_key or 'streamer' not in st.session_state:
+        stop_stream()
+        try:
+            streamer, errors = QuoteStreamer.for_watchlist(get_copilot_suggested_stocks(prompt, country)[:num_stocks], country)
+            streamer.start(STREAM_INTERVAL)
+            register_stream(streamer)
+            st.session_state.streamer_key = watch_key
+            st.session_state.live_table = streamer.frame()
+            if errors:
+                st.warning(f"Not streaming: {', '.join(errors)}")
+        except ValueError as e:
+            st.error(str(e))
+    live_quotes()
+else:
+    stop_stream()
 
 st.info("This is a mobile app simulator. For best experience, open in mobile browser or resize your window.")
@@ -0,0 +1,243 @@
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from create_sample_data import create_price_history
+from scoring import (DEFAULT_RULES, RECOMMENDATIONS, SUGGESTION_TYPES, combined_score, fundamental_score,
+                     recommendation_codes, technical_score)
+
+# Vectorized backtests of the recommendation rules in scoring.py.
+#
+# A Panel holds symbols x dates matrices of closes and fundamentals (PE, ROE,
+# revenue growth). A strategy scores every cell at once with the same rules
+# the dataset uses, holds the stocks rated `hold` or better in equal weight,
+# and rebalances every `rebalance` bars. Returns come from one pass over the
+# panel with no per-symbol or per-day Python loops; parameter sweeps fan out
+# over a process pool.
+#
+#   python backtest.py --symbols 500 --years 10            # one run per suggestion type
+#   python backtest.py --symbols 500 --years 10 --sweep    # parameter grid on all cores
+
+
+class Panel:
+    """Aligned symbols x dates closes and fundamentals, oldest bar first"""
+
+    def __init__(self, close, pe, roe, growth, symbols=None, dates=None):
+        self.close = np.asarray(close, dtype=np.float64)
+        self.pe = np.asarray(pe, dtype=np.float64)
+        self.roe = np.asarray(roe, dtype=np.float64)
+        self.growth = np.asarray(growth, dtype=np.float64)
+        self.symbols = list(symbols) if symbols is not None else [f"S{i}" for i in range(len(self.close))]
+        self.dates = dates
+        self._technicals = None
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+    @property
+    def years(self):
+        return self.close.shape[1] / indicators.TRADING_DAYS
+
+    @property
+    def technicals(self):
+        """Indicator panels, computed once and shared by every strategy"""
+        if self._technicals is None:
+            self._technicals = {
+                '50DMA': indicators.sma(self.close, 50),
+                '200DMA': indicators.sma(self.close, 200),
+                'RSI': indicators.rsi(self.close),
+                'MACD': indicators.macd(self.close)[0]
+            }
+        return self._technicals
+
+
+def synthetic_panel(num_symbols=500, years=10, seed=0):
+    """Simulated closes with quarterly-reported fundamentals.
+
+    EPS compounds at each stock's revenue growth and is reported once a
+    quarter, so PE moves with the price between reports like the real ratio.
+    """
+    rng = np.random.default_rng(seed)
+    days = int(years * indicators.TRADING_DAYS)
+    close = create_price_history(rng.uniform(10, 3000, num_symbols), days, seed)
+
+    quarter = indicators.TRADING_DAYS // 4
+    quarters = -(-days // quarter)
+    growth_q = rng.uniform(-10, 30, (num_symbols, 1)) + rng.normal(0, 4, (num_symbols, quarters)).cumsum(axis=1) * 0.5
+    roe_q = np.clip(rng.uniform(5, 40, (num_symbols, 1)) + rng.normal(0, 1.5, (num_symbols, quarters)).cumsum(axis=1),
+                    -20, 120)
+    eps_q = close[:, :1] / rng.uniform(8, 45, (num_symbols, 1)) * np.cumprod(1 + growth_q / 400.0, axis=1)
+
+    step = np.arange(days) // quarter
+    growth = growth_q[:, step]
+    eps = eps_q[:, step]
+    pe = np.where(eps > 0, close / eps, np.nan)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+    return Panel(close, pe, roe_q[:, step], growth, dates=dates)
+
+
+def score_panel(panel, suggestion_type='both', columns=None, pe_cuts=DEFAULT_RULES['pe_cuts'],
+                roe_cuts=DEFAULT_RULES['roe_cuts'], growth_cuts=DEFAULT_RULES['growth_cuts'],
+                rsi_band=DEFAULT_RULES['rsi_band']):
+    """3-15 score for every symbol on the given date columns (default: all)"""
+    if suggestion_type not in SUGGESTION_TYPES:
+        raise ValueError(f"Unknown suggestion type {suggestion_type}")
+    cols = slice(None) if columns is None else columns
+    score = None
+    if suggestion_type in ('fundamental', 'both'):
+        score = fundamental_score(panel.pe[:, cols], panel.roe[:, cols], panel.growth[:, cols],
+                                  pe_cuts, roe_cuts, growth_cuts)
+    if suggestion_type in ('technical', 'both'):
+        t = panel.technicals
+        technical = technical_score(panel.close[:, cols], t['50DMA'][:, cols], t['200DMA'][:, cols],
+                                    t['RSI'][:, cols], t['MACD'][:, cols], rsi_band)
+        score = technical if score is None else combined_score(score, technical)
+    return score
+
+
+def rebalance_bars(num_dates, rebalance=21, start=200):
+    """Bar indices where the portfolio is rebalanced"""
+    return np.arange(start, num_dates - 1, rebalance)
+
+
+def portfolio_returns(close, picked, rebalances, cost_bps=10.0):
+    """Daily returns of equal-weight portfolios picked on each rebalance bar.
+
+    `picked` is a (n_symbols, len(rebalances)) boolean selection made with
+    data up to each rebalance bar; positions then drift with prices until the
+    next one. Costs are charged on the rebalance turnover. Returns (returns,
+    holdings, turnover); returns cover every bar after the first rebalance.
+    """
+    n, t = close.shape
+    start = rebalances[0]
+    picked = picked.astype(np.float64)
+    holdings = picked.sum(axis=0)
+    weights = np.divide(picked, holdings, out=np.zeros_like(picked), where=holdings > 0)
+
+    # Shares bought per unit of capital at each rebalance; value them on every later bar
+    shares = np.divide(weights, close[:, rebalances], out=np.zeros_like(weights), where=weights > 0)
+    days = np.arange(start + 1, t)
+    period = np.searchsorted(rebalances, days, side='left') - 1
+    value = np.einsum('ij,ij->j', shares[:, period], close[:, days])
+    invested = holdings[period] > 0
+    period_start = np.isin(days - 1, rebalances)
+    previous = np.where(period_start, 1.0, np.concatenate([[1.0], value[:-1]]))
+    returns = np.where(invested, np.divide(value, previous, out=np.ones_like(value), where=previous > 0) - 1, 0.0)
+
+    turnover = np.abs(np.diff(np.concatenate([np.zeros((n, 1)), weights], axis=1), axis=1)).sum(axis=0)
+    returns[period_start] -= turnover * cost_bps / 1e4
+    return returns, holdings, turnover
+
+
+def performance(returns, periods_per_year=indicators.TRADING_DAYS):
+    """Headline statistics for a daily return series"""
+    equity = np.cumprod(1 + returns)
+    years = len(returns) / periods_per_year
+    volatility = returns.std(ddof=1) * np.sqrt(periods_per_year) if len(returns) > 1 else 0.0
+    mean = returns.mean() * periods_per_year if len(returns) else 0.0
+    drawdown = equity / np.maximum.accumulate(equity) - 1 if len(equity) else np.zeros(1)
+    return {
+        'Total_Return': (equity[-1] - 1) * 100 if len(equity) else 0.0,
+        'CAGR': (equity[-1] ** (1 / years) - 1) * 100 if years > 0 and equity[-1] > 0 else 0.0,
+        'Volatility': volatility * 100,
+        'Sharpe': mean / volatility if volatility > 0 else 0.0,
+        'Max_Drawdown': drawdown.min() * 100
+    }
+
+
+def run_backtest(panel, suggestion_type='both', hold='Buy', rebalance=21, cost_bps=10.0, warmup=200,
+                 thresholds=DEFAULT_RULES['thresholds'], **rules):
+    """Backtest one rule set; returns its parameters and performance as a dict"""
+    # Only the rebalance bars are ever traded, so only they are scored
+    rebalances = rebalance_bars(panel.shape[1], rebalance, warmup)
+    codes = recommendation_codes(score_panel(panel, suggestion_type, rebalances, **rules), thresholds)
+    picked = codes <= RECOMMENDATIONS.index(hold)
+    returns, holdings, turnover = portfolio_returns(panel.close, picked, rebalances, cost_bps)
+    result = {'suggestion_type': suggestion_type, 'hold': hold, 'rebalance': rebalance,
+              'thresholds': tuple(thresholds), 'cost_bps': cost_bps}
+    result.update({key: tuple(value) for key, value in rules.items()})
+    result.update(performance(returns))
+    result['Avg_Holdings'] = holdings.mean() if len(holdings) else 0.0
+    result['Turnover'] = turnover.mean() if len(turnover) else 0.0
+    return result
+
+
+def benchmark(panel, rebalance=21, warmup=200):
+    """Equal weight across the whole universe on the same schedule"""
+    rebalances = rebalance_bars(panel.shape[1], rebalance, warmup)
+    picked = np.ones((panel.shape[0], len(rebalances)), dtype=bool)
+    returns, _, _ = portfolio_returns(panel.close, picked, rebalances, cost_bps=0.0)
+    return performance(returns)
+
+
+def parameter_grid(**options):
+    """Every combination of the given parameter lists as run_backtest kwargs"""
+    keys = list(options)
+    return [dict(zip(keys, values)) for values in itertools.product(*(options[k] for k in keys))]
+
+
+_worker_panel = None
+
+
+def _init_worker(panel):
+    global _worker_panel
+    _worker_panel = panel
+
+
+def _run_params(params):
+    return run_backtest(_worker_panel, **params)
+
+
+def sweep(panel, grid, processes=None):
+    """Run every parameter set in `grid`; returns a DataFrame sorted by Sharpe.
+
+    The panel (with its indicators precomputed) is sent to each worker once,
+    not with every task.
+    """
+    panel.technicals
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(grid) == 1:
+        results = [run_backtest(panel, **params) for params in grid]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(panel,)) as pool:
+            chunksize = max(1, len(grid) // (processes * 4))
+            results = list(pool.map(_run_params, grid, chunksize=chunksize))
+    return pd.DataFrame(results).sort_values('Sharpe', ascending=False, ignore_index=True)
+
+
+def default_grid():
+    return parameter_grid(
+        suggestion_type=['technical', 'fundamental', 'both'],
+        hold=['Strong Buy', 'Buy'],
+        rebalance=[5, 21, 63],
+        thresholds=[(12, 9, 6), (11, 8, 5), (13, 10, 7)]
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the recommendation rules on a synthetic panel")
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--years', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sweep', action='store_true', help="run the default parameter grid")
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    panel = synthetic_panel(args.symbols, args.years, args.seed)
+    print(f"Panel: {panel.shape[0]} symbols x {panel.shape[1]} bars ({panel.years:.1f} years)")
+    columns = ['suggestion_type', 'hold', 'rebalance', 'thresholds', 'CAGR', 'Volatility', 'Sharpe',
+               'Max_Drawdown', 'Avg_Holdings']
+    if args.sweep:
+        results = sweep(panel, default_grid(), args.processes)
+    else:
+        results = pd.DataFrame([run_backtest(panel, t) for t in ('technical', 'fundamental', 'both')])
+    print(results[columns].round(2).to_string(index=False))
+    bench = benchmark(panel)
+    print(f"\nEqual-weight universe: CAGR {bench['CAGR']:.2f}% | Sharpe {bench['Sharpe']:.2f} | "
+          f"Max drawdown {bench['Max_Drawdown']:.2f}%")
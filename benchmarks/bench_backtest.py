@@ -0,0 +1,59 @@
+"""Backtest throughput in strategy-years per second.
+
+One strategy-year is one rule set evaluated over one year of the whole
+universe. Run from the repository root:
+
+    python -m benchmarks.bench_backtest --symbols 1000 --years 10
+"""
+import argparse
+import os
+import time
+
+import backtest
+
+
+def timed_sweep(panel, grid, processes):
+    start = time.perf_counter()
+    results = backtest.sweep(panel, grid, processes)
+    elapsed = time.perf_counter() - start
+    rate = len(grid) * panel.years / elapsed
+    print(f"{f'Sweep ({processes} process' + ('es)' if processes > 1 else ')'):<28}{elapsed:>10.3f}s "
+          f"{rate:>12.1f} strategy-years/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=1000)
+    parser.add_argument('--years', type=float, default=10)
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    panel = backtest.synthetic_panel(args.symbols, args.years)
+    print(f"Panel: {panel.shape[0]} symbols x {panel.shape[1]} bars ({panel.years:.1f} years)")
+
+    start = time.perf_counter()
+    panel.technicals
+    print(f"{'Indicator panels':<28}{time.perf_counter() - start:>10.3f}s (once per panel)")
+
+    for suggestion_type in backtest.SUGGESTION_TYPES:
+        runs = 5
+        start = time.perf_counter()
+        for _ in range(runs):
+            backtest.run_backtest(panel, suggestion_type)
+        elapsed = (time.perf_counter() - start) / runs
+        print(f"{'Single run (' + suggestion_type + ')':<28}{elapsed:>10.3f}s "
+              f"{panel.years / elapsed:>12.1f} strategy-years/s")
+
+    grid = backtest.default_grid()
+    print(f"Grid: {len(grid)} parameter sets")
+    timed_sweep(panel, grid, 1)
+    if args.processes > 1:
+        results = timed_sweep(panel, grid, args.processes)
+        best = results.iloc[0]
+        print(f"Best: {best['suggestion_type']} / hold {best['hold']} / rebalance {best['rebalance']} / "
+              f"thresholds {best['thresholds']} -> Sharpe {best['Sharpe']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Chart build time and figure size: cold, cached and downsampled.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_charts --rows 1000 10000 100000
+"""
+import argparse
+import time
+
+from create_sample_data import create_synthetic_universe
+from stock_analyzer_app import StockDataAnalyzer
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(row_counts):
+    print(f"{'rows':>8}{'scatter (s)':>14}{'scatter KB':>12}{'raw scatter KB':>16}{'cold query (s)':>16}{'cached (s)':>12}")
+    for rows in row_counts:
+        analyzer = StockDataAnalyzer()
+        analyzer.df = create_synthetic_universe(rows)
+        df = analyzer.df
+
+        fig, scatter_time = timed(lambda: analyzer.create_pe_roe_scatter(df))
+        size_kb = len(fig.to_json()) / 1024
+
+        # Size the unbinned scatter would have had
+        analyzer.MAX_SCATTER_POINTS = float('inf')
+        raw_fig = analyzer.create_pe_roe_scatter(df)
+        raw_kb = len(raw_fig.to_json()) / 1024
+        analyzer.MAX_SCATTER_POINTS = StockDataAnalyzer.MAX_SCATTER_POINTS
+
+        query = ("All", "All", 0, 100, 0, "All", "Market_Cap", 30)
+        _, cold = timed(lambda: analyzer.get_stock_suggestions(*query))
+        _, cached = timed(lambda: analyzer.get_stock_suggestions(*query))
+        print(f"{rows:>8}{scatter_time:>14.3f}{size_kb:>12.1f}{raw_kb:>16.1f}{cold:>16.3f}{cached:>12.3f}")
+        print(f"{'':>8}chart cache: {analyzer.chart_cache.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+    run(args.rows)
+
+
+if __name__ == "__main__":
+    main()
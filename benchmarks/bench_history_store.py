@@ -0,0 +1,76 @@
+"""Cold vs. warm history store benchmark for the moving-average fetch path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_history_store --symbols 30 --latency 0.05
+"""
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+from history_store import HistoryStore
+from providers import FakeProvider, moving_averages
+
+
+class CountingProvider:
+    """Wrap a provider and count history requests and bars transferred"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.requests = 0
+        self.bars = 0
+
+    def get_history(self, symbol, period="1y", start=None):
+        hist = self.provider.get_history(symbol, period=period, start=start)
+        self.requests += 1
+        self.bars += len(hist)
+        return hist
+
+
+def run_pass(store, provider, symbols):
+    start = time.perf_counter()
+    for symbol in symbols:
+        moving_averages(store.get_history('BENCH', symbol, provider))
+    return time.perf_counter() - start
+
+
+def run(num_symbols, latency):
+    fake = FakeProvider(latency=latency, allow_unknown=True)
+    symbols = [f"SYM{i:04d}" for i in range(num_symbols)]
+
+    with tempfile.TemporaryDirectory() as root:
+        store = HistoryStore(root)
+
+        cold = CountingProvider(fake)
+        cold_time = run_pass(store, cold, symbols)
+
+        # Drop the newest bars so the warm pass has one day to append
+        for symbol in symbols:
+            hist = store.load('BENCH', symbol)
+            store.save('BENCH', symbol, hist.iloc[:-1])
+        stale = CountingProvider(fake)
+        stale_time = run_pass(store, stale, symbols)
+
+        warm = CountingProvider(fake)
+        warm_time = run_pass(store, warm, symbols)
+
+    print(f"Symbols: {num_symbols} | latency: {latency * 1000:.0f}ms")
+    print(f"{'pass':<18}{'time (s)':>10}{'requests':>10}{'bars':>10}")
+    for name, elapsed, counter in [('cold store', cold_time, cold),
+                                   ('one day behind', stale_time, stale),
+                                   ('current store', warm_time, warm)]:
+        print(f"{name:<18}{elapsed:>10.3f}{counter.requests:>10}{counter.bars:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds per fake request")
+    args = parser.parse_args()
+    run(args.symbols, args.latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Indicator engine throughput on a symbols x dates price matrix.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_indicators --symbols 5000 --years 10
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from create_sample_data import create_price_history
+
+
+def timed(label, fn, bars):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{elapsed:>10.3f}s {bars / elapsed / 1e6:>10.1f}M bars/s")
+    return result
+
+
+def pandas_latest(close):
+    """Per-symbol pandas baseline, the way fetch_stock_data computes DMAs"""
+    out = []
+    for row in close:
+        s = pd.Series(row)
+        out.append((s.rolling(window=50).mean().iloc[-1], s.rolling(window=200).mean().iloc[-1],
+                    s.ewm(span=12, adjust=False).mean().iloc[-1] - s.ewm(span=26, adjust=False).mean().iloc[-1]))
+    return out
+
+
+def run(num_symbols, years, sample):
+    days = years * indicators.TRADING_DAYS
+    rng = np.random.default_rng(0)
+    close = create_price_history(rng.uniform(10, 3000, num_symbols), days=days)
+    high = close * 1.01
+    low = close * 0.99
+    bars = close.size
+    print(f"Universe: {num_symbols} symbols x {days} bars ({bars / 1e6:.1f}M bars)")
+
+    timed("SMA 50/200", lambda: (indicators.sma(close, 50), indicators.sma(close, 200)), bars)
+    timed("EMA 12/26 + MACD", lambda: indicators.macd(close), bars)
+    timed("RSI 14", lambda: indicators.rsi(close), bars)
+    timed("Bollinger 20", lambda: indicators.bollinger(close), bars)
+    timed("ATR 14", lambda: indicators.atr(high, low, close), bars)
+    timed("Realized vol (rolling 20)", lambda: indicators.realized_volatility(close, window=20), bars)
+    timed("Beta vs universe", lambda: indicators.beta(close, indicators.market_index(close)), bars)
+    timed("latest_indicators (all)", lambda: indicators.latest_indicators(close), bars)
+
+    stream = indicators.StreamingIndicators(close[:, -300:])
+    ticks = 250
+    start = time.perf_counter()
+    for t in range(ticks):
+        stream.update(close[:, -1] * (1 + 0.001 * np.sin(t)))
+    elapsed = time.perf_counter() - start
+    print(f"{'Streaming update':<28}{elapsed / ticks * 1e3:>10.3f}ms per tick ({num_symbols} symbols)")
+
+    subset = close[:sample]
+    start = time.perf_counter()
+    pandas_latest(subset)
+    per_symbol = (time.perf_counter() - start) / len(subset)
+    print(f"{'pandas per-symbol baseline':<28}{per_symbol * num_symbols:>10.3f}s (extrapolated from {len(subset)} symbols, DMAs + MACD only)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=5000)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--sample', type=int, default=200, help="symbols used for the pandas baseline")
+    args = parser.parse_args()
+    run(args.symbols, args.years, args.sample)
+
+
+if __name__ == "__main__":
+    main()
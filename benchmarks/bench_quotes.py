@@ -0,0 +1,59 @@
+"""Memory and DataFrame cost of row dicts vs. QuoteBatch.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_quotes --quotes 50000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from quotes import QuoteBatch
+
+
+def make_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = rng.uniform(10, 3000, n).round(2).tolist()
+    volumes = rng.integers(100000, 50000000, n).tolist()
+    pe = rng.uniform(5, 60, n).tolist()
+    return [{
+        'Symbol': f"SYM{i:06d}",
+        'Price': prices[i],
+        'Volume': volumes[i],
+        'PE Ratio': pe[i],
+        '50DMA': prices[i] * 0.98,
+        '200DMA': prices[i] * 0.95,
+        'Source': 'Yahoo Finance'
+    } for i in range(n)]
+
+
+def measure(label, build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:<32}{elapsed * 1e3:>10.1f}ms {size / 1e6:>10.1f}MB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quotes', type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{'':<32}{'time':>12}{'memory':>12}")
+    rows = measure("Row dicts", lambda: make_rows(args.quotes))
+    batch = measure("QuoteBatch.from_rows", lambda: QuoteBatch.from_rows(rows))
+    measure("pd.DataFrame(row dicts)", lambda: pd.DataFrame(rows))
+    df = measure("QuoteBatch.to_frame", batch.to_frame)
+    print(f"Price column shares memory with the batch: "
+          f"{np.shares_memory(df['Price'].to_numpy(), batch.column('Price'))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Sustained throughput against a throttling fake provider.
+
+The fake answers 429 above `--server-rate` requests/second and bans clients
+that collect too many 429s. Compares unscheduled hammering with the
+ProviderScheduler (starting above the server limit so it has to adapt), then
+measures interactive latency while bulk work saturates the limit. Run from
+the repository root:
+
+    python -m benchmarks.bench_rate_limit --seconds 5
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from providers import FakeProvider, ProviderError
+from scheduler import BULK, INTERACTIVE, GuardedProvider, ProviderScheduler, request_priority
+
+
+def make_server(args):
+    return FakeProvider(latency=0.005, allow_unknown=True, rate_limit=args.server_rate, burst=10,
+                        ban_after=args.ban_after, ban_seconds=3.0)
+
+
+def hammer(call, threads, seconds, priority=BULK):
+    """Call `call()` from `threads` threads for `seconds`; return (ok, failed, latencies)"""
+    ok, failed, latencies = [0], [0], []
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def worker():
+        with request_priority(priority):
+            while time.monotonic() < stop:
+                start = time.perf_counter()
+                try:
+                    call()
+                    with lock:
+                        ok[0] += 1
+                        latencies.append(time.perf_counter() - start)
+                except ProviderError:
+                    with lock:
+                        failed[0] += 1
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return ok[0], failed[0], latencies
+
+
+def report(label, server, ok, failed, seconds):
+    print(f"{label:<26}{ok / seconds:>10.1f} ok/s {failed:>8} failed {server.throttled:>8} x 429 "
+          f"{server.bans:>4} bans")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--server-rate', type=float, default=40.0)
+    parser.add_argument('--ban-after', type=int, default=50)
+    args = parser.parse_args()
+    print(f"Server limit {args.server_rate:g} req/s, ban after {args.ban_after} x 429 in 10s")
+
+    server = make_server(args)
+    ok, failed, _ = hammer(lambda: server.get_quote('AAPL'), args.threads, args.seconds)
+    report("No scheduler", server, ok, failed, args.seconds)
+
+    server = make_server(args)
+    scheduler = ProviderScheduler({'Fake': (args.server_rate * 2, 10)}, acquire_timeout=10.0)
+    guarded = GuardedProvider(server, scheduler)
+    ok, failed, _ = hammer(lambda: guarded.get_quote('AAPL'), args.threads, args.seconds)
+    report("Scheduler (adaptive)", server, ok, failed, args.seconds)
+    print(f"{'':<26}client rate settled at {scheduler.buckets['Fake'].rate:.1f} req/s")
+
+    # Interactive calls queue ahead of a saturating bulk load
+    server = make_server(args)
+    scheduler = ProviderScheduler({'Fake': (args.server_rate * 0.9, 5)}, acquire_timeout=30.0)
+    guarded = GuardedProvider(server, scheduler)
+    results = {}
+    bulk = threading.Thread(target=lambda: results.update(
+        bulk=hammer(lambda: guarded.get_quote('AAPL'), args.threads, args.seconds, BULK)))
+    bulk.start()
+    time.sleep(0.5)
+    results['interactive'] = hammer(lambda: guarded.get_quote('MSFT'), 1, args.seconds - 1, INTERACTIVE)
+    bulk.join()
+    for name in ('interactive', 'bulk'):
+        _, _, latencies = results[name]
+        print(f"{name.capitalize() + ' latency':<26}p50 {statistics.median(latencies) * 1e3:>8.1f}ms "
+              f"p90 {statistics.quantiles(latencies, n=10)[-1] * 1e3:>8.1f}ms ({len(latencies)} calls)")
+
+
+if __name__ == "__main__":
+    main()
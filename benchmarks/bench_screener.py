@@ -0,0 +1,79 @@
+"""Screener latency: indexed ScreenerIndex vs. the copy/mask/sort pandas path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_screener --rows 50000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from create_sample_data import create_synthetic_universe
+from screener import ScreenerIndex
+
+QUERIES = [
+    dict(country="All", sector="All", recommendation="All", min_pe=0, max_pe=50, min_roe=10, sort_by="Market_Cap", n=10),
+    dict(country="India", sector="Banking", recommendation="All", min_pe=0, max_pe=30, min_roe=5, sort_by="ROE", n=10),
+    dict(country="USA", sector="All", recommendation="Buy", min_pe=10, max_pe=40, min_roe=15, sort_by="PE_Ratio", n=20),
+    dict(country="All", sector="Technology", recommendation="All", min_pe=20, max_pe=30, min_roe=0, sort_by="Price", n=30),
+]
+
+
+def pandas_query(df, q):
+    """The original get_stock_suggestions filtering path"""
+    filtered_df = df.copy()
+    if q['country'] != "All":
+        filtered_df = filtered_df[filtered_df['Country'] == q['country']]
+    if q['sector'] != "All":
+        filtered_df = filtered_df[filtered_df['Sector'] == q['sector']]
+    if q['recommendation'] != "All":
+        filtered_df = filtered_df[filtered_df['Recommendation'] == q['recommendation']]
+    filtered_df = filtered_df[(filtered_df['PE_Ratio'] >= q['min_pe']) & (filtered_df['PE_Ratio'] <= q['max_pe'])]
+    filtered_df = filtered_df[filtered_df['ROE'] >= q['min_roe']]
+    ascending = q['sort_by'] in ['PE_Ratio', 'Volatility']
+    return filtered_df.sort_values(by=q['sort_by'], ascending=ascending).head(q['n'])
+
+
+def index_query(index, q):
+    categories = {c: q[k] for c, k in [('Country', 'country'), ('Sector', 'sector'),
+                                       ('Recommendation', 'recommendation')] if q[k] != "All"}
+    rows = index.filter(categories, {'PE_Ratio': (q['min_pe'], q['max_pe']), 'ROE': (q['min_roe'], None)})
+    return index.top_n(rows, q['sort_by'], q['sort_by'] in ['PE_Ratio', 'Volatility'], q['n'])
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(num_rows, repeat):
+    df = create_synthetic_universe(num_rows)
+    start = time.perf_counter()
+    index = ScreenerIndex(df)
+    print(f"Rows: {num_rows} | index build: {(time.perf_counter() - start) * 1e3:.1f}ms")
+    print(f"{'query':<8}{'pandas (ms)':>14}{'index (ms)':>14}{'speedup':>10}")
+    for i, q in enumerate(QUERIES):
+        expected = pandas_query(df, q)
+        got = df.iloc[index_query(index, q)]
+        assert set(got['Symbol']) == set(expected['Symbol']) or np.allclose(
+            got[q['sort_by']].to_numpy(), expected[q['sort_by']].to_numpy()), f"query {i} mismatch"
+        pandas_time = best_of(lambda: pandas_query(df, q), repeat)
+        index_time = best_of(lambda: index_query(index, q), repeat)
+        print(f"{i:<8}{pandas_time * 1e3:>14.3f}{index_time * 1e3:>14.3f}{pandas_time / index_time:>9.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Dataset load time: binary snapshot vs. the Excel workbook.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_snapshot --rows 100000 --excel-rows 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from create_sample_data import create_synthetic_universe
+from screener import ScreenerIndex
+from snapshot import load_snapshot, write_snapshot
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(num_rows, excel_rows):
+    df = create_synthetic_universe(num_rows)
+    with tempfile.TemporaryDirectory() as root:
+        snapshot_path = os.path.join(root, 'universe.snapshot')
+        _, write_time = timed(lambda: write_snapshot(df, snapshot_path))
+        loaded, load_time = timed(lambda: load_snapshot(snapshot_path))
+        _, index_time = timed(lambda: ScreenerIndex(loaded))
+        assert loaded.shape == df.shape
+
+        excel_path = os.path.join(root, 'universe.xlsx')
+        df.head(excel_rows).to_excel(excel_path, sheet_name='All_Stocks', index=False)
+        _, excel_time = timed(lambda: pd.read_excel(excel_path, sheet_name='All_Stocks'))
+
+    print(f"Rows: {num_rows}")
+    print(f"Snapshot write:              {write_time:8.3f}s")
+    print(f"Snapshot load:               {load_time:8.3f}s")
+    print(f"Screener index build:        {index_time:8.3f}s")
+    print(f"Startup (load + index):      {load_time + index_time:8.3f}s")
+    print(f"Excel load ({excel_rows} rows):     {excel_time:8.3f}s "
+          f"(~{excel_time * num_rows / excel_rows:.1f}s extrapolated to {num_rows})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--excel-rows', type=int, default=10000, help="rows written to the Excel comparison file")
+    args = parser.parse_args()
+    run(args.rows, args.excel_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Cold-start report for the entry points, based on python -X importtime.
+
+Each target runs in a fresh interpreter. The report shows wall time and the
+heaviest imports (top level and their direct children), so regressions in startup cost are easy to spot.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --top 5 --target "import main"
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    'main (CLI import)': "import main",
+    'gradio_app (import)': "import gradio_app",
+    'gradio_app (build UI)': "import gradio_app; gradio_app.create_app()",
+    'stock_analyzer_app (import)': "import stock_analyzer_app",
+    'stock_analyzer_app (build UI)': "import stock_analyzer_app; stock_analyzer_app.create_app()",
+}
+
+
+def import_times(code):
+    """Run `code` under -X importtime and return (wall seconds, {package: cumulative us})"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{code!r} failed:\n{result.stderr[-2000:]}")
+
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, raw_name = line[len('import time:'):].split('|')
+        # Nesting is shown as two extra spaces per level; keep the first two levels
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        if depth <= 1:
+            name = raw_name.strip()
+            packages[name] = max(packages.get(name, 0), int(cumulative_us))
+    return wall, packages
+
+
+def run(targets, top):
+    for label, code in targets.items():
+        wall, packages = import_times(code)
+        print(f"\n{label}: {wall:.3f}s wall  ({code})")
+        for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            print(f"    {name:<24}{us / 1e3:>10.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=8, help="number of imports to list per target")
+    parser.add_argument('--target', action='append', help="custom Python statement to time")
+    args = parser.parse_args()
+    targets = {code: code for code in args.target} if args.target else TARGETS
+    run(targets, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Streaming quote updates replayed from a synthetic tick file.
+
+Seeds a QuoteStreamer with FakeProvider histories, replays the ticks and
+checks the final indicators against a full recompute. Run from the
+repository root:
+
+    python -m benchmarks.bench_streaming --symbols 500 --polls 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import indicators
+from providers import FakeProvider
+from streaming import SEED_BARS, QuoteStreamer, ReplayTickSource, write_synthetic_ticks
+
+
+def run(num_symbols, polls, tick_ratio):
+    fake = FakeProvider(allow_unknown=True, history_days=SEED_BARS)
+    symbols = [f"SYM{i:05d}" for i in range(num_symbols)]
+    histories = [fake.get_history(symbol) for symbol in symbols]
+    closes = np.vstack([hist['Close'].to_numpy() for hist in histories])
+    last_bar = histories[0].index[-1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_synthetic_ticks(os.path.join(tmp, 'ticks.csv'), dict(zip(symbols, closes[:, -1])),
+                                     polls=polls, start=last_bar + np.timedelta64(10, 'h'),
+                                     tick_ratio=tick_ratio)
+        streamer = QuoteStreamer(symbols, closes, ReplayTickSource(path), last_bar)
+
+        changed_rows = 0
+        start = time.perf_counter()
+        while not streamer.source.exhausted:
+            streamer.step()
+            changed_rows += len(streamer.changes())
+        elapsed = time.perf_counter() - start
+
+    print(f"Watchlist: {num_symbols} symbols, {polls} polls, {streamer.ticks} ticks")
+    print(f"{'Replay':<24}{elapsed:>10.3f}s {elapsed / polls * 1e3:>10.2f}ms per poll")
+    print(f"{'Rows pushed':<24}{changed_rows:>10} ({changed_rows / (num_symbols * polls):.0%} of full refreshes)")
+
+    # The incremental values must match recomputing over the revised history
+    final = closes.copy()
+    final[:, -1] = streamer.prices
+    expected = indicators.latest_indicators(final)
+    values = streamer.indicators.values()
+    for key in ('50DMA', '200DMA', 'RSI', 'MACD', 'Volatility'):
+        error = np.nanmax(np.abs(values[key] - expected[key]))
+        print(f"{key + ' max error':<24}{error:>10.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--polls', type=int, default=200)
+    parser.add_argument('--tick-ratio', type=float, default=0.3)
+    args = parser.parse_args()
+    run(args.symbols, args.polls, args.tick_ratio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Suggestion engine against the local stub model server.
+
+A burst of UI clicks (the same few prompts from many threads) is sent to the
+stub once through a bare model call per click and once through the
+SuggestionEngine, which normalizes prompts, caches answers and coalesces
+identical in-flight requests. A second run makes the stub slower than the
+engine's timeout to show the ranked fallback. Run from the repository root:
+
+    python -m benchmarks.bench_suggestions --latency 0.5 --clicks 200
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_llm_server import serve
+from create_sample_data import create_synthetic_universe
+from stock_analyzer_app import StockDataAnalyzer
+from suggestions import SuggestionEngine, normalize
+
+
+def clicks(n):
+    prompts = []
+    for i in range(n):
+        country = ('India', 'USA', 'Australia')[i % 3]
+        kind = ('technical', 'fundamental', 'both')[(i // 3) % 3]
+        count = (5, 10)[(i // 9) % 2]
+        prompts.append((f"Top {count} stocks for {country} based on {kind} indicators", country))
+    return prompts
+
+
+def run(label, answer, prompts, threads):
+    def timed(args):
+        start = time.perf_counter()
+        answer(*args)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(timed, prompts))
+    elapsed = time.perf_counter() - start
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"  {label:<26} {elapsed:>7.2f}s  p50 {statistics.median(latencies) * 1e3:>8.1f}ms  "
+          f"p95 {p95 * 1e3:>8.1f}ms", end='')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.5, help='stub seconds per completion')
+    parser.add_argument('--clicks', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--rows', type=int, default=30000, help='local dataset size for the fallback ranking')
+    args = parser.parse_args()
+
+    analyzer = StockDataAnalyzer()
+    analyzer.df = create_synthetic_universe(args.rows)
+    prompts = clicks(args.clicks)
+    server, model, base_url = serve(latency=args.latency)
+    print(f"{args.clicks} clicks, {len(set(normalize(*p) for p in prompts))} distinct prompts, "
+          f"stub latency {args.latency}s")
+
+    bare = SuggestionEngine(base_url=base_url, model_timeout=60, analyzer=analyzer)
+    run('model call per click', lambda prompt, country: bare._chat(*normalize(prompt, country)),
+        prompts, args.threads)
+    print(f"  model calls {model.calls}")
+
+    model.calls = 0
+    engine = SuggestionEngine(base_url=base_url, model_timeout=args.latency * 4, analyzer=analyzer)
+    run('engine', engine.suggest, prompts, args.threads)
+    print(f"  model calls {model.calls}  {engine.stats()}")
+
+    model.calls = 0
+    model.latency = args.latency * 4
+    slow = SuggestionEngine(base_url=base_url, model_timeout=args.latency / 2, analyzer=analyzer)
+    run('engine, model too slow', slow.suggest, prompts, args.threads)
+    print(f"  model calls {model.calls}  {slow.stats()}")
+    time.sleep(model.latency + 0.5)
+    sources = {entry.source for entry in slow._entries.values()}
+    print(f"  after the late completions the cache holds {sorted(sources)} answers")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Symbol lookups: SymbolIndex vs. scanning the Symbol column.
+
+Details lookups used to test membership with a scan and then select the row
+with a boolean mask; typeahead is compared with a str.startswith scan. Run
+from the repository root:
+
+    python -m benchmarks.bench_symbols --rows 10000 100000 300000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from create_sample_data import create_synthetic_universe
+from symbol_index import SymbolIndex
+
+
+def per_call(fn, args):
+    start = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    return (time.perf_counter() - start) / len(args)
+
+
+def run(num_rows, lookups):
+    df = create_synthetic_universe(num_rows)
+    start = time.perf_counter()
+    index = SymbolIndex(df)
+    build = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    symbols = df['Symbol'].to_numpy()[rng.integers(0, num_rows, lookups)].tolist()
+    prefixes = [s[:rng.integers(1, len(s) + 1)] for s in symbols]
+
+    def scan_lookup(symbol):
+        if symbol in df['Symbol'].values:
+            return df[df['Symbol'] == symbol].iloc[0]
+
+    def index_lookup(symbol):
+        return df.iloc[index.position(symbol)]
+
+    def scan_search(prefix):
+        return df.index[df['Symbol'].str.upper().str.startswith(prefix.upper())][:20]
+
+    scan, indexed = per_call(scan_lookup, symbols), per_call(index_lookup, symbols)
+    scan_s, indexed_s = per_call(scan_search, prefixes[:20]), per_call(index.search, prefixes)
+    print(f"{num_rows:>8} {build * 1e3:>9.0f}ms | details {scan * 1e3:>8.2f}ms {indexed * 1e3:>7.3f}ms "
+          f"{scan / indexed:>6.0f}x | search {scan_s * 1e3:>8.2f}ms {indexed_s * 1e3:>7.3f}ms {scan_s / indexed_s:>6.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 300000])
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+    print(f"{'rows':>8} {'build':>11} | {'':>8}{'scan':>8} {'index':>9}         | {'':>7}{'scan':>8} {'index':>9}")
+    for num_rows in args.rows:
+        run(num_rows, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
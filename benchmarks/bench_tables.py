@@ -0,0 +1,70 @@
+"""Screener/overview response size and time: paged tables vs. whole frames.
+
+The old UI sent the complete dataset to the overview table and built the
+summary with iterrows() over every result; the paged UI serializes one page
+and a capped summary. Run from the repository root:
+
+    python -m benchmarks.bench_tables --rows 30 1000 10000 100000
+"""
+import argparse
+import time
+
+from create_sample_data import create_synthetic_universe
+from stock_analyzer_app import StockDataAnalyzer
+
+QUERY = ("All", "All", 0, 100, 0, "All", "Market_Cap")
+
+
+def iterrows_summary(df):
+    """The original per-row string concatenation"""
+    summary = f"Found {len(df)} stocks matching your criteria:\n\n"
+    for _, row in df.iterrows():
+        summary += f"🏢 **{row['Symbol']}** ({row['Company']})\n"
+        summary += f"   💰 Price: ${row['Price']:.2f} | 📊 PE: {row.get('PE_Ratio', 'N/A'):.1f} | 📈 ROE: {row.get('ROE', 'N/A'):.1f}%\n"
+        summary += f"   🎯 Recommendation: {row.get('Recommendation', 'N/A')} | 🏭 Sector: {row['Sector']}\n\n"
+    return summary
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(num_rows, num_results):
+    analyzer = StockDataAnalyzer()
+    analyzer.df = create_synthetic_universe(num_rows)
+    analyzer.screener
+
+    # Whole-frame responses
+    full_json, full_overview = timed(lambda: analyzer.df.to_json(orient='split'))
+    results = analyzer.screen(*QUERY, num_results)
+    full_summary, full_summary_time = timed(lambda: iterrows_summary(results))
+    full_table = results.to_json(orient='split')
+
+    # Paged responses (second sort is the cached one a user pages through)
+    timed(lambda: analyzer.sorted_rows('ROE', False))
+    page, paged_overview = timed(lambda: analyzer.page(analyzer.sorted_rows('ROE', False), 3)[0].to_json(orient='split'))
+    rows = analyzer.screen_rows(*QUERY, num_results)
+    filtered = analyzer.df.iloc[rows]
+    summary, summary_time = timed(lambda: analyzer.summarize(filtered))
+    table = analyzer.page(rows)[0].to_json(orient='split')
+
+    print(f"{num_rows:>8} {len(full_json) / 1e3:>10.1f}KB {full_overview * 1e3:>8.1f}ms "
+          f"{len(page) / 1e3:>8.1f}KB {paged_overview * 1e3:>7.2f}ms | "
+          f"{(len(full_summary) + len(full_table)) / 1e3:>9.1f}KB {full_summary_time * 1e3:>8.1f}ms "
+          f"{(len(summary) + len(table)) / 1e3:>7.1f}KB {summary_time * 1e3:>6.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[30, 1000, 10000, 100000])
+    parser.add_argument('--results', type=int, default=None, help="screener result cap (default: every row)")
+    args = parser.parse_args()
+    print(f"{'':>8} {'overview: whole frame':>21} {'one page':>17} | {'results: whole':>20} {'paged':>15}")
+    for num_rows in args.rows:
+        run(num_rows, args.results or num_rows)
+
+
+if __name__ == "__main__":
+    main()
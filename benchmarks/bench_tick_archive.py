@@ -0,0 +1,107 @@
+"""Tick archive: compression, append speed and range-query latency.
+
+Archives per-second quotes for --symbols symbols over --days trading days
+(6.5 hour sessions) of synthetic prices: cent-tick random walks where most
+seconds leave the price unchanged, and a running session volume. Reports the
+bytes per tick against raw int64/float64 columns and a zstd Parquet file,
+then times an hour's query for one symbol (with the chunks read and skipped),
+a day's one-minute OHLC bars and a day's replay across every symbol, and
+extrapolates the disk use. Run from the repository root:
+
+    python -m benchmarks.bench_tick_archive --symbols 20 --days 5
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from tick_archive import TickArchive
+
+SESSION_SECONDS = int(6.5 * 3600)
+RAW_BYTES = 24  # int64 timestamp + float64 price + float64 volume
+
+
+def session(day, rng, start_price):
+    """One trading day of per-second (timestamps, prices, volumes)"""
+    open_at = pd.Timestamp('2024-06-03 09:30') + pd.Timedelta(days=day)
+    t = open_at.as_unit('ns').value + np.arange(SESSION_SECONDS, dtype=np.int64) * 1_000_000_000
+    steps = rng.choice([-1, 0, 0, 0, 0, 1], SESSION_SECONDS)
+    prices = np.maximum(start_price + np.cumsum(steps), 1) / 100
+    volumes = np.cumsum(rng.integers(0, 200, SESSION_SECONDS) * (steps != 0)).astype(np.float64)
+    return t, prices, volumes
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--chunk-ticks', type=int, default=4096)
+    parser.add_argument('--months', type=int, default=6, help="extrapolate disk use to this many months")
+    parser.add_argument('--universe', type=int, default=5000, help="extrapolate disk use to this many symbols")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    root = tempfile.mkdtemp()
+    archive = TickArchive(os.path.join(root, 'ticks'), chunk_ticks=args.chunk_ticks)
+    symbols = [f"SYM{i:04d}" for i in range(args.symbols)]
+    prices = {symbol: int(rng.integers(1000, 500000)) for symbol in symbols}
+    ticks = args.symbols * args.days * SESSION_SECONDS
+    parquet_bytes, append_seconds = 0, 0.0
+    try:
+        for day in range(args.days):
+            for symbol in symbols:
+                t, p, v = session(day, rng, prices[symbol])
+                prices[symbol] = int(p[-1] * 100)
+                start = time.perf_counter()
+                archive.append('BENCH', symbol, t, p, v)
+                archive.flush()
+                append_seconds += time.perf_counter() - start
+                if day == 0:
+                    path = os.path.join(root, 'day.parquet')
+                    pd.DataFrame({'Time': t, 'Price': p, 'Volume': v}).to_parquet(path, compression='zstd')
+                    parquet_bytes += os.path.getsize(path)
+        usage = archive.disk_usage()
+        parquet_per_tick = parquet_bytes / (args.symbols * SESSION_SECONDS)
+        per_tick = usage['bytes'] / usage['ticks']
+        print(f"{args.symbols} symbols x {args.days} days x {SESSION_SECONDS} s = {ticks} ticks "
+              f"in {usage['chunks']} chunks of {args.chunk_ticks}")
+        print(f"  append + flush       {ticks / append_seconds / 1e6:>8.2f}M ticks/s")
+        print(f"  archive              {per_tick:>8.2f} bytes/tick  ({RAW_BYTES / per_tick:.0f}x smaller than raw "
+              f"{RAW_BYTES} bytes, {parquet_per_tick / per_tick:.1f}x smaller than zstd Parquet "
+              f"{parquet_per_tick:.2f})")
+
+        last_day = pd.Timestamp('2024-06-03 09:30') + pd.Timedelta(days=args.days - 1)
+        hour = (last_day + pd.Timedelta(hours=2), last_day + pd.Timedelta(hours=3))
+        archive.chunks_read = archive.chunks_skipped = 0
+        frame, seconds = timed(lambda: archive.query('BENCH', symbols[0], *hour))
+        print(f"  one hour, 1 symbol   {seconds * 1e3:>8.2f}ms  {len(frame)} ticks, "
+              f"{archive.chunks_read // 5} chunks read, {archive.chunks_skipped // 5} skipped")
+        day = (last_day, last_day + pd.Timedelta(hours=7))
+        bars, seconds = timed(lambda: archive.resample('BENCH', symbols[0], '1min', *day))
+        print(f"  1min bars, 1 day     {seconds * 1e3:>8.2f}ms  {len(bars)} bars")
+        replay, seconds = timed(lambda: archive.replay(archive.keys('BENCH'), *day), repeat=1)
+        print(f"  replay 1 day, all    {seconds * 1e3:>8.0f}ms  {len(replay)} ticks "
+              f"({len(replay) / seconds / 1e6:.2f}M ticks/s)")
+
+        projected = per_tick * SESSION_SECONDS * 21 * args.months * args.universe
+        print(f"  {args.months} months x {args.universe} symbols of per-second ticks: "
+              f"{projected / 1e9:.1f} GB (raw {RAW_BYTES * projected / per_tick / 1e9:.0f} GB)")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Intraday updates: StockDataAnalyzer.update_rows vs. reloading the dataset.
+
+A batch of price ticks for `--changes` random stocks is applied with
+update_rows (derived columns for those rows only, patched screener index)
+and, for comparison, the way a refresh used to work: write the changed
+dataset, reload it and rebuild the index. The first update_rows batch also
+seeds the changed rows' indicators; later batches reuse them. Both paths must
+give the same screen. Run from the repository root:
+
+    python -m benchmarks.bench_updates --rows 100000 --changes 10 100 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from create_sample_data import create_synthetic_universe
+from scoring import fundamental_score, recommend
+from snapshot import write_snapshot
+from stock_analyzer_app import StockDataAnalyzer
+
+SCREEN = ('All', 'All', 0, 40, 10, 'Buy', 'PE_Ratio', 100)
+
+
+def ticks(df, rows, rng):
+    prices = df['Price'].to_numpy()[rows] * rng.uniform(0.97, 1.03, len(rows))
+    return [{'Symbol': s, 'Price': round(float(p), 2)} for s, p in zip(df['Symbol'].to_numpy()[rows], prices)]
+
+
+def full_reload(df, path):
+    # Recompute the derived column for every row, then reload and re-index
+    df['Recommendation'] = recommend(fundamental_score(df['PE_Ratio'], df['ROE'], df['Revenue_Growth']))
+    write_snapshot(df, path)
+    analyzer = StockDataAnalyzer(path)
+    analyzer.screen_rows(*SCREEN)
+    return analyzer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--changes', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    analyzer = StockDataAnalyzer()
+    analyzer.df = create_synthetic_universe(args.rows)
+    analyzer.screen_rows(*SCREEN)
+    analyzer.symbols
+    path = os.path.join(tempfile.mkdtemp(), 'bench.snapshot')
+
+    print(f"{args.rows} rows")
+    print(f"{'changes':>8} {'first update':>13} {'next update':>12} {'full reload':>12} {'speedup':>8} same screen")
+    for count in args.changes:
+        rows = rng.choice(args.rows, count, replace=False)
+        start = time.perf_counter()
+        analyzer.update_rows(ticks(analyzer.df, rows, rng))
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        analyzer.update_rows(ticks(analyzer.df, rows, rng))
+        incremental = time.perf_counter() - start
+        screen = analyzer.screen_rows(*SCREEN)
+
+        start = time.perf_counter()
+        reloaded = full_reload(analyzer.df.copy(), path)
+        reload = time.perf_counter() - start
+        same = np.array_equal(screen, reloaded.screen_rows(*SCREEN))
+        print(f"{count:>8} {first * 1e3:>11.1f}ms {incremental * 1e3:>10.1f}ms {reload * 1e3:>10.0f}ms "
+              f"{reload / incremental:>7.0f}x {same}")
+
+
+if __name__ == '__main__':
+    main()
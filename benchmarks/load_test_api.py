@@ -0,0 +1,129 @@
+"""Load test for api_server against the offline provider.
+
+Starts `uvicorn api_server:app` in a subprocess with FakeProvider data
+(XTRADE_PROVIDER=fake), drives it from worker threads that each keep one
+HTTP/1.1 connection alive, and reports latency percentiles and throughput.
+Use --url to target an already running server instead.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test_api --requests 2000 --concurrency 50 --latency 0.05
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAYLOADS = [
+    {'country': country, 'analysisType': analysis, 'numStocks': count}
+    for country in ['India', 'USA', 'Australia']
+    for analysis in ['technical', 'fundamental', 'both']
+    for count in [5, 10]
+]
+
+
+def start_local_server(port, latency):
+    """Run api_server in a subprocess with the offline provider"""
+    env = dict(os.environ, XTRADE_PROVIDER='fake', XTRADE_FAKE_LATENCY=str(latency),
+               XTRADE_HISTORY_DIR=os.path.join(ROOT, 'data', 'loadtest-history'),
+               XTRADE_TICK_ARCHIVE_DIR=os.path.join(ROOT, 'data', 'loadtest-ticks'))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api_server:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=ROOT, env=env
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/healthz')
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("API server did not start within 60s")
+
+
+def worker(host, port, count, latencies, errors, seed):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'}
+    for _ in range(count):
+        body = json.dumps(rng.choice(PAYLOADS))
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/api/stocks', body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=60)
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run_load(url, total, concurrency):
+    parts = urlsplit(url)
+    latencies, errors = [], []
+    per_worker = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(parts.hostname, parts.port, n, latencies, errors, i))
+               for i, n in enumerate(per_worker)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=10)
+    conn.request('GET', '/api/stats')
+    stats = json.loads(conn.getresponse().read())
+    return np.array(latencies), errors, elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="target an existing server instead of starting one")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.05, help="fake provider latency (seconds)")
+    args = parser.parse_args()
+
+    url = args.url
+    process = None
+    if url is None:
+        process = start_local_server(args.port, args.latency)
+        url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        latencies, errors, elapsed, stats = run_load(url, args.requests, args.concurrency)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(f"Requests: {len(latencies)} | concurrency: {args.concurrency} | errors: {len(errors)}")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} req/s over {elapsed:.2f}s")
+    print(f"Latency p50: {np.percentile(latencies, 50) * 1e3:.1f}ms | "
+          f"p90: {np.percentile(latencies, 90) * 1e3:.1f}ms | p99: {np.percentile(latencies, 99) * 1e3:.1f}ms")
+    print(f"Server stats: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Load test for the Gradio screener app with many concurrent users.
+
+Writes a synthetic universe snapshot, starts `stock_analyzer_app.py` on it in
+a subprocess for each --server-concurrency value and has --users simulated
+users drive it through gradio_client for --duration seconds. Each user runs a
+screen with random filters, pages through the data overview, then looks a
+stock up by typeahead and opens its details. Reports throughput and latency
+percentiles per action. --refresh rewrites the snapshot every few seconds
+with moved prices while the users run, so the app reloads and swaps datasets
+under load. Use --url to target an already running app instead.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test_screener --rows 100000 --users 32 --server-concurrency 1 8
+"""
+import argparse
+import http.client
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COUNTRIES = ['All', 'All', 'India', 'USA', 'Australia']
+RECOMMENDATIONS = ['All', 'Buy', 'Hold', 'Strong Buy']
+SORTS = ['Price', 'PE_Ratio', 'ROE', 'Market_Cap', 'Revenue_Growth']
+OVERVIEW_SORTS = ['Dataset order', 'Price', 'Market_Cap', 'Company']
+PREFIXES = ['RE', 'TC', 'IN', 'HD', 'AA', 'MS', 'GO', 'CB', 'BH', 'WB']
+
+
+def start_local_app(path, port, concurrency, chart_workers, reload_interval):
+    """Run the screener app on `path` in a subprocess and wait until it answers"""
+    env = dict(os.environ, GRADIO_ANALYTICS_ENABLED='False')
+    command = [sys.executable, 'stock_analyzer_app.py', path, '--port', str(port), '--concurrency', str(concurrency),
+               '--reload-interval', str(reload_interval)]
+    if chart_workers:
+        command += ['--chart-workers', str(chart_workers)]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Screener app exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError("Screener app did not start within 120s")
+
+
+def user(url, deadline, latencies, errors, seed, think):
+    from gradio_client import Client
+    rng = random.Random(seed)
+    client = Client(url, verbose=False)
+
+    def act(name, *args, api_name):
+        start = time.perf_counter()
+        try:
+            result = client.predict(*args, api_name=api_name)
+        except Exception as e:
+            errors[name].append(type(e).__name__)
+            return None
+        latencies[name].append(time.perf_counter() - start)
+        if think:
+            time.sleep(rng.expovariate(1 / think))
+        return result
+
+    while time.monotonic() < deadline:
+        min_pe = rng.choice([0, 5, 10])
+        act('search', rng.choice(COUNTRIES), 'All', min_pe, min_pe + rng.choice([15, 25, 40]), rng.choice([0, 10, 15]),
+            rng.choice(RECOMMENDATIONS), rng.choice(SORTS), rng.choice([10, 20, 50]), False, api_name='/search')
+        act('overview page', rng.choice(OVERVIEW_SORTS), rng.random() < 0.5, rng.randint(1, 50),
+            api_name='/show_overview_page')
+        choices = act('typeahead', rng.choice(PREFIXES), api_name='/find_symbols')
+        key = choices.get('value') if isinstance(choices, dict) else None
+        if key:
+            act('details', key, api_name='/get_stock_details')
+
+
+def refresher(path, df, interval, stop, written):
+    # Rewrite the snapshot with moved prices, as a refresh job would
+    from snapshot import write_snapshot
+    rng = np.random.default_rng(1)
+    while not stop.wait(interval):
+        moved = df.copy()
+        moved['Price'] = (moved['Price'] * rng.uniform(0.98, 1.02, len(moved))).round(2)
+        write_snapshot(moved, path)
+        written.append(time.monotonic())
+
+
+def run_load(url, users, duration, think):
+    latencies, errors = defaultdict(list), defaultdict(list)
+    deadline = time.monotonic() + duration
+    threads = [threading.Thread(target=user, args=(url, deadline, latencies, errors, i, think)) for i in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def report(latencies, errors, elapsed):
+    total = sum(len(v) for v in latencies.values())
+    print(f"  {'action':<14}{'count':>7}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'errors':>8}")
+    for name in list(latencies) + [n for n in errors if n not in latencies]:
+        values = np.array(latencies.get(name, [])) * 1e3
+        if len(values):
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            print(f"  {name:<14}{len(values):>7}{len(values) / elapsed:>8.1f}{p50:>7.0f}ms{p95:>7.0f}ms"
+                  f"{p99:>7.0f}ms{values.max():>7.0f}ms{len(errors.get(name, [])):>8}")
+        else:
+            print(f"  {name:<14}{0:>7}{'':>44}{len(errors.get(name, [])):>8}")
+    print(f"  {'all':<14}{total:>7}{total / elapsed:>8.1f}  over {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="target a running app instead of starting one")
+    parser.add_argument('--port', type=int, default=7870)
+    parser.add_argument('--rows', type=int, default=100000, help="synthetic universe size")
+    parser.add_argument('--users', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=30, help="seconds per run")
+    parser.add_argument('--think', type=float, default=0.0, help="mean seconds a user waits between actions")
+    parser.add_argument('--server-concurrency', type=int, nargs='+', default=[1, 8],
+                        help="Gradio queue concurrency for each local run (1 serializes every event)")
+    parser.add_argument('--chart-workers', type=int, default=None)
+    parser.add_argument('--refresh', type=float, default=0, help="seconds between dataset rewrites (0: none)")
+    args = parser.parse_args()
+
+    if args.url:
+        print(f"{args.url} | {args.users} users for {args.duration:g}s")
+        report(*run_load(args.url, args.users, args.duration, args.think))
+        return
+
+    from create_sample_data import create_synthetic_universe
+    from snapshot import write_snapshot
+    df = create_synthetic_universe(args.rows)
+    path = os.path.join(tempfile.mkdtemp(), 'loadtest.snapshot')
+    write_snapshot(df, path)
+
+    for concurrency in args.server_concurrency:
+        process = start_local_app(path, args.port, concurrency, args.chart_workers, 1 if args.refresh else 0)
+        stop, written = threading.Event(), []
+        if args.refresh:
+            threading.Thread(target=refresher, args=(path, df, args.refresh, stop, written), daemon=True).start()
+        try:
+            print(f"\n{args.rows} rows | {args.users} users for {args.duration:g}s | queue concurrency {concurrency}"
+                  + (f" | dataset rewritten every {args.refresh:g}s" if args.refresh else ""))
+            report(*run_load(f"http://127.0.0.1:{args.port}", args.users, args.duration, args.think))
+            if args.refresh:
+                print(f"  {len(written)} dataset refreshes during the run")
+        finally:
+            stop.set()
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
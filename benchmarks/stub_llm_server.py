@@ -0,0 +1,112 @@
+"""Local OpenAI-compatible chat server for testing the suggestion engine.
+
+Answers POST /v1/chat/completions with a JSON array of sample symbols for the
+country named in the prompt, after `--latency` seconds. GET /stats returns the
+number of completions served. Run from the repository root:
+
+    python -m benchmarks.stub_llm_server --port 8765 --latency 2
+    XTRADE_LLM_BASE_URL=http://127.0.0.1:8765/v1 python main.py --countries India
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from suggestions import SAMPLE_STOCKS
+
+
+class StubModel:
+    """Latency, failure rate and call counter shared by the request handlers"""
+
+    def __init__(self, latency=0.5, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def complete(self, messages):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        prompt = messages[-1]['content'] if messages else ''
+        country = next((c for c in SAMPLE_STOCKS if c.lower() in prompt.lower()), 'USA')
+        match = re.search(r'\d+', prompt)
+        count = int(match.group()) if match else 10
+        # Reversed so answers are told apart from the engine's own fallback
+        return json.dumps(SAMPLE_STOCKS[country][::-1][:count])
+
+
+def make_handler(model):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/stats':
+                self._send(200, {'calls': model.calls})
+            else:
+                self._send(404, {'error': {'message': 'not found'}})
+
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._send(404, {'error': {'message': 'not found'}})
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if random.random() < model.failure_rate:
+                self._send(503, {'error': {'message': 'stub failure', 'type': 'server_error'}})
+                return
+            content = model.complete(request.get('messages', []))
+            self._send(200, {
+                'id': 'stub-completion',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': request.get('model', 'stub'),
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': content}}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+            })
+
+    return Handler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 resets connections under a burst of clients
+    request_queue_size = 128
+
+
+def serve(port=0, latency=0.5, failure_rate=0.0):
+    """Start the stub on a background thread; returns (server, model, base_url)"""
+    model = StubModel(latency, failure_rate)
+    server = StubServer(('127.0.0.1', port), make_handler(model))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, model, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds per completion')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of requests answered 503')
+    args = parser.parse_args()
+    server, _, base_url = serve(args.port, args.latency, args.failure_rate)
+    print(f"Stub model listening on {base_url} (latency {args.latency}s)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
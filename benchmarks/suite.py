@@ -0,0 +1,399 @@
+"""Benchmark suite for the fetch -> screen -> render pipeline, with baselines.
+
+Runs every registered case on synthetic universes scaled from the 30-row
+create_sample_data set (--sizes, 30 to 100k rows) with the offline provider
+standing in for the network, and times each case: micro cases time one
+analyzer or fetch call, end-to-end cases a whole screen with its summary and
+serialized charts, or a fetch of fresh quotes applied to the dataset and
+screened again. Each case runs until it has --repeat timings and --min-time
+seconds; the median is compared with the stored baseline and a case more than
+its threshold slower (and --min-delta-ms slower in absolute terms) is a
+regression, which makes the exit status 1. Results are written as JSON
+(--output) so runs of different commits can be compared with --compare.
+Run from the repository root:
+
+    python -m benchmarks.suite                              # run and compare with benchmarks/baseline.json
+    python -m benchmarks.suite --sizes 30 1000 --filter screen --output run.json
+    python -m benchmarks.suite --save-baseline              # accept this run as the new baseline
+    python -m benchmarks.suite --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+SCHEMA = 1
+SIZES = [30, 1000, 10000, 100000]
+# Relative slowdown of the median tolerated before a case counts as a regression
+THRESHOLDS = {'micro': 0.30, 'e2e': 0.20}
+MIN_DELTA_MS = 0.5
+
+SCREENS = [
+    ('All', 'All', 0, 40, 10, 'Buy', 'PE_Ratio', 20),
+    ('India', 'All', 5, 30, 0, 'All', 'Market_Cap', 50),
+    ('USA', 'Technology', 0, 100, 15, 'All', 'ROE', 10),
+    ('All', 'Banking', 0, 25, 0, 'Hold', 'Price', 20),
+]
+PREFIXES = ['RE', 'TC', 'IN', 'AA', 'MS', 'GO', 'HD', 'BH']
+FETCH_SYMBOLS = 100
+UPDATE_ROWS = 100
+
+CASES = []
+
+
+def case(kind, name, scaled=True, threshold=None):
+    """Register `setup(fixtures, rows)`, which returns the callable to time"""
+    def register(setup):
+        CASES.append({'kind': kind, 'name': name, 'setup': setup, 'scaled': scaled,
+                      'threshold': threshold if threshold is not None else THRESHOLDS[kind],
+                      'description': (setup.__doc__ or '').strip()})
+        return setup
+    return register
+
+
+class Fixtures:
+    """Universes, analyzers and an offline fetch path shared by the cases"""
+
+    def __init__(self, root):
+        self.root = root
+        self._universes = {}
+        self._analyzers = {}
+        self._offline = False
+
+    def universe(self, rows):
+        if rows not in self._universes:
+            from create_sample_data import create_synthetic_universe
+            self._universes[rows] = create_synthetic_universe(rows)
+        return self._universes[rows]
+
+    def analyzer(self, rows, fresh=False):
+        """A warmed analyzer on the `rows` universe; `fresh` ones are not shared"""
+        if not fresh and rows in self._analyzers:
+            return self._analyzers[rows]
+        from stock_analyzer_app import StockDataAnalyzer
+        analyzer = StockDataAnalyzer()
+        analyzer.df = self.universe(rows).copy()
+        analyzer.dataset.prepare()
+        if not fresh:
+            self._analyzers[rows] = analyzer
+        return analyzer
+
+    def offline(self):
+        """Route fetches to the fake provider, with history and ticks kept under the suite's directory"""
+        if not self._offline:
+            import main
+            from providers import use_offline_provider
+            use_offline_provider(allow_unknown=True)
+            main.HISTORY_DIR = os.path.join(self.root, 'history')
+            main.TICK_ARCHIVE_DIR = os.path.join(self.root, 'ticks')
+            self._offline = True
+
+
+def _render(result):
+    # What Gradio sends for the charts: the figures as JSON
+    return sum(len(figure.to_json()) for figure in result[2:] if figure is not None)
+
+
+@case('micro', 'fetch_stock_data', scaled=False, threshold=0.5)
+def fetch_one(fixtures, rows):
+    """fetch_stock_data for each of the 30 sample symbols, uncached, warm history store"""
+    from main import fetch_stock_data
+    fixtures.offline()
+    symbols = fixtures.universe(30)['Symbol'].tolist()
+    return lambda: [fetch_stock_data(symbol, 'USA', use_cache=False) for symbol in symbols]
+
+
+@case('micro', 'fetch_stock_data_batch', scaled=False, threshold=0.5)
+def fetch_batch(fixtures, rows):
+    """fetch_stock_data_batch for 100 symbols on 8 threads, uncached"""
+    from main import fetch_stock_data_batch
+    fixtures.offline()
+    symbols = fixtures.universe(1000)['Symbol'].tolist()[:FETCH_SYMBOLS]
+    return lambda: fetch_stock_data_batch(symbols, 'USA', max_workers=8, use_cache=False)
+
+
+@case('micro', 'screen_rows')
+def screen_rows(fixtures, rows):
+    """screen_rows for four screens"""
+    analyzer = fixtures.analyzer(rows)
+    return lambda: [analyzer.screen_rows(*screen) for screen in SCREENS]
+
+
+@case('micro', 'search_symbols')
+def search_symbols(fixtures, rows):
+    """Typeahead for eight prefixes"""
+    analyzer = fixtures.analyzer(rows)
+    return lambda: [analyzer.search_symbols(prefix) for prefix in PREFIXES]
+
+
+@case('micro', 'get_stock_details')
+def get_stock_details(fixtures, rows):
+    """get_stock_details for 20 random symbols"""
+    analyzer = fixtures.analyzer(rows)
+    symbols = np.random.default_rng(0).choice(analyzer.df['Symbol'].to_numpy(), 20).tolist()
+    return lambda: [analyzer.get_stock_details(symbol) for symbol in symbols]
+
+
+@case('micro', 'create_price_chart')
+def create_price_chart(fixtures, rows):
+    """create_price_chart on the whole universe"""
+    analyzer = fixtures.analyzer(rows)
+    return lambda: analyzer.create_price_chart(analyzer.df)
+
+
+@case('micro', 'create_pe_roe_scatter')
+def create_pe_roe_scatter(fixtures, rows):
+    """create_pe_roe_scatter on the whole universe"""
+    analyzer = fixtures.analyzer(rows)
+    return lambda: analyzer.create_pe_roe_scatter(analyzer.df)
+
+
+@case('micro', 'create_sector_distribution')
+def create_sector_distribution(fixtures, rows):
+    """create_sector_distribution on the whole universe"""
+    analyzer = fixtures.analyzer(rows)
+    return lambda: analyzer.create_sector_distribution(analyzer.df)
+
+
+@case('micro', 'update_rows')
+def update_rows(fixtures, rows):
+    """update_rows with price ticks for 100 random stocks"""
+    analyzer = fixtures.analyzer(rows, fresh=True)
+    rng = np.random.default_rng(0)
+    positions = rng.choice(rows, min(rows, UPDATE_ROWS), replace=False)
+    symbols = analyzer.df['Symbol'].to_numpy()[positions]
+
+    def run():
+        prices = analyzer.df['Price'].to_numpy()[positions] * rng.uniform(0.98, 1.02, len(positions))
+        return analyzer.update_rows([{'Symbol': s, 'Price': round(float(p), 2)} for s, p in zip(symbols, prices)])
+    return run
+
+
+@case('micro', 'load_snapshot')
+def load_snapshot(fixtures, rows):
+    """Load the dataset snapshot"""
+    from snapshot import load_snapshot, write_snapshot
+    path = os.path.join(fixtures.root, f'universe-{rows}.snapshot')
+    write_snapshot(fixtures.universe(rows), path)
+    return lambda: load_snapshot(path)
+
+
+@case('e2e', 'screen_render')
+def screen_render(fixtures, rows):
+    """get_stock_suggestions (screen, summary, charts built cold) and the charts serialized"""
+    analyzer = fixtures.analyzer(rows)
+
+    def run():
+        analyzer.chart_cache.clear()
+        return [_render(analyzer.get_stock_suggestions(*screen)) for screen in SCREENS[:2]]
+    return run
+
+
+@case('e2e', 'fetch_screen_render', threshold=0.3)
+def fetch_screen_render(fixtures, rows):
+    """Fetch 100 quotes offline, apply them with update_rows, then screen and render"""
+    from main import fetch_stock_data_batch
+    fixtures.offline()
+    analyzer = fixtures.analyzer(rows, fresh=True)
+    symbols = analyzer.df['Symbol'].sample(min(rows, FETCH_SYMBOLS), random_state=0).tolist()
+
+    def run():
+        quotes = fetch_stock_data_batch(symbols, 'USA', max_workers=8, use_cache=False)
+        analyzer.update_rows([{'Symbol': q['Symbol'], 'Price': q['Price'], 'Volume': q['Volume']}
+                              for q in quotes if q.get('Price') is not None])
+        return _render(analyzer.get_stock_suggestions(*SCREENS[0]))
+    return run
+
+
+def measure(fn, repeat, min_time):
+    """Per-call seconds of `fn` after one warm-up call"""
+    fn()
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat or (time.perf_counter() - start < min_time and len(times) < 1000):
+        began = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - began)
+    times = np.array(times)
+    return {'median': float(np.median(times)), 'min': float(times.min()),
+            'p95': float(np.percentile(times, 95)), 'runs': len(times)}
+
+
+def _key(kind, name, rows):
+    return f"{kind}/{name}" + (f"[{rows}]" if rows is not None else "")
+
+
+def selected(sizes, pattern=None, kind=None):
+    """(case, rows, key) for every case and size that will run"""
+    for spec in CASES:
+        if kind and spec['kind'] != kind:
+            continue
+        for rows in (sizes if spec['scaled'] else [None]):
+            key = _key(spec['kind'], spec['name'], rows)
+            if not pattern or re.search(pattern, key):
+                yield spec, rows, key
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, timeout=10,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    """Commit and machine details stored with every result file"""
+    status = _git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': _git('rev-parse', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'machine': {'platform': platform.platform(), 'processor': platform.machine(), 'cpus': os.cpu_count(),
+                    'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__},
+    }
+
+
+def run_suite(sizes, repeat, min_time, pattern=None, kind=None):
+    root = tempfile.mkdtemp(prefix='xtrade-bench-')
+    fixtures = Fixtures(root)
+    results = {}
+    print(f"  {'case':<44}{'median':>10}{'min':>10}{'p95':>10}{'runs':>6}")
+    try:
+        for spec, rows, key in selected(sizes, pattern, kind):
+            fn = spec['setup'](fixtures, rows if rows is not None else 30)
+            timing = measure(fn, repeat, min_time)
+            results[key] = dict(kind=spec['kind'], case=spec['name'], rows=rows, threshold=spec['threshold'],
+                                **timing)
+            print(f"  {key:<44}{_format(timing['median']):>10}{_format(timing['min']):>10}"
+                  f"{_format(timing['p95']):>10}{timing['runs']:>6}", flush=True)
+    finally:
+        import main
+        main.flush_tick_archive()
+        shutil.rmtree(root, ignore_errors=True)
+    return dict(schema=SCHEMA, **environment(), config={'sizes': sizes, 'repeat': repeat, 'min_time': min_time},
+                results=results)
+
+
+def compare(baseline, current, threshold=None, min_delta_ms=MIN_DELTA_MS):
+    """Rows of (key, baseline median, current median, ratio, status) and the regression count"""
+    rows, regressions = [], 0
+    base, now = baseline['results'], current['results']
+    for key in list(now) + [key for key in base if key not in now]:
+        if key not in base:
+            rows.append((key, None, now[key]['median'], None, 'new'))
+            continue
+        if key not in now:
+            rows.append((key, base[key]['median'], None, None, 'not run'))
+            continue
+        before, after = base[key]['median'], now[key]['median']
+        ratio = after / before if before else float('inf')
+        limit = threshold if threshold is not None else base[key].get('threshold', THRESHOLDS[base[key]['kind']])
+        if ratio > 1 + limit and (after - before) * 1e3 > min_delta_ms:
+            status = f'REGRESSION (> +{limit:.0%})'
+            regressions += 1
+        elif ratio < 1 / (1 + limit) and (before - after) * 1e3 > min_delta_ms:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((key, before, after, ratio, status))
+    return rows, regressions
+
+
+def print_comparison(baseline, current, rows):
+    describe = lambda r: f"{(r.get('commit') or 'unknown')[:10]}{'+dirty' if r.get('dirty') else ''} ({r.get('created')})"
+    print(f"\nbaseline {describe(baseline)} vs {describe(current)}")
+    if baseline.get('machine') != current.get('machine'):
+        print("  note: results come from different machines or library versions")
+    print(f"  {'case':<44}{'baseline':>10}{'current':>10}{'change':>9}  status")
+    for key, before, after, ratio, status in rows:
+        change = f"{ratio - 1:+.0%}" if ratio is not None else ''
+        print(f"  {key:<44}{_format(before):>10}{_format(after):>10}{change:>9}  {status}")
+
+
+def _format(seconds):
+    if seconds is None:
+        return '-'
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def _read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write(path, results):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="universe rows for scaled cases")
+    parser.add_argument('--filter', help="regular expression on case keys, e.g. 'e2e/' or 'chart'")
+    parser.add_argument('--kind', choices=sorted(THRESHOLDS))
+    parser.add_argument('--repeat', type=int, default=5, help="minimum timed calls per case")
+    parser.add_argument('--min-time', type=float, default=0.5, help="minimum seconds of timed calls per case")
+    parser.add_argument('--output', help="write the results as JSON")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline")
+    parser.add_argument('--threshold', type=float, help="override every case's relative threshold (0.2 = 20%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=MIN_DELTA_MS,
+                        help="ignore slowdowns smaller than this in absolute terms")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="compare two result files instead of running")
+    parser.add_argument('--list', action='store_true', help="list the cases and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for spec, rows, key in selected(args.sizes, args.filter, args.kind):
+            print(f"  {key:<44}{spec['description']}")
+        return
+    if args.compare:
+        baseline, current = (_read(path) for path in args.compare)
+        rows, regressions = compare(baseline, current, args.threshold, args.min_delta_ms)
+        print_comparison(baseline, current, rows)
+        sys.exit(1 if regressions else 0)
+
+    current = run_suite(args.sizes, args.repeat, args.min_time, args.filter, args.kind)
+    if args.output:
+        _write(args.output, current)
+    if args.save_baseline:
+        if os.path.exists(args.baseline) and (args.filter or args.kind):
+            # A partial run only replaces the cases it ran
+            stored = _read(args.baseline)
+            current = dict(current, results=dict(stored['results'], **current['results']))
+        _write(args.baseline, current)
+        print(f"\nSaved the baseline to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; create one with --save-baseline")
+        return
+    rows, regressions = compare(_read(args.baseline), current, args.threshold, args.min_delta_ms)
+    # Cases this run skipped on purpose are not reported as missing
+    rows = [row for row in rows if row[4] != 'not run']
+    print_comparison(_read(args.baseline), current, rows)
+    if regressions:
+        print(f"\n{regressions} regression(s)")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import metrics
+
+
+def frame_fingerprint(df):
+    """Content hash of a DataFrame's rows, index and column names"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """Bounded LRU of built figures keyed by chart type and row fingerprint"""
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._figures),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+    def get(self, chart_type, df, build, fingerprint=None):
+        """Return the cached figure for `df`, calling `build(df)` on a miss.
+
+        Pass a precomputed `fingerprint` when several charts share the same rows.
+        """
+        key = (chart_type, fingerprint or frame_fingerprint(df))
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                metrics.note('chart_cache_lookups_total', result='hit')
+                return self._figures[key]
+            self.misses += 1
+        metrics.note('chart_cache_lookups_total', result='miss')
+
+        with metrics.timer('chart_build', chart=chart_type):
+            figure = build(df)
+        with self._lock:
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_size:
+                self._figures.popitem(last=False)
+                self.evictions += 1
+        return figure
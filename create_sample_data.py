@@ -3,6 +3,20 @@ import numpy as np
 import random
 from datetime import datetime, timedelta
 
+from indicators import latest_indicators
+from scoring import fundamental_score, recommend
+
+def create_price_history(last_prices, days=260, seed=42):
+    """Simulate daily closes (symbols x days) that end at each symbol's current price"""
+    rng = np.random.default_rng(seed)
+    last_prices = np.asarray(last_prices, dtype=np.float64)
+    market = rng.normal(0.0003, 0.01, days)
+    betas = rng.uniform(0.5, 2.0, len(last_prices))
+    idio_vol = rng.uniform(0.006, 0.022, len(last_prices))
+    returns = betas[:, None] * market + rng.normal(0, 1, (len(last_prices), days)) * idio_vol[:, None]
+    log_path = np.cumsum(returns, axis=1)
+    return last_prices[:, None] * np.exp(log_path - log_path[:, -1:])
+
 # Create comprehensive stock data for multiple markets
 def create_sample_stock_data():
     # Stock data for different markets
@@ -47,36 +61,32 @@ def create_sample_stock_data():
         ]
     }
     
+    # Technical indicators for every stock come from one vectorized pass over
+    # a simulated year of daily closes
+    prices = [stock['Price'] for stocks in stocks_data.values() for stock in stocks]
+    technicals = latest_indicators(create_price_history(prices))
+    
     # Create comprehensive DataFrame
     all_data = []
     for country, stocks in stocks_data.items():
         for stock in stocks:
+            i = len(all_data)
             stock['Country'] = country
             # Add technical indicators
-            stock['RSI'] = round(random.uniform(30, 70), 1)
-            stock['50DMA'] = round(stock['Price'] * random.uniform(0.92, 1.08), 2)
-            stock['200DMA'] = round(stock['Price'] * random.uniform(0.85, 1.15), 2)
-            stock['MACD'] = round(random.uniform(-5, 5), 2)
-            stock['Beta'] = round(random.uniform(0.5, 2.0), 2)
+            stock['RSI'] = round(float(technicals['RSI'][i]), 1)
+            stock['50DMA'] = round(float(technicals['50DMA'][i]), 2)
+            stock['200DMA'] = round(float(technicals['200DMA'][i]), 2)
+            stock['MACD'] = round(float(technicals['MACD'][i]), 2)
+            stock['Beta'] = round(float(technicals['Beta'][i]), 2)
             
             # Add risk metrics
-            stock['Volatility'] = round(random.uniform(15, 45), 1)
+            stock['Volatility'] = round(float(technicals['Volatility'][i]), 1)
             stock['Sharpe_Ratio'] = round(random.uniform(0.5, 2.5), 2)
             
             # Add recommendation
-            pe_score = 5 if stock['PE_Ratio'] < 15 else 3 if stock['PE_Ratio'] < 25 else 1
-            roe_score = 5 if stock['ROE'] > 20 else 3 if stock['ROE'] > 15 else 1
-            growth_score = 5 if stock['Revenue_Growth'] > 15 else 3 if stock['Revenue_Growth'] > 10 else 1
-            
-            total_score = pe_score + roe_score + growth_score
-            if total_score >= 12:
-                stock['Recommendation'] = 'Strong Buy'
-            elif total_score >= 9:
-                stock['Recommendation'] = 'Buy'
-            elif total_score >= 6:
-                stock['Recommendation'] = 'Hold'
-            else:
-                stock['Recommendation'] = 'Sell'
+            stock['Recommendation'] = recommend(
+                fundamental_score(stock['PE_Ratio'], stock['ROE'], stock['Revenue_Growth'])
+            )
                 
             # Add last updated
             stock['Last_Updated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -85,30 +95,45 @@ def create_sample_stock_data():
     
     return pd.DataFrame(all_data)
 
+def create_synthetic_universe(num_rows, seed=0):
+    """Scale the sample dataset to `num_rows` stocks for load tests and benchmarks.
+
+    Rows are copies of the base universe with jittered numbers and unique
+    symbols; the recommendation is re-scored from the jittered fundamentals.
+    """
+    rng = np.random.default_rng(seed)
+    base = create_sample_stock_data()
+    df = base.iloc[np.arange(num_rows) % len(base)].reset_index(drop=True)
+    copy_number = np.arange(num_rows) // len(base)
+    df['Symbol'] = np.where(copy_number == 0, df['Symbol'], df['Symbol'] + copy_number.astype(str))
+    for column in ['Market_Cap', 'Price', 'Volume', 'PE_Ratio', 'PB_Ratio', 'ROE', 'EPS', '50DMA', '200DMA']:
+        df[column] = (df[column] * rng.uniform(0.6, 1.4, num_rows)).round(2)
+    for column in ['Revenue_Growth', 'Profit_Margin', 'RSI', 'MACD', 'Volatility']:
+        df[column] = (df[column] + rng.normal(0, 3, num_rows)).round(2)
+    df['Market_Cap'] = df['Market_Cap'].round().astype(np.int64)
+    df['Volume'] = df['Volume'].round().astype(np.int64)
+
+    df['Recommendation'] = recommend(fundamental_score(df['PE_Ratio'], df['ROE'], df['Revenue_Growth']))
+    return df
+
 if __name__ == "__main__":
+    import os
+    import sys
+    from snapshot import write_snapshot
+
     # Create the sample data
     df = create_sample_stock_data()
+    base_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stock_market_data')
     
-    # Save to Excel file
-    with pd.ExcelWriter('/Users/anandvardhan/xTrade/stock_market_data.xlsx', engine='openpyxl') as writer:
-        # Save all data
-        df.to_excel(writer, sheet_name='All_Stocks', index=False)
-        
-        # Save by country
-        for country in ['India', 'USA', 'Australia']:
-            country_data = df[df['Country'] == country]
-            country_data.to_excel(writer, sheet_name=f'{country}_Stocks', index=False)
-        
-        # Save by sector
-        sectors = df['Sector'].unique()
-        for sector in sectors:
-            sector_data = df[df['Sector'] == sector]
-            if len(sector_data) > 0:
-                sheet_name = sector.replace(' ', '_').replace('&', 'and')[:31]  # Excel sheet name limit
-                sector_data.to_excel(writer, sheet_name=f'{sheet_name}_Stocks', index=False)
+    # Save as a binary snapshot; country and sector views are computed on load
+    write_snapshot(df, base_path + '.snapshot')
+    
+    # Optional single-sheet Excel copy for spreadsheet users
+    if '--excel' in sys.argv:
+        df.to_excel(base_path + '.xlsx', sheet_name='All_Stocks', index=False)
     
     print("Sample stock market data created successfully!")
     print(f"Total stocks: {len(df)}")
     print(f"Countries: {df['Country'].unique()}")
     print(f"Sectors: {df['Sector'].unique()}")
-    print("File saved as: stock_market_data.xlsx")
+    print("File saved as: stock_market_data.snapshot")
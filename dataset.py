@@ -0,0 +1,81 @@
+import threading
+
+import numpy as np
+
+import metrics
+from screener import ScreenerIndex
+from symbol_index import SymbolIndex
+
+# One immutable version of the analyzer's dataset: the frame, the indexes
+# built from it and the row orders cached for it.
+#
+# StockDataAnalyzer publishes the current Dataset in a single attribute and
+# replaces it whole on a reload or update_rows(), so a request that reads
+# `analyzer.dataset` once sees a frame and indexes that agree with each other
+# however many users are querying while the data changes. Nothing is written
+# to a published version: updated() builds the next one from a copy-on-write
+# copy of the frame (only the changed columns are copied) and a patched copy
+# of the screener index (only the changed columns' arrays are copied).
+
+# Columns the symbol index is built from
+SYMBOL_COLUMNS = ('Symbol', 'Country', 'Company')
+
+
+class Dataset:
+    """A dataset version: the frame, lazily built indexes and cached sort orders"""
+
+    def __init__(self, df, version=0, screener=None, symbols=None):
+        self.df = df
+        self.version = version
+        self._screener = screener
+        self._symbols = symbols
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    @property
+    def screener(self):
+        if self._screener is None:
+            # One build per version, however many requests arrive while it runs
+            with self._lock:
+                if self._screener is None:
+                    with metrics.timer('screener_index'):
+                        self._screener = ScreenerIndex(self.df)
+        return self._screener
+
+    @property
+    def symbols(self):
+        if self._symbols is None:
+            with self._lock:
+                if self._symbols is None:
+                    with metrics.timer('symbol_index'):
+                        self._symbols = SymbolIndex(self.df)
+        return self._symbols
+
+    def prepare(self):
+        """Build the indexes now (before publishing) instead of on the first query"""
+        self.screener
+        self.symbols
+        return self
+
+    def sorted_rows(self, sort_by=None, ascending=True):
+        """Every row position ordered by a column (dataset order without one)"""
+        if not sort_by or sort_by not in self.df.columns:
+            return np.arange(len(self.df))
+        if sort_by in self.screener.values:
+            return self.screener.sorted_rows(sort_by, ascending)
+        key = (sort_by, ascending)
+        order = self._orders.get(key)
+        if order is None:
+            order = self.df[sort_by].reset_index(drop=True).sort_values(ascending=ascending, kind='stable')
+            order = self._orders[key] = order.index.to_numpy()
+        return order
+
+    def updated(self, df, rows, columns):
+        """The next version: `df` has new values in `columns` for `rows`.
+
+        Indexes that were built are patched for those rows rather than
+        rebuilt; this version is left unchanged.
+        """
+        screener = self._screener.updated(df, rows, columns) if self._screener is not None else None
+        symbols = None if set(columns).intersection(SYMBOL_COLUMNS) else self._symbols
+        return Dataset(df, self.version + 1, screener, symbols)
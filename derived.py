@@ -0,0 +1,149 @@
+from collections import namedtuple
+
+import numpy as np
+
+from indicators import StreamingIndicators
+from scoring import DEFAULT_RULES, fundamental_score, recommend
+
+# Derived columns of the analyzer dataset and the inputs they depend on.
+#
+# StockDataAnalyzer.update_rows() applies changed inputs to a few rows and
+# recomputes only the rules whose inputs changed, in RULES order, and only
+# for those rows. Outputs feed later rules: a price tick moves the PE ratio,
+# which can change the recommendation.
+#
+#   valuation       Price, EPS            -> PE_Ratio, Market_Cap, Dividend_Yield
+#   technicals      Price                 -> RSI, MACD, 50DMA, 200DMA, Volatility
+#   recommendation  PE_Ratio, ROE,
+#                   Revenue_Growth        -> Recommendation
+#
+# A rule receives the changed rows' values after the updates so far
+# (`current`), their values before the update (`previous`) and the analyzer's
+# IndicatorBank, and returns {column: values}. Outputs a change sets
+# explicitly are kept as given.
+
+Rule = namedtuple('Rule', 'name inputs outputs compute')
+
+
+def _column(frame, name):
+    if name not in frame.columns:
+        return np.full(len(frame), np.nan)
+    return frame[name].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _valuation(current, previous, bank):
+    price, old_price = _column(current, 'Price'), _column(previous, 'Price')
+    eps, old_eps = _column(current, 'EPS'), _column(previous, 'EPS')
+    pe = _column(current, 'PE_Ratio')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        moved = np.where((old_price > 0) & (price > 0), price / old_price, 1.0)
+        earnings = np.where((old_eps > 0) & (eps > 0), old_eps / eps, 1.0)
+        # Relative moves keep the dataset's own PE basis; a missing PE is Price / EPS
+        pe = np.where(np.isnan(pe) & (eps > 0), price / eps, pe * moved * earnings)
+    # Share count and dividend are unchanged by a price move
+    return {
+        'PE_Ratio': np.round(pe, 2),
+        'Market_Cap': np.round(_column(current, 'Market_Cap') * moved),
+        'Dividend_Yield': np.round(_column(current, 'Dividend_Yield') / moved, 2)
+    }
+
+
+def _technicals(current, previous, bank):
+    rows = current.index.to_numpy()
+    values = bank.update(rows, _column(current, 'Price'))
+    # Rows without stored daily bars keep their indicators; one price says nothing about them
+    tracked = bank.tracks(rows)
+    return {column: np.where(tracked, np.round(series, 2), _column(current, column))
+            for column, series in values.items()}
+
+
+def _recommendation(current, previous, bank):
+    score = fundamental_score(_column(current, 'PE_Ratio'), _column(current, 'ROE'),
+                              _column(current, 'Revenue_Growth'))
+    return {'Recommendation': recommend(score, DEFAULT_RULES['thresholds'])}
+
+
+RULES = [
+    Rule('valuation', ('Price', 'EPS'), ('PE_Ratio', 'Market_Cap', 'Dividend_Yield'), _valuation),
+    Rule('technicals', ('Price',), ('RSI', 'MACD', '50DMA', '200DMA', 'Volatility'), _technicals),
+    Rule('recommendation', ('PE_Ratio', 'ROE', 'Revenue_Growth'), ('Recommendation',), _recommendation)
+]
+
+# Columns that identify a row; update_rows never changes them
+KEY_COLUMNS = ('Symbol', 'Country')
+
+
+def _check_order(rules):
+    # Every rule must come after the rules producing its inputs
+    produced_later = set()
+    for rule in reversed(rules):
+        produced_later.update(rule.outputs)
+        if produced_later.intersection(rule.inputs) - set(rule.outputs):
+            later = sorted(produced_later.intersection(rule.inputs))
+            raise ValueError(f"Rule {rule.name} depends on {later}, which are computed after it")
+
+
+_check_order(RULES)
+
+
+def plan(changed_columns, columns):
+    """Rules to run, in order, after `changed_columns` change; skips rules with no output in `columns`"""
+    changed = set(changed_columns)
+    steps = []
+    for rule in RULES:
+        if changed.intersection(rule.inputs) and any(c in columns for c in rule.outputs):
+            steps.append(rule)
+            changed.update(rule.outputs)
+    return steps
+
+
+class IndicatorBank:
+    """StreamingIndicators for the rows that have had price updates.
+
+    Rows are seeded on their first update, in one batch per update, from
+    `seed(rows)` -> (closes, found): a close matrix whose last bar is today's
+    for the rows that have stored history, and which rows those are. Rows
+    without history are not tracked (update() gives them NaN) and are tried
+    again on their next update. Later prices revise today's bar, so each
+    update costs O(1) per row regardless of the window lengths.
+    """
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.chunks = []
+        self.where = {}
+
+    def __len__(self):
+        return len(self.where)
+
+    def update(self, rows, prices):
+        """Set today's close for `rows`; returns {column: values} in `rows` order"""
+        rows = np.asarray(rows, dtype=np.intp)
+        prices = np.asarray(prices, dtype=np.float64)
+        new = np.array([r for r in dict.fromkeys(rows.tolist()) if r not in self.where], dtype=np.intp)
+        if len(new):
+            closes, found = self.seed(new)
+            new = new[found]
+            if len(new):
+                chunk = len(self.chunks)
+                streaming = StreamingIndicators(closes)
+                self.chunks.append((new, streaming, streaming.last_close.copy()))
+                self.where.update((r, (chunk, i)) for i, r in enumerate(new.tolist()))
+
+        located = np.array([self.where.get(r, (-1, -1)) for r in rows.tolist()], dtype=np.intp).reshape(-1, 2)
+        out = {}
+        for chunk in np.unique(located[:, 0]).tolist():
+            if chunk < 0:
+                continue
+            chunk_rows, streaming, closes = self.chunks[chunk]
+            mine = np.nonzero(located[:, 0] == chunk)[0]
+            valid = np.isfinite(prices[mine]) & (prices[mine] > 0)
+            closes[located[mine[valid], 1]] = prices[mine[valid]]
+            values = streaming.update(closes, new_bar=False)
+            for column, series in values.items():
+                out.setdefault(column, np.full(len(rows), np.nan))[mine] = series[located[mine, 1]]
+        return out
+
+    def tracks(self, rows):
+        """Which of `rows` have stored history behind their indicators"""
+        return np.array([r in self.where for r in np.asarray(rows).tolist()], dtype=bool)
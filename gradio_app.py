@@ -1,6 +1,10 @@
-import gradio as gr
-import pandas as pd
-from main import get_copilot_suggested_stocks, fetch_stock_data
+import os
+
+import metrics
+from main import get_copilot_suggested_stocks, fetch_quote_batch, quote_cache
+
+# Seconds between quote polls in live mode
+STREAM_INTERVAL = float(os.environ.get('XTRADE_STREAM_INTERVAL', 5))
 
 def get_stock_suggestions(country, suggestion_type, num_stocks):
     """Get stock suggestions and data"""
@@ -10,95 +14,181 @@ def get_stock_suggestions(country, suggestion_type, num_stocks):
     if not stocks:
         return "No stock suggestions available.", None
     
-    country_data = []
-    for symbol in stocks:
-        data = fetch_stock_data(symbol, country)
-        country_data.append(data)
-    
-    df = pd.DataFrame(country_data)
+    batch = fetch_quote_batch(stocks, country)
+    df = batch.to_frame()
     
     # Format the results for display
     result_text = f"AI-suggested stocks for {country} ({suggestion_type} analysis):\n\n"
-    for _, row in df.iterrows():
+    for quote in batch:
+        row = quote.to_row()
         result_text += f"🏢 {row['Symbol']}: "
         result_text += f"💰 ${row['Price']:.2f}" if row['Price'] else "💰 N/A"
         result_text += f" | 📊 Volume: {row['Volume']:,}" if row['Volume'] else " | 📊 Volume: N/A"
         result_text += f" | 📈 PE: {row['PE Ratio']:.1f}" if row['PE Ratio'] else " | 📈 PE: N/A"
         result_text += "\n"
     
+    stats = quote_cache.stats()
+    result_text += f"\n⚡ Quote cache: {stats['hits'] + stats['stale_hits']} hits | {stats['misses']} misses | {stats['evictions']} evictions"
+    
     return result_text, df
 
-# Create Gradio interface
-with gr.Blocks(title="🚀 xTradeStockAI", theme=gr.themes.Soft()) as app:
-    gr.Markdown(
-        """
-        # 🚀 xTradeStockAI
-        ## AI-Powered Stock Suggestions for India, USA & Australia
+def get_stock_suggestions_traced(country, suggestion_type, num_stocks, profile):
+    """get_stock_suggestions plus its timing breakdown for the debug panel"""
+    with metrics.request_trace('stock suggestions', profile=profile or None) as trace:
+        result_text, df = get_stock_suggestions(country, suggestion_type, num_stocks)
+    return result_text, df, trace.to_markdown()
+
+
+def start_live_quotes(country, suggestion_type, num_stocks, streamer):
+    """Seed a quote streamer for the suggested stocks and start polling"""
+    import gradio as gr
+    from streaming import QuoteStreamer
+
+    if streamer is not None:
+        streamer.stop()
+    prompt = f"Top {num_stocks} stocks for {country} based on {suggestion_type} indicators"
+    stocks = get_copilot_suggested_stocks(prompt, country)[:num_stocks]
+    try:
+        streamer, errors = QuoteStreamer.for_watchlist(stocks, country)
+    except ValueError as e:
+        return None, None, f"⚠️ {e}", gr.Timer(active=False)
+
+    streamer.start(STREAM_INTERVAL)
+    status = f"📡 Streaming {len(streamer.symbols)} stocks every {STREAM_INTERVAL:g}s"
+    if errors:
+        status += f" | skipped: {', '.join(errors)}"
+    return streamer, streamer.frame(), status, gr.Timer(active=True)
+
+
+def stop_live_quotes(streamer):
+    import gradio as gr
+    if streamer is not None:
+        streamer.stop()
+    return None, "⏸️ Live quotes stopped", gr.Timer(active=False)
+
+
+def discard_streamer(streamer):
+    """Stop a session's streamer once Gradio drops its state (tab closed or expired)"""
+    if streamer is not None:
+        streamer.stop()
+
+
+def refresh_live_quotes(streamer, table):
+    """Patch only the rows that changed since the last refresh into the table"""
+    import gradio as gr
+    from streaming import patch_frame
+
+    if streamer is None:
+        return gr.skip(), gr.skip()
+    rows = streamer.changes()
+    status = (f"📡 {len(streamer.symbols)} stocks | {streamer.polls} polls | {streamer.ticks} ticks | "
+              f"last poll {streamer.poll_seconds * 1000:.0f} ms | {len(rows)} rows changed")
+    if not rows:
+        return gr.skip(), status
+    return patch_frame(table, rows), status
+
+
+def create_app():
+    """Build the Gradio interface"""
+    import gradio as gr
+    
+    # Create Gradio interface
+    with gr.Blocks(title="🚀 xTradeStockAI", theme=gr.themes.Soft()) as app:
+        gr.Markdown(
+            """
+            # 🚀 xTradeStockAI
+            ## AI-Powered Stock Suggestions for India, USA & Australia
         
-        Get intelligent stock recommendations based on technical and fundamental analysis!
-        """
-    )
+            Get intelligent stock recommendations based on technical and fundamental analysis!
+            """
+        )
     
-    with gr.Row():
-        with gr.Column(scale=1):
-            country = gr.Dropdown(
-                choices=["India", "USA", "Australia"],
-                label="🌍 Select Country",
-                value="India"
-            )
+        with gr.Row():
+            with gr.Column(scale=1):
+                country = gr.Dropdown(
+                    choices=["India", "USA", "Australia"],
+                    label="🌍 Select Country",
+                    value="India"
+                )
             
-            suggestion_type = gr.Radio(
-                choices=["technical", "fundamental", "both"],
-                label="📊 Analysis Type",
-                value="both"
-            )
+                suggestion_type = gr.Radio(
+                    choices=["technical", "fundamental", "both"],
+                    label="📊 Analysis Type",
+                    value="both"
+                )
             
-            num_stocks = gr.Slider(
-                minimum=1,
-                maximum=20,
-                value=10,
-                step=1,
-                label="🔢 Number of Stocks"
-            )
+                num_stocks = gr.Slider(
+                    minimum=1,
+                    maximum=20,
+                    value=10,
+                    step=1,
+                    label="🔢 Number of Stocks"
+                )
             
-            submit_btn = gr.Button("🎯 Get Stock Suggestions", variant="primary")
+                submit_btn = gr.Button("🎯 Get Stock Suggestions", variant="primary")
         
-        with gr.Column(scale=2):
-            result_text = gr.Textbox(
-                label="📋 Results",
-                lines=15,
-                max_lines=20
-            )
+            with gr.Column(scale=2):
+                result_text = gr.Textbox(
+                    label="📋 Results",
+                    lines=15,
+                    max_lines=20
+                )
             
-            result_table = gr.Dataframe(
-                label="📊 Detailed Data",
-                interactive=False
-            )
+                result_table = gr.Dataframe(
+                    label="📊 Detailed Data",
+                    interactive=False
+                )
     
-    # Event handler
-    submit_btn.click(
-        fn=get_stock_suggestions,
-        inputs=[country, suggestion_type, num_stocks],
-        outputs=[result_text, result_table]
-    )
+        with gr.Accordion("🐞 Debug: request timing", open=False):
+            profile = gr.Checkbox(label="Profile requests (cProfile)", value=False)
+            timing = gr.Markdown()
     
-    gr.Markdown(
-        """
-        ### 💡 Features:
-        - 🤖 AI-powered stock suggestions using OpenAI (with fallback data)
-        - 🌏 Support for India, USA, and Australia markets
-        - 📈 Real-time data from Yahoo Finance and NSE
-        - 📊 Technical and fundamental analysis options
-        - 💾 Downloadable results
+        # Event handler
+        submit_btn.click(
+            fn=get_stock_suggestions_traced,
+            inputs=[country, suggestion_type, num_stocks, profile],
+            outputs=[result_text, result_table, timing]
+        )
+
+        with gr.Accordion("📡 Live Quotes", open=False):
+            with gr.Row():
+                start_btn = gr.Button("▶️ Start Streaming", variant="primary")
+                stop_btn = gr.Button("⏸️ Stop")
+            live_status = gr.Markdown()
+            live_table = gr.Dataframe(label="📈 Live Watchlist", interactive=False)
+
+        streamer = gr.State(None, delete_callback=discard_streamer)
+        timer = gr.Timer(value=STREAM_INTERVAL, active=False)
+
+        start_btn.click(
+            fn=start_live_quotes,
+            inputs=[country, suggestion_type, num_stocks, streamer],
+            outputs=[streamer, live_table, live_status, timer]
+        )
+        stop_btn.click(fn=stop_live_quotes, inputs=[streamer], outputs=[streamer, live_status, timer])
+        timer.tick(fn=refresh_live_quotes, inputs=[streamer, live_table], outputs=[live_table, live_status])
+    
+        gr.Markdown(
+            """
+            ### 💡 Features:
+            - 🤖 AI-powered stock suggestions using OpenAI (with fallback data)
+            - 🌏 Support for India, USA, and Australia markets
+            - 📈 Real-time data from Yahoo Finance and NSE
+            - 📊 Technical and fundamental analysis options
+            - 📡 Live quote streaming with incremental indicators
+            - 💾 Downloadable results
         
-        ### 🔧 Tech Stack:
-        - **Frontend**: Gradio (Latest & Simplest)
-        - **Backend**: Python + OpenAI API
-        - **Data**: yfinance, nsetools
-        """
-    )
+            ### 🔧 Tech Stack:
+            - **Frontend**: Gradio (Latest & Simplest)
+            - **Backend**: Python + OpenAI API
+            - **Data**: yfinance, nsetools
+            """
+        )
+    
+    return app
 
 if __name__ == "__main__":
+    app = create_app()
     app.launch(
         server_name="0.0.0.0",
         server_port=7860,
@@ -0,0 +1,106 @@
+import os
+import threading
+
+import pandas as pd
+
+import metrics
+from providers import HISTORY_COLUMNS
+
+# Persistent daily OHLCV store, one Parquet file per (exchange, symbol):
+#   <root>/<exchange>/<symbol>.parquet
+# Bars are appended incrementally, so a warm store only asks the provider for
+# the days it has not seen yet. A last bar saved on its own day may be a
+# partial intraday bar: it is provisional and is refetched once it is older
+# than `provisional_ttl` seconds, until a fetch on a later day settles it.
+
+
+def _normalize(hist):
+    """Return OHLCV bars with a tz-naive, midnight-normalized date index"""
+    if hist is None or hist.empty:
+        return pd.DataFrame(columns=HISTORY_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+    hist = hist[[c for c in HISTORY_COLUMNS if c in hist.columns]].copy()
+    index = pd.DatetimeIndex(hist.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    hist.index = index.normalize().rename('Date')
+    return hist[~hist.index.duplicated(keep='last')].sort_index()
+
+
+def latest_session(today=None):
+    """Return the most recent weekday on or before today"""
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    while today.weekday() >= 5:
+        today -= pd.Timedelta(days=1)
+    return today
+
+
+class HistoryStore:
+    """On-disk OHLCV history keyed by exchange and symbol"""
+
+    def __init__(self, root, initial_period="1y", provisional_ttl=900.0):
+        self.root = root
+        self.initial_period = initial_period
+        self.provisional_ttl = provisional_ttl
+        self.requests = 0
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def path(self, exchange, symbol):
+        return os.path.join(self.root, exchange, f"{symbol}.parquet")
+
+    def _lock(self, exchange, symbol):
+        with self._locks_guard:
+            return self._locks.setdefault((exchange, symbol), threading.Lock())
+
+    def load(self, exchange, symbol):
+        """Return the stored bars for a symbol (empty if none are stored)"""
+        path = self.path(exchange, symbol)
+        if not os.path.exists(path):
+            return _normalize(None)
+        return pd.read_parquet(path)
+
+    def save(self, exchange, symbol, hist):
+        path = self.path(exchange, symbol)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so a crash never leaves a truncated store
+        tmp_path = path + ".tmp"
+        hist.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _provisional(self, exchange, symbol, last_bar, now):
+        """Whether the last bar was saved during its own day and is due a refetch"""
+        saved = pd.Timestamp.fromtimestamp(os.path.getmtime(self.path(exchange, symbol)))
+        return saved.normalize() <= last_bar and (now - saved).total_seconds() > self.provisional_ttl
+
+    def get_history(self, exchange, symbol, provider, today=None):
+        """Return stored bars after appending any the store is missing.
+
+        A cold store downloads `initial_period` of history once. A warm store
+        makes at most one request, starting at the last stored bar (so a
+        partial intraday bar gets replaced), and none if it is already current
+        and its last bar is not a provisional one due for a refetch.
+        """
+        now = pd.Timestamp(today) if today is not None else pd.Timestamp.now()
+        with self._lock(exchange, symbol):
+            with metrics.timer('history_store', call='load'):
+                hist = self.load(exchange, symbol)
+            if hist.empty:
+                self.requests += 1
+                metrics.note('history_store_lookups_total', result='cold')
+                hist = _normalize(provider.get_history(symbol, period=self.initial_period))
+            elif hist.index[-1] < latest_session(now) or self._provisional(exchange, symbol, hist.index[-1], now):
+                self.requests += 1
+                metrics.note('history_store_lookups_total', result='append')
+                new_bars = _normalize(provider.get_history(symbol, start=hist.index[-1]))
+                if new_bars.empty:
+                    # Count the attempt, so a provider with nothing new is not asked on every call
+                    os.utime(self.path(exchange, symbol))
+                    return hist
+                hist = pd.concat([hist[hist.index < new_bars.index[0]], new_bars])
+            else:
+                metrics.note('history_store_lookups_total', result='current')
+                return hist
+            if not hist.empty:
+                with metrics.timer('history_store', call='save'):
+                    self.save(exchange, symbol, hist)
+            return hist
@@ -0,0 +1,285 @@
+import numpy as np
+
+# Vectorized technical indicators over a symbols x dates price matrix.
+# Every function takes 2-D float arrays shaped (n_symbols, n_dates), oldest
+# bar first, and works on all symbols at once. Values that need more history
+# than is available are NaN. Inputs are assumed to have no gaps (fill or drop
+# missing bars before calling).
+
+TRADING_DAYS = 252
+# Returns behind the Volatility column: one trading year, in batch and streaming alike
+VOL_WINDOW = TRADING_DAYS
+
+
+def _as_matrix(prices):
+    prices = np.asarray(prices, dtype=np.float64)
+    return prices[np.newaxis, :] if prices.ndim == 1 else prices
+
+
+def sma(prices, window):
+    """Simple moving average"""
+    prices = _as_matrix(prices)
+    out = np.full(prices.shape, np.nan)
+    if prices.shape[1] < window:
+        return out
+    csum = np.cumsum(prices, axis=1)
+    out[:, window - 1] = csum[:, window - 1]
+    out[:, window:] = csum[:, window:] - csum[:, :-window]
+    out[:, window - 1:] /= window
+    return out
+
+
+def rolling_std(prices, window):
+    """Rolling sample standard deviation (ddof=1, like pandas)"""
+    prices = _as_matrix(prices)
+    out = np.full(prices.shape, np.nan)
+    if prices.shape[1] < window:
+        return out
+    # Center on the first column to keep the sum-of-squares numerically stable
+    centered = prices - prices[:, :1]
+    s1 = np.cumsum(centered, axis=1)
+    s2 = np.cumsum(centered * centered, axis=1)
+    s1 = np.concatenate([s1[:, window - 1:window], s1[:, window:] - s1[:, :-window]], axis=1)
+    s2 = np.concatenate([s2[:, window - 1:window], s2[:, window:] - s2[:, :-window]], axis=1)
+    var = (s2 - s1 * s1 / window) / (window - 1)
+    out[:, window - 1:] = np.sqrt(np.maximum(var, 0.0))
+    return out
+
+
+def ema(prices, span):
+    """Exponential moving average (pandas ewm(span, adjust=False))"""
+    prices = _as_matrix(prices)
+    alpha = 2.0 / (span + 1.0)
+    # Recurse over dates on a dates-major copy so each step reads contiguous memory
+    x = np.ascontiguousarray(prices.T)
+    out = np.empty(x.shape)
+    if len(x) == 0:
+        return out.T
+    out[0] = x[0]
+    for t in range(1, len(x)):
+        np.multiply(out[t - 1], 1.0 - alpha, out=out[t])
+        out[t] += alpha * x[t]
+    return out.T
+
+
+def _wilder(values, period):
+    """Wilder smoothing: simple mean of the first `period` values, then RMA"""
+    x = np.ascontiguousarray(values.T)
+    out = np.full(x.shape, np.nan)
+    if len(x) < period:
+        return out.T
+    out[period - 1] = x[:period].mean(axis=0)
+    for t in range(period, len(x)):
+        out[t] = (out[t - 1] * (period - 1) + x[t]) / period
+    return out.T
+
+
+def rsi(prices, period=14):
+    """Relative Strength Index with Wilder smoothing (0-100)"""
+    prices = _as_matrix(prices)
+    out = np.full(prices.shape, np.nan)
+    deltas = np.diff(prices, axis=1)
+    avg_gain = _wilder(np.maximum(deltas, 0.0), period)
+    avg_loss = _wilder(np.maximum(-deltas, 0.0), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[:, 1:] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    out[:, 1:][avg_loss == 0] = 100.0
+    return out
+
+
+def macd(prices, fast=12, slow=26, signal=9):
+    """Return (macd line, signal line, histogram)"""
+    line = ema(prices, fast) - ema(prices, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(prices, window=20, num_std=2.0):
+    """Return (middle, upper, lower) Bollinger bands"""
+    middle = sma(prices, window)
+    width = num_std * rolling_std(prices, window)
+    return middle, middle + width, middle - width
+
+
+def atr(high, low, close, period=14):
+    """Average True Range with Wilder smoothing"""
+    high, low, close = _as_matrix(high), _as_matrix(low), _as_matrix(close)
+    prev_close = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return _wilder(true_range, period)
+
+
+def log_returns(prices):
+    return np.diff(np.log(_as_matrix(prices)), axis=1)
+
+
+def realized_volatility(prices, window=None, periods_per_year=TRADING_DAYS):
+    """Annualized volatility of log returns in percent.
+
+    With `window` the result is a rolling series, otherwise a single value per
+    symbol over the whole sample.
+    """
+    returns = log_returns(prices)
+    scale = np.sqrt(periods_per_year) * 100.0
+    if window is None:
+        return returns.std(axis=1, ddof=1) * scale
+    out = np.full(_as_matrix(prices).shape, np.nan)
+    out[:, 1:] = rolling_std(returns, window) * scale
+    return out
+
+
+def trailing_volatility(prices, window=VOL_WINDOW):
+    """Annualized volatility in percent over each symbol's last `window` returns"""
+    return realized_volatility(_as_matrix(prices)[:, -(window + 1):])
+
+
+def beta(prices, benchmark):
+    """Beta of each symbol's log returns against a benchmark price series"""
+    returns = log_returns(prices)
+    market = np.diff(np.log(np.asarray(benchmark, dtype=np.float64)))
+    returns = returns - returns.mean(axis=1, keepdims=True)
+    market = market - market.mean()
+    return returns @ market / (market @ market)
+
+
+def market_index(prices):
+    """Equal-weighted index built from the universe's average log return"""
+    returns = log_returns(prices).mean(axis=0)
+    return np.exp(np.concatenate([[0.0], np.cumsum(returns)]))
+
+
+def latest_indicators(close, benchmark=None):
+    """Return the latest value of each dataset indicator for every symbol.
+
+    Keys match the StockDataAnalyzer columns (RSI, MACD, 50DMA, 200DMA, Beta,
+    Volatility). Without a benchmark, beta is measured against the
+    equal-weighted universe.
+    """
+    close = _as_matrix(close)
+    if benchmark is None:
+        benchmark = market_index(close)
+    n = close.shape[1]
+    return {
+        'RSI': rsi(close)[:, -1],
+        'MACD': macd(close)[0][:, -1],
+        '50DMA': close[:, -50:].mean(axis=1) if n >= 50 else np.full(len(close), np.nan),
+        '200DMA': close[:, -200:].mean(axis=1) if n >= 200 else np.full(len(close), np.nan),
+        'Beta': beta(close, benchmark),
+        'Volatility': trailing_volatility(close)
+    }
+
+
+class StreamingIndicators:
+    """O(1)-per-bar indicator updates for a fixed universe of symbols.
+
+    Seed it with a (n_symbols, n_dates) close history, then call `update()`
+    with one new close per symbol. Each update touches only ring buffers and
+    running sums, so the cost does not depend on the window length. Intraday
+    ticks can revise the latest bar with `update(close, new_bar=False)`.
+    """
+
+    def __init__(self, close_history, sma_windows=(50, 200), rsi_period=14,
+                 macd_spans=(12, 26, 9), vol_window=VOL_WINDOW):
+        close = _as_matrix(close_history)
+        longest = max(max(sma_windows), vol_window + 1, rsi_period + 2)
+        if close.shape[1] < longest:
+            raise ValueError(f"Need at least {longest} bars of history, got {close.shape[1]}")
+
+        self.sma_windows = tuple(sma_windows)
+        self.rsi_period = rsi_period
+        self.vol_window = vol_window
+        fast, slow, signal = macd_spans
+        self._alphas = {name: 2.0 / (span + 1.0) for name, span in
+                        (('fast', fast), ('slow', slow), ('signal', signal))}
+
+        # Ring buffers and running sums for the moving averages
+        self._sma_buffers = {w: close[:, -w:].copy() for w in self.sma_windows}
+        self._sma_sums = {w: buf.sum(axis=1) for w, buf in self._sma_buffers.items()}
+        self._sma_pos = {w: 0 for w in self.sma_windows}
+
+        # Exponential states
+        fast_ema, slow_ema = ema(close, fast), ema(close, slow)
+        line = fast_ema - slow_ema
+        self._ema_fast = fast_ema[:, -1]
+        self._ema_slow = slow_ema[:, -1]
+        signal_line = ema(line, signal)
+        self._signal = signal_line[:, -1]
+
+        deltas = np.diff(close, axis=1)
+        avg_gain = _wilder(np.maximum(deltas, 0.0), rsi_period)
+        avg_loss = _wilder(np.maximum(-deltas, 0.0), rsi_period)
+        self._avg_gain = avg_gain[:, -1]
+        self._avg_loss = avg_loss[:, -1]
+
+        # Recursive states as they were before the latest bar, so it can be revised
+        self._prev_state = (fast_ema[:, -2], slow_ema[:, -2], signal_line[:, -2],
+                            avg_gain[:, -2], avg_loss[:, -2], close[:, -2].copy())
+
+        # Rolling window of log returns for realized volatility
+        returns = np.diff(np.log(close[:, -(vol_window + 1):]), axis=1)
+        self._ret_buffer = returns.copy()
+        self._ret_sum = returns.sum(axis=1)
+        self._ret_sumsq = (returns * returns).sum(axis=1)
+        self._ret_pos = 0
+
+        self.last_close = close[:, -1].copy()
+
+    def update(self, close, new_bar=True):
+        """Apply one close per symbol and return the latest values.
+
+        With new_bar=False the close replaces the latest bar instead of
+        appending one, which is how intraday ticks move today's indicators.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        if new_bar:
+            self._prev_state = (self._ema_fast, self._ema_slow, self._signal,
+                                self._avg_gain, self._avg_loss, self.last_close)
+        ema_fast, ema_slow, signal, avg_gain, avg_loss, prev_close = self._prev_state
+
+        for w in self.sma_windows:
+            pos = self._sma_pos[w] if new_bar else (self._sma_pos[w] - 1) % w
+            buf = self._sma_buffers[w]
+            self._sma_sums[w] += close - buf[:, pos]
+            buf[:, pos] = close
+            if new_bar:
+                self._sma_pos[w] = (pos + 1) % w
+
+        a = self._alphas
+        self._ema_fast = a['fast'] * close + (1 - a['fast']) * ema_fast
+        self._ema_slow = a['slow'] * close + (1 - a['slow']) * ema_slow
+        line = self._ema_fast - self._ema_slow
+        self._signal = a['signal'] * line + (1 - a['signal']) * signal
+
+        delta = close - prev_close
+        p = self.rsi_period
+        self._avg_gain = (avg_gain * (p - 1) + np.maximum(delta, 0.0)) / p
+        self._avg_loss = (avg_loss * (p - 1) + np.maximum(-delta, 0.0)) / p
+
+        ret = np.log(close / prev_close)
+        pos = self._ret_pos if new_bar else (self._ret_pos - 1) % self.vol_window
+        old = self._ret_buffer[:, pos]
+        self._ret_sum += ret - old
+        self._ret_sumsq += ret * ret - old * old
+        self._ret_buffer[:, pos] = ret
+        if new_bar:
+            self._ret_pos = (pos + 1) % self.vol_window
+
+        self.last_close = close.copy()
+        return self.values()
+
+    def values(self):
+        """Return the current indicator values keyed like the dataset columns"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = self._avg_gain / self._avg_loss
+            rsi_now = np.where(self._avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+        n = self.vol_window
+        var = (self._ret_sumsq - self._ret_sum * self._ret_sum / n) / (n - 1)
+        result = {
+            'RSI': rsi_now,
+            'MACD': self._ema_fast - self._ema_slow,
+            'MACD_Signal': self._signal,
+            'Volatility': np.sqrt(np.maximum(var, 0.0)) * np.sqrt(TRADING_DAYS) * 100.0
+        }
+        for w in self.sma_windows:
+            result[f'{w}DMA'] = self._sma_sums[w] / w
+        return result
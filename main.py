@@ -1,107 +1,410 @@
-import requests
-import pandas as pd
+import argparse
+import csv
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-# Placeholder for AI Copilot stock suggestion logic
-# In production, replace with actual AI/LLM API integration
+import metrics
+from providers import COUNTRY_EXCHANGES, build_row, exchange_for, get_providers
+from quote_cache import QuoteCache
+from scheduler import BULK, request_priority
+from suggestions import SuggestionEngine
 
-def get_copilot_suggested_stocks(prompt, country):
-    # Dummy data for demonstration
-    sample_stocks = {
-        'India': ['RELIANCE', 'TCS', 'INFY', 'HDFCBANK', 'ICICIBANK', 'SBIN', 'BHARTIARTL', 'HINDUNILVR', 'KOTAKBANK', 'LT'],
-        'USA': ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META', 'TSLA', 'NVDA', 'JPM', 'V', 'UNH'],
-        'Australia': ['CBA', 'BHP', 'WBC', 'NAB', 'ANZ', 'WES', 'MQG', 'CSL', 'FMG', 'WOW']
-    }
-    return sample_stocks.get(country, [])
-
-# Placeholder for fetching stock data
-# Replace with actual API calls (e.g., Yahoo Finance, Alpha Vantage, etc.)
-def fetch_stock_data(symbol, country):
-    # Fetch real-time data from Yahoo Finance using yfinance
-    if country == 'India':
-        # Try nsetools first, fallback to yfinance if it fails
+# pandas, numpy, yfinance and nsetools are imported on first use so the CLI menu and
+# the UIs that import this module do not pay for them up front
+
+# Shared cache in front of the providers for every front end
+quote_cache = QuoteCache()
+metrics.add_collector(lambda: [(f'quote_cache_{name}', {}, value) for name, value in quote_cache.stats().items()])
+
+# Model suggestions are cached per (country, type) and fall back to ranking the local dataset
+suggestion_engine = SuggestionEngine()
+metrics.add_collector(lambda: [(f'suggestions_{name}', {}, value)
+                               for name, value in suggestion_engine.stats().items()])
+
+# Daily bars persist across runs so moving averages only need the missing days
+HISTORY_DIR = os.environ.get(
+    'XTRADE_HISTORY_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'history')
+)
+use_history_store = True
+_history_store = None
+_history_store_lock = threading.Lock()
+
+def get_history_store():
+    """Return the shared on-disk history store, creating it on first use"""
+    global _history_store
+    with _history_store_lock:
+        if _history_store is None:
+            from history_store import HistoryStore
+            _history_store = HistoryStore(HISTORY_DIR)
+    return _history_store
+
+# Every fetched quote is appended to a compressed tick archive (see tick_archive.py)
+TICK_ARCHIVE_DIR = os.environ.get(
+    'XTRADE_TICK_ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'ticks')
+)
+use_tick_archive = True
+_tick_archive = None
+_tick_archive_lock = threading.Lock()
+
+def get_tick_archive():
+    """Return the shared tick archive, creating it on first use"""
+    global _tick_archive
+    with _tick_archive_lock:
+        if _tick_archive is None:
+            import atexit
+            from tick_archive import TickArchive
+            _tick_archive = TickArchive(TICK_ARCHIVE_DIR, flush_interval=60)
+            atexit.register(_tick_archive.close)
+    return _tick_archive
+
+def flush_tick_archive():
+    """Write buffered quotes to disk (no-op if nothing was archived)"""
+    if _tick_archive is not None:
+        _tick_archive.flush()
+
+def _archive_quote(symbol, country, row):
+    # Archiving must never fail a fetch
+    if use_tick_archive and row.get('Price') is not None and not row.get('Error'):
         try:
-            from nsetools import Nse
-            nse = Nse()
-            data = nse.get_quote(symbol)
-            if not data or 'lastPrice' not in data:
-                raise Exception("No NSE data")
-            price = data.get('lastPrice', None)
-            volume = data.get('quantityTraded', None)
-            pe_ratio = data.get('pE', None)
-            dma_50 = None # Not available
-            dma_200 = None # Not available
-            return {
-                'Symbol': symbol,
-                'Price': price,
-                'Volume': volume,
-                'PE Ratio': pe_ratio,
-                '50DMA': dma_50,
-                '200DMA': dma_200,
-                'Source': 'NSE'
-            }
+            get_tick_archive().append_quote(exchange_for(country), symbol, row['Price'], row.get('Volume'))
         except Exception as e:
-            # Fallback to Yahoo Finance
-            import yfinance as yf
+            print(f"Error archiving quote for {symbol}: {e}")
+            metrics.note('tick_archive_errors_total')
+    return row
+
+# AI Copilot stock suggestions (see suggestions.py)
+def get_copilot_suggested_stocks(prompt, country):
+    """Suggested symbols for a 'Top N stocks for <country> based on <type> indicators' prompt"""
+    return suggestion_engine.suggest(prompt, country)
+
+# Fetch stock data through the quote cache and the configured provider chain (see providers.py)
+def fetch_stock_data(symbol, country, use_cache=True, load_on_miss=True):
+    if not use_cache:
+        return _fetch_from_providers(symbol, country)
+    return quote_cache.get(
+        (country, symbol),
+        lambda: _fetch_from_providers(symbol, country),
+        lambda: _refresh_quote_fields(symbol, country),
+        load_on_miss=load_on_miss
+    )
+
+def _fetch_from_providers(symbol, country):
+    errors = []
+    chain = get_providers(country)
+    with metrics.timer('fetch_stock_data', country=country):
+        for i, provider in enumerate(chain):
             try:
-                ticker = yf.Ticker(symbol + ".NS")
-                info = ticker.info
-                hist = ticker.history(period="1y")
-                price = info.get('regularMarketPrice', None)
-                volume = info.get('regularMarketVolume', None)
-                pe_ratio = info.get('trailingPE', None)
-                dma_50 = hist['Close'].rolling(window=50).mean().iloc[-1] if not hist.empty else None
-                dma_200 = hist['Close'].rolling(window=200).mean().iloc[-1] if not hist.empty else None
-                return {
-                    'Symbol': symbol,
-                    'Price': price,
-                    'Volume': volume,
-                    'PE Ratio': pe_ratio,
-                    '50DMA': dma_50,
-                    '200DMA': dma_200,
-                    'Source': 'Yahoo Finance'
-                }
-            except Exception as e2:
-                return {
-                    'Symbol': symbol,
-                    'Price': None,
-                    'Volume': None,
-                    'PE Ratio': None,
-                    '50DMA': None,
-                    '200DMA': None,
-                    'Error': f"NSE error: {str(e)} | Yahoo error: {str(e2)}"
-                }
-    else:
-        # Use Yahoo Finance for USA and Australia
-        import yfinance as yf
+                if use_history_store and provider.supports_history:
+                    quote = provider.get_quote(symbol)
+                    with metrics.timer('history', provider=provider.name):
+                        hist = get_history_store().get_history(exchange_for(country), symbol, provider)
+                    return _archive_quote(symbol, country, build_row(symbol, quote, hist, provider.name))
+                return _archive_quote(symbol, country, provider.fetch(symbol))
+            except Exception as e:
+                errors.append(f"{provider.name} error: {str(e)}")
+                metrics.note('provider_errors_total', provider=provider.name)
+                if i + 1 < len(chain):
+                    # e.g. NSE -> Yahoo Finance for India
+                    metrics.note('provider_fallbacks_total', country=country, provider=provider.name,
+                                 fallback=chain[i + 1].name)
+        return _error_row(symbol, " | ".join(errors))
+
+def _refresh_quote_fields(symbol, country):
+    # Background refreshes queue behind interactive provider calls
+    with request_priority(BULK):
+        return _fetch_quote_fields(symbol, country)
+
+def _fetch_quote_fields(symbol, country):
+    """Fetch only Price/Volume, used to refresh a cached row"""
+    errors = []
+    for provider in get_providers(country):
+        try:
+            quote = provider.get_quote(symbol)
+            fields = {'Price': quote.get('price'), 'Volume': quote.get('volume')}
+        except Exception as e:
+            errors.append(f"{provider.name} error: {str(e)}")
+            continue
+        return _archive_quote(symbol, country, fields)
+    raise RuntimeError(" | ".join(errors))
+
+def _error_row(symbol, message):
+    """Build the per-symbol error row returned when a fetch fails"""
+    return {
+        'Symbol': symbol,
+        'Price': None,
+        'Volume': None,
+        'PE Ratio': None,
+        '50DMA': None,
+        '200DMA': None,
+        'Error': message
+    }
+
+def fetch_stock_data_batch(symbols, country, max_workers=8, timeout=15.0, fetch=None, use_cache=True):
+    """Fetch several symbols concurrently and return the rows in input order.
+
+    Each symbol runs on a bounded thread pool. A symbol that has been running
+    for longer than `timeout` seconds is reported with the usual error row and
+    is not waited for.
+    """
+    symbols = list(symbols)
+    results = [None] * len(symbols)
+    for index, row in iter_stock_data(symbols, country, max_workers, timeout, fetch, use_cache):
+        results[index] = row
+    return results
+
+def iter_stock_data(symbols, country, max_workers=8, timeout=15.0, fetch=None, use_cache=True):
+    """Yield (index, row) for each symbol as soon as its fetch finishes.
+
+    `symbols` can be any iterable; only a few fetches per worker are queued
+    at a time, so memory does not grow with the length of the list. Cache
+    hits are yielded inline without a thread.
+    """
+    inline_cache = fetch is None and use_cache
+    if fetch is None:
+        fetch = lambda symbol, country: fetch_stock_data(symbol, country, use_cache=use_cache)
+    todo = iter(enumerate(symbols))
+    max_pending = max(1, max_workers) * 4
+    hits = misses = 0
+    started = {}
+    futures = {}
+
+    def run(index, symbol):
+        started[index] = time.monotonic()
+        return fetch(symbol, country)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        while True:
+            # Top up the queue; serve cache hits inline, only misses need the pool
+            while len(futures) < max_pending:
+                item = next(todo, None)
+                if item is None:
+                    break
+                index, symbol = item
+                if inline_cache:
+                    row = fetch_stock_data(symbol, country, load_on_miss=False)
+                    if row is not None:
+                        hits += 1
+                        yield index, row
+                        continue
+                    misses += 1
+                # Each task runs in a copy of this context so its timers reach the request trace
+                futures[executor.submit(metrics.run_in_context(run), index, symbol)] = (index, symbol)
+            if not futures:
+                break
+
+            # Wake up for the next completion or the earliest per-symbol deadline
+            now = time.monotonic()
+            deadlines = [started[index] + timeout for index, _ in futures.values() if index in started]
+            wait_for = max(0.0, min(deadlines) - now) if deadlines else timeout
+            done, _ = wait(futures, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, symbol = futures.pop(future)
+                started.pop(index, None)
+                try:
+                    row = future.result()
+                except Exception as e:
+                    row = _error_row(symbol, str(e))
+                yield index, row
+
+            now = time.monotonic()
+            for future, (index, symbol) in list(futures.items()):
+                if index in started and now - started[index] > timeout:
+                    del futures[future]
+                    started.pop(index)
+                    future.cancel()
+                    from quotes import TIMEOUT_MESSAGE
+                    yield index, _error_row(symbol, TIMEOUT_MESSAGE.format(timeout))
+    finally:
+        if inline_cache:
+            metrics.note('quote_cache_lookups_total', hits, result='hit')
+            metrics.note('quote_cache_lookups_total', misses, result='miss')
+        # Do not block on fetches that already timed out; drop the queued ones
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+def fetch_quote_batch(symbols, country, **kwargs):
+    """fetch_stock_data_batch packed into a fixed-schema QuoteBatch"""
+    from quotes import QuoteBatch
+    with metrics.timer('fetch_batch', country=country):
+        return QuoteBatch.from_rows(fetch_stock_data_batch(symbols, country, **kwargs))
+
+# Columns written by the non-interactive CLI, one row per (country, symbol)
+OUTPUT_FIELDS = ['Country', 'Symbol', 'Price', 'Volume', 'PE Ratio', '50DMA', '200DMA', 'Source', 'Error']
+OUTPUT_FORMATS = ['csv', 'jsonl', 'parquet']
+
+class RowWriter:
+    """Append fetched rows to a CSV, JSONL or Parquet file as they arrive.
+
+    CSV and JSONL are flushed after every row, so an interrupted run keeps
+    everything fetched so far. Parquet is written one row group of
+    `row_group_size` rows at a time and gets its footer on close().
+    """
+
+    def __init__(self, path, output_format=None, row_group_size=1000):
+        self.path = path
+        self.format = output_format or os.path.splitext(path)[1].lstrip('.').lower()
+        if self.format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format for {path}; use one of {', '.join(OUTPUT_FORMATS)}")
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self._buffer = []
+        if self.format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self._schema = pa.schema([(field, pa.float64() if field in ('Price', 'PE Ratio', '50DMA', '200DMA')
+                                       else pa.int64() if field == 'Volume' else pa.string())
+                                      for field in OUTPUT_FIELDS])
+            self._writer = pq.ParquetWriter(path, self._schema)
+            return
+        self._file = sys.stdout if path == '-' else open(path, 'w', newline='')
+        if self.format == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=OUTPUT_FIELDS, extrasaction='ignore')
+            self._csv.writeheader()
+
+    def write(self, row):
+        self.rows += 1
+        if self.format == 'parquet':
+            row = {field: row.get(field) for field in OUTPUT_FIELDS}
+            if row['Volume'] is not None:
+                row['Volume'] = int(row['Volume'])
+            self._buffer.append(row)
+            if len(self._buffer) >= self.row_group_size:
+                self._flush_row_group()
+            return
+        if self.format == 'csv':
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps({field: row.get(field) for field in OUTPUT_FIELDS}, default=str) + "\n")
+        self._file.flush()
+
+    def _flush_row_group(self):
+        import pyarrow as pa
+        if self._buffer:
+            self._writer.write_table(pa.Table.from_pylist(self._buffer, schema=self._schema))
+            self._buffer = []
+
+    def close(self):
+        if self.format == 'parquet':
+            self._flush_row_group()
+            self._writer.close()
+        elif self._file is not sys.stdout:
+            self._file.close()
+
+def symbols_from_file(path, country):
+    """Yield the symbols listed for `country` in a Country,Symbol CSV, one at a time"""
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            if row.get('Country') == country and row.get('Symbol'):
+                yield row['Symbol'].strip()
+
+def run_countries(countries, suggestion_type, num_stocks, writer, symbols_file=None, max_workers=8, timeout=15.0,
+                  stats=None):
+    """Fetch every country concurrently, writing each row the moment it arrives.
+
+    Fills and returns `stats`: {country: {'rows', 'errors', 'seconds'}}. Rows
+    pass through a bounded queue to the single writer, so memory stays flat
+    however many symbols are listed.
+    """
+    rows = queue.Queue(maxsize=max(1, max_workers) * 16)
+    stats = {} if stats is None else stats
+    stats.update({country: {'rows': 0, 'errors': 0, 'seconds': 0.0} for country in countries})
+    done = object()
+
+    def produce(country):
+        start = time.monotonic()
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            hist = ticker.history(period="1y")
-            price = info.get('regularMarketPrice', None)
-            volume = info.get('regularMarketVolume', None)
-            pe_ratio = info.get('trailingPE', None)
-            dma_50 = hist['Close'].rolling(window=50).mean().iloc[-1] if not hist.empty else None
-            dma_200 = hist['Close'].rolling(window=200).mean().iloc[-1] if not hist.empty else None
-            return {
-                'Symbol': symbol,
-                'Price': price,
-                'Volume': volume,
-                'PE Ratio': pe_ratio,
-                '50DMA': dma_50,
-                '200DMA': dma_200
-            }
+            if symbols_file:
+                symbols = symbols_from_file(symbols_file, country)
+            else:
+                prompt = f"Top {num_stocks} stocks for {country} based on {suggestion_type} indicators"
+                symbols = itertools.islice(get_copilot_suggested_stocks(prompt, country), num_stocks)
+            for _, row in iter_stock_data(symbols, country, max_workers, timeout):
+                rows.put((country, row))
         except Exception as e:
-            return {
-                'Symbol': symbol,
-                'Price': None,
-                'Volume': None,
-                'PE Ratio': None,
-                '50DMA': None,
-                '200DMA': None,
-                'Error': str(e)
-            }
-
-def main():
+            rows.put((country, _error_row('', f"{country} failed: {e}")))
+        finally:
+            stats[country]['seconds'] = time.monotonic() - start
+            rows.put((country, done))
+
+    for country in countries:
+        threading.Thread(target=produce, args=(country,), daemon=True, name=f'fetch-{country}').start()
+    running = len(countries)
+    while running:
+        country, row = rows.get()
+        if row is done:
+            running -= 1
+            continue
+        writer.write(dict(row, Country=country))
+        stats[country]['rows'] += 1
+        if row.get('Error'):
+            stats[country]['errors'] += 1
+    return stats
+
+def print_throughput(stats, elapsed, out=sys.stderr):
+    print(f"\n{'Country':<12}{'Rows':>8}{'Errors':>8}{'Seconds':>10}{'Rows/s':>10}", file=out)
+    for country, s in stats.items():
+        # A country still running when the run was interrupted has no time of its own yet
+        seconds = s['seconds'] or elapsed
+        rate = s['rows'] / seconds if seconds else 0.0
+        print(f"{country:<12}{s['rows']:>8}{s['errors']:>8}{seconds:>10.2f}{rate:>10.1f}", file=out)
+    total = sum(s['rows'] for s in stats.values())
+    print(f"{'Total':<12}{total:>8}{sum(s['errors'] for s in stats.values()):>8}{elapsed:>10.2f}"
+          f"{total / elapsed if elapsed else 0.0:>10.1f}", file=out)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fetch quotes for suggested stocks. Without --countries the interactive menu runs."
+    )
+    parser.add_argument('--countries', nargs='+', choices=list(COUNTRY_EXCHANGES) + ['all'],
+                        help="countries to fetch concurrently ('all' for every market)")
+    parser.add_argument('--type', dest='suggestion_type', choices=['technical', 'fundamental', 'both'],
+                        default='both')
+    parser.add_argument('--count', type=int, default=10, help="suggested stocks per country")
+    parser.add_argument('--symbols-file', help="Country,Symbol CSV to fetch instead of the suggestions")
+    parser.add_argument('--output', help="output file, '-' for stdout (default copilot_suggested_stocks.<format>)")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, help="default: from the --output extension, else csv")
+    parser.add_argument('--workers', type=int, default=8, help="concurrent fetches per country")
+    parser.add_argument('--timeout', type=float, default=15.0, help="per-symbol timeout in seconds")
+    args = parser.parse_args(argv)
+    if args.countries and 'all' in args.countries:
+        args.countries = list(COUNTRY_EXCHANGES)
+    if args.format is None:
+        extension = os.path.splitext(args.output or '')[1].lstrip('.').lower()
+        args.format = extension if extension in OUTPUT_FORMATS else 'csv'
+    if args.output is None:
+        args.output = f"copilot_suggested_stocks.{args.format}"
+    return args
+
+def run_batch(args):
+    """Non-interactive mode: every country at once, streamed to one output file"""
+    writer = RowWriter(args.output, args.format)
+    start = time.monotonic()
+    stats = {}
+    try:
+        run_countries(args.countries, args.suggestion_type, args.count, writer, args.symbols_file,
+                      args.workers, args.timeout, stats)
+    except KeyboardInterrupt:
+        print("\nInterrupted; rows written so far are kept", file=sys.stderr)
+    finally:
+        writer.close()
+    print_throughput(stats, time.monotonic() - start)
+    print(f"{writer.rows} rows written to {args.output}", file=sys.stderr)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.countries:
+        return run_batch(args)
+    interactive()
+
+def interactive():
     while True:
         print("Select country:")
         print("1. India")
@@ -152,13 +455,12 @@ def main():
         prompt = f"Top {num_stocks} stocks for {country} based on {suggestion_type} indicators"
         print(f"\nCopilot-suggested stocks for {country} ({prompt}):")
         stocks = get_copilot_suggested_stocks(prompt, country)[:num_stocks]
-        country_data = []
-        for symbol in stocks:
-            data = fetch_stock_data(symbol, country)
-            country_data.append(data)
-            print(f"{symbol}: Price={data['Price']}, Volume={data['Volume']}, PE={data['PE Ratio']}, 50DMA={data['50DMA']}, 200DMA={data['200DMA']}")
+        batch = fetch_quote_batch(stocks, country)
+        for quote in batch:
+            data = quote.to_row()
+            print(f"{quote.symbol}: Price={data['Price']}, Volume={data['Volume']}, PE={data['PE Ratio']}, 50DMA={data['50DMA']}, 200DMA={data['200DMA']}")
         # Optionally, save to CSV
-        df = pd.DataFrame(country_data)
+        df = batch.to_frame()
         df.to_csv(f'copilot_suggested_stocks_{country}.csv', index=False)
         print(f"\nStock data saved to copilot_suggested_stocks_{country}.csv")
 
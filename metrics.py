@@ -0,0 +1,273 @@
+import contextvars
+import io
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# In-process instrumentation for the fetch and screening pipeline.
+#
+#   with metrics.timer('provider_call', provider='NSE', call='quote'):
+#       ...
+#   metrics.note('provider_fallbacks_total', country='India', provider='NSE')
+#
+# Timers feed a Prometheus histogram (xtrade_stage_seconds) and, when a
+# request trace is active, that request's timing breakdown:
+#
+#   with metrics.request_trace('suggestions', profile=True) as trace:
+#       ...
+#   trace.to_markdown()      # per-stage table (plus profiler output)
+#
+# Stages can nest (history includes provider_call) and stages on pool threads
+# overlap, so the per-stage totals can add up to more than the request time.
+#
+# export_prometheus() renders every metric in the text exposition format;
+# api_server serves it on /metrics. Collectors registered with
+# add_collector() contribute gauges (cache sizes, hit ratios) at export time.
+#
+# XTRADE_PROFILE=cprofile|pyinstrument profiles every traced request.
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+PREFIX = 'xtrade_'
+
+_current_trace = contextvars.ContextVar('xtrade_trace', default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in key) + '}'
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Registry:
+    """Thread-safe counters, histograms and gauge collectors"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = defaultdict(_Histogram)
+        self._collectors = []
+
+    def count(self, name, value=1, **labels):
+        with self._lock:
+            self._counters[(name, _label_key(labels))] += value
+
+    def observe(self, name, seconds, **labels):
+        with self._lock:
+            self._histograms[(name, _label_key(labels))].observe(seconds)
+
+    def add_collector(self, collect):
+        """Register `collect()` -> iterable of (name, labels, value) gauges"""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """Counters and per-stage timing totals as plain dicts"""
+        with self._lock:
+            counters = {f"{name}{_format_labels(key)}": value for (name, key), value in self._counters.items()}
+            timings = {f"{name}{_format_labels(key)}": {'count': h.count, 'seconds': h.total}
+                       for (name, key), h in self._histograms.items()}
+        return {'counters': counters, 'timings': timings}
+
+    def export_prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            collectors = list(self._collectors)
+
+        seen = set()
+        for (name, key), value in counters:
+            if name not in seen:
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                seen.add(name)
+            lines.append(f"{PREFIX}{name}{_format_labels(key)} {value:g}")
+
+        for (name, key), h in histograms:
+            if name not in seen:
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                seen.add(name)
+            cumulative = 0
+            for bound, n in zip(BUCKETS, h.counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(key)} {h.total:.6f}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(key)} {h.count}")
+
+        for collect in collectors:
+            try:
+                gauges = list(collect())
+            except Exception:
+                continue
+            for name, labels, value in gauges:
+                if name not in seen:
+                    lines.append(f"# TYPE {PREFIX}{name} gauge")
+                    seen.add(name)
+                lines.append(f"{PREFIX}{name}{_format_labels(_label_key(labels))} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+count = registry.count
+add_collector = registry.add_collector
+export_prometheus = registry.export_prometheus
+
+
+class Trace:
+    """Timing breakdown of one request, filled in by every timer it encloses"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.stages = {}
+        self.counters = defaultdict(float)
+        self.profile_text = None
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            calls, total = self.stages.get(stage, (0, 0.0))
+            self.stages[stage] = (calls + 1, total + seconds)
+
+    def breakdown(self):
+        """[(stage, calls, total_ms)] sorted by time spent"""
+        with self._lock:
+            items = [(stage, calls, total * 1000) for stage, (calls, total) in self.stages.items()]
+        return sorted(items, key=lambda item: -item[2])
+
+    def server_timing(self):
+        """Value for an HTTP Server-Timing header"""
+        parts = [f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', stage).strip('_')};dur={ms:.1f}"
+                 for stage, _, ms in self.breakdown()]
+        if self.elapsed is not None:
+            parts.append(f"total;dur={self.elapsed * 1000:.1f}")
+        return ", ".join(parts)
+
+    def to_markdown(self):
+        total = (self.elapsed or 0) * 1000
+        lines = [f"**{self.name}** took {total:.1f} ms", "", "| Stage | Calls | Time (ms) |", "|---|---:|---:|"]
+        lines += [f"| {stage} | {calls} | {ms:.1f} |" for stage, calls, ms in self.breakdown()]
+        if self.counters:
+            lines += ["", " | ".join(f"{name}: {value:g}" for name, value in sorted(self.counters.items()))]
+        if self.profile_text:
+            lines += ["", "```", self.profile_text.rstrip(), "```"]
+        return "\n".join(lines)
+
+
+def _stage_name(stage, labels):
+    return stage if not labels else f"{stage} ({', '.join(str(v) for v in labels.values())})"
+
+
+@contextmanager
+def timer(stage, **labels):
+    """Time a block into xtrade_stage_seconds and the active request trace"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        registry.observe('stage_seconds', seconds, stage=stage, **labels)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(_stage_name(stage, labels), seconds)
+
+
+def note(name, value=1, **labels):
+    """Count an event in the registry and in the active request trace"""
+    registry.count(name, value, **labels)
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            trace.counters[_stage_name(name, labels)] += value
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def run_in_context(fn):
+    """Wrap `fn` to run in a copy of the caller's context (carries the trace into a thread).
+
+    Wrap once per submitted task; a context cannot be entered by two threads at once.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def _profiler(kind):
+    if kind == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            return profiler.start, lambda: (profiler.stop(), profiler.output_text(unicode=True))[1]
+        except ImportError:
+            pass
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+
+    def stop():
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(25)
+        return out.getvalue()
+
+    return profiler.enable, stop
+
+
+@contextmanager
+def request_trace(name, profile=None):
+    """Collect a per-request timing breakdown (and optionally a profile).
+
+    `profile` is True/'cprofile'/'pyinstrument'; None falls back to the
+    XTRADE_PROFILE environment variable. Profilers only see the calling
+    thread; work on pool threads shows up through its timers.
+    """
+    if profile is None:
+        profile = os.environ.get('XTRADE_PROFILE') or False
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    stop = None
+    if profile:
+        start, stop = _profiler('pyinstrument' if profile == 'pyinstrument' else 'cprofile')
+        start()
+    try:
+        yield trace
+    finally:
+        if stop is not None:
+            trace.profile_text = stop()
+        trace.elapsed = time.perf_counter() - trace.started
+        _current_trace.reset(token)
+        # The caller may rename the trace once it knows more (e.g. the matched route)
+        registry.observe('request_seconds', trace.elapsed, request=trace.name)
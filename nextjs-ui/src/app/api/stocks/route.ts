@@ -1,26 +1,41 @@
 import { NextRequest, NextResponse } from 'next/server';
 
-// Mock implementation - replace with actual Python backend call
+// Proxy to the Python API (api_server.py). Start it with:
+//   uvicorn api_server:app --port 8000
+const API_URL = process.env.XTRADE_API_URL || 'http://127.0.0.1:8000';
+
 export async function POST(request: NextRequest) {
   const { country, analysisType, numStocks } = await request.json();
-  
-  // Fallback stock data (same as Python version)
-  const fallbackStocks: Record<string, string[]> = {
-    'India': ['RELIANCE', 'TCS', 'INFY', 'HDFCBANK', 'ICICIBANK', 'SBIN', 'BHARTIARTL', 'HINDUNILVR', 'KOTAKBANK', 'LT'],
-    'USA': ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META', 'TSLA', 'NVDA', 'JPM', 'V', 'UNH'],
-    'Australia': ['CBA', 'BHP', 'WBC', 'NAB', 'ANZ', 'WES', 'MQG', 'CSL', 'FMG', 'WOW']
-  };
 
-  // Simulate stock data
-  const symbols = fallbackStocks[country] || [];
-  const stocks = symbols.slice(0, numStocks).map((symbol) => ({
-    Symbol: symbol,
-    Price: Math.random() * 1000 + 50,
-    Volume: Math.floor(Math.random() * 10000000),
-    'PE Ratio': Math.random() * 30 + 5,
-    '50DMA': Math.random() * 1000 + 50,
-    '200DMA': Math.random() * 1000 + 50
-  }));
+  try {
+    // fetch keeps connections to the backend alive and reuses them across requests
+    const response = await fetch(`${API_URL}/api/stocks`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept-Encoding': 'gzip',
+        ...(request.headers.get('if-none-match')
+          ? { 'If-None-Match': request.headers.get('if-none-match') as string }
+          : {}),
+      },
+      body: JSON.stringify({ country, analysisType, numStocks }),
+      cache: 'no-store',
+    });
+
+    const etag = response.headers.get('etag');
+    if (response.status === 304) {
+      return new NextResponse(null, { status: 304, headers: etag ? { ETag: etag } : {} });
+    }
 
-  return NextResponse.json({ stocks });
+    const data = await response.json();
+    return NextResponse.json(data, {
+      status: response.status,
+      headers: etag ? { ETag: etag } : {},
+    });
+  } catch (error) {
+    return NextResponse.json(
+      { stocks: [], error: `Stock API unavailable at ${API_URL}` },
+      { status: 502 }
+    );
+  }
 }
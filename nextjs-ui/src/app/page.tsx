@@ -10,7 +10,9 @@ interface StockData {
   'PE Ratio': number | null;
   '50DMA': number | null;
   '200DMA': number | null;
-  Error?: string;
+  Source?: string | null;
+  Status?: 'ok' | 'no_data' | 'error' | 'timeout';
+  Error?: string | null;
 }
 
 export default function Home() {
@@ -0,0 +1,300 @@
+from statistics import NormalDist
+
+import numpy as np
+
+from indicators import TRADING_DAYS
+
+# Risk analytics for a basket of stocks over a symbols x dates price matrix
+# (oldest bar first, as in indicators.py).
+#
+#   report = analyze(close, method='risk_parity', confidence=0.95)
+#
+# Every step is a few matrix products over the returns matrix rather than a
+# loop over assets or pairs: the covariance is one X @ X.T, portfolio returns
+# for any number of weight vectors are one weights @ returns, and VaR/CVaR are
+# computed for all of them at once. With more assets than a year of bars the
+# sample covariance is singular (or close to it), so it is shrunk towards a
+# scaled identity with the Ledoit-Wolf intensity by default.
+#
+# Optimizers work on annualized inputs and return long-only weights that sum
+# to 1 (mean_variance can also solve the unconstrained problem).
+
+METHODS = {
+    'risk_parity': 'Risk parity',
+    'min_variance': 'Minimum variance',
+    'mean_variance': 'Mean-variance',
+    'equal': 'Equal weight'
+}
+
+
+def simple_returns(close):
+    close = np.asarray(close, dtype=np.float64)
+    return np.diff(close, axis=-1) / close[..., :-1]
+
+
+def sample_covariance(returns):
+    """Unbiased covariance matrix of the rows of `returns`"""
+    centered = returns - returns.mean(axis=1, keepdims=True)
+    return centered @ centered.T / (returns.shape[1] - 1)
+
+
+def ledoit_wolf(returns):
+    """Covariance shrunk towards a scaled identity; returns (covariance, shrinkage).
+
+    The intensity is the Ledoit-Wolf (2004) estimate, from the same centered
+    returns matrix as the sample covariance (no per-date outer products).
+    """
+    n, t = returns.shape
+    centered = returns - returns.mean(axis=1, keepdims=True)
+    sample = centered @ centered.T / t
+    mu = np.trace(sample) / n
+    squared_norm = np.einsum('ij,ij->', sample, sample)
+    delta = squared_norm / n - mu ** 2
+    # Variance of the per-date outer products: sum_t |x_t|^4 / t - |S|^2, scaled
+    beta = ((np.einsum('it,it->t', centered, centered) ** 2).sum() / t - squared_norm) / (n * t)
+    shrinkage = float(np.clip(beta / delta, 0.0, 1.0)) if delta > 0 else 1.0
+    covariance = (1 - shrinkage) * sample
+    covariance[np.diag_indices(n)] += shrinkage * mu
+    return covariance, shrinkage
+
+
+def covariance(returns, shrink=True):
+    """(covariance, shrinkage); shrinkage is 0.0 for the sample estimate"""
+    if shrink:
+        return ledoit_wolf(returns)
+    return sample_covariance(returns), 0.0
+
+
+def correlation(cov):
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.outer(std, std)
+    corr = np.clip(np.nan_to_num(corr), -1.0, 1.0)
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def portfolio_returns(returns, weights):
+    """Return series for one weight vector (n,) or a batch of them (k, n)"""
+    return np.asarray(weights, dtype=np.float64) @ returns
+
+
+def historical_var(returns, confidence=0.95):
+    """(VaR, CVaR) as positive loss fractions for each return series (last axis)"""
+    losses = -np.asarray(returns, dtype=np.float64)
+    var = np.quantile(losses, confidence, axis=-1)
+    tail = losses >= var[..., np.newaxis]
+    cvar = np.where(tail, losses, 0.0).sum(axis=-1) / np.maximum(tail.sum(axis=-1), 1)
+    return var, cvar
+
+
+def parametric_var(weights, mean, cov, confidence=0.95):
+    """Gaussian (VaR, CVaR) from the mean vector and covariance, for one or more weight vectors"""
+    weights = np.asarray(weights, dtype=np.float64)
+    mu = weights @ mean
+    sigma = np.sqrt(((weights @ cov) * weights).sum(axis=-1))
+    normal = NormalDist()
+    z = normal.inv_cdf(confidence)
+    return sigma * z - mu, sigma * normal.pdf(z) / (1 - confidence) - mu
+
+
+def risk_contributions(weights, cov):
+    """Each asset's share of the portfolio variance (sums to 1)"""
+    marginal = cov @ weights
+    total = weights @ marginal
+    return weights * marginal / total if total > 0 else np.zeros_like(weights)
+
+
+def _project(v, cap=1.0):
+    # Euclidean projection onto {0 <= w <= cap, sum(w) = 1}: w = clip(v - tau, 0, cap),
+    # where the total is piecewise linear in tau with kinks at v and v - cap
+    n = len(v)
+    ordered = np.sort(v)
+    prefix = np.concatenate([[0.0], np.cumsum(ordered)])
+    taus = np.sort(np.concatenate([ordered - cap, ordered]))
+    low = np.searchsorted(ordered, taus, side='right')
+    high = np.searchsorted(ordered, taus + cap, side='left')
+    totals = (n - high) * cap + prefix[high] - prefix[low] - (high - low) * taus
+    k = np.searchsorted(-totals, -1.0)
+    if k == 0:
+        tau = taus[0]
+    else:
+        t0, t1, f0, f1 = taus[k - 1], taus[k], totals[k - 1], totals[k]
+        tau = t0 + (f0 - 1.0) * (t1 - t0) / (f0 - f1) if f0 > f1 else t1
+    return np.clip(v - tau, 0.0, cap)
+
+
+def _largest_eigenvalue(cov, iterations=50):
+    v = np.full(len(cov), 1 / np.sqrt(len(cov)))
+    value = 0.0
+    for _ in range(iterations):
+        w = cov @ v
+        value = np.linalg.norm(w)
+        if value == 0:
+            break
+        v = w / value
+    return value
+
+
+def _polish(mean, cov, risk_aversion, w, cap):
+    # Solve the optimality conditions exactly on the support the iterations
+    # found; None unless the result is feasible and optimal
+    upper = w >= cap - 1e-10
+    free = (w > 1e-10) & ~upper
+    if not free.any():
+        return None
+    fixed = np.where(upper, cap, 0.0)
+    rhs = mean[free] - risk_aversion * (cov[free] @ fixed)
+    a, b = np.linalg.solve(risk_aversion * cov[np.ix_(free, free)],
+                           np.column_stack([rhs, np.ones(free.sum())])).T
+    nu = (a.sum() - (1.0 - fixed.sum())) / b.sum()
+    candidate = fixed.copy()
+    candidate[free] = a - nu * b
+    if candidate[free].min() < 0 or candidate[free].max() > cap:
+        return None
+    gradient = mean - risk_aversion * (cov @ candidate)
+    slack = 1e-7 * np.abs(gradient).max() + 1e-12
+    if (gradient[~free & ~upper] > nu + slack).any() or (gradient[upper] < nu - slack).any():
+        return None
+    return candidate
+
+
+def mean_variance(mean, cov, risk_aversion=3.0, long_only=True, max_weight=None, iterations=2000, tol=1e-9,
+                  polish_every=25):
+    """Weights maximizing mean @ w - risk_aversion / 2 * w @ cov @ w with sum(w) = 1.
+
+    Long-only (optionally capped at `max_weight`) problems are solved with
+    accelerated projected gradient steps, one matrix-vector product each.
+    Every `polish_every` steps the optimality conditions are solved exactly
+    on the current support, which ends the search once the support is right.
+    The unconstrained problem has a closed form.
+    """
+    mean = np.asarray(mean, dtype=np.float64)
+    n = len(mean)
+    if not long_only:
+        solved = np.linalg.solve(cov, np.column_stack([mean, np.ones(n)]))
+        a, b = solved[:, 0], solved[:, 1]
+        return a / risk_aversion + (1 - a.sum() / risk_aversion) * b / b.sum()
+
+    cap = 1.0 if max_weight is None else max(float(max_weight), 1.0 / n)
+    step = 1.0 / (risk_aversion * _largest_eigenvalue(cov) * 1.01)
+    w = y = np.full(n, 1.0 / n)
+    momentum = 1.0
+    for i in range(iterations):
+        w_next = _project(y + step * (mean - risk_aversion * (cov @ y)), cap)
+        if (y - w_next) @ (w_next - w) > 0:
+            # Restart the momentum once it points uphill
+            momentum = 1.0
+        momentum_next = (1 + np.sqrt(1 + 4 * momentum ** 2)) / 2
+        y = w_next + (momentum - 1) / momentum_next * (w_next - w)
+        done = np.abs(w_next - w).sum() < tol
+        w, momentum = w_next, momentum_next
+        if done:
+            break
+        if polish_every and (i + 1) % polish_every == 0:
+            polished = _polish(mean, cov, risk_aversion, w, cap)
+            if polished is not None:
+                return polished
+    return w
+
+
+def min_variance(cov, long_only=True, max_weight=None, **options):
+    return mean_variance(np.zeros(len(cov)), cov, 1.0, long_only, max_weight, **options)
+
+
+def _cap(w, max_weight):
+    # Clip at the cap and hand the excess to the uncapped names in proportion to their weights
+    if max_weight is None:
+        return w
+    cap = max(float(max_weight), 1.0 / len(w))
+    w = w.copy()
+    capped = np.zeros(len(w), dtype=bool)
+    while (w > cap * (1 + 1e-12)).any():
+        capped |= w > cap
+        w[capped] = cap
+        w[~capped] *= (1.0 - cap * capped.sum()) / w[~capped].sum()
+    return w
+
+
+def risk_parity(cov, budget=None, max_weight=None, iterations=50, tol=1e-10):
+    """Long-only weights whose risk contributions match `budget` (equal by default).
+
+    Newton's method on Spinu's convex formulation
+    min 1/2 y @ cov @ y - budget @ log(y), normalized to sum to 1. Weights
+    above `max_weight` are clipped and the excess spread over the others in
+    proportion to their weights.
+    """
+    n = len(cov)
+    budget = np.full(n, 1.0 / n) if budget is None else np.asarray(budget, dtype=np.float64) / np.sum(budget)
+    # Scaling the covariance does not change the weights but keeps the steps well conditioned
+    cov = cov / np.mean(np.diag(cov))
+    y = budget / np.sqrt(np.diag(cov))
+    y /= np.sqrt(y @ cov @ y)
+    for _ in range(iterations):
+        gradient = cov @ y - budget / y
+        hessian = cov.copy()
+        hessian[np.diag_indices(n)] += budget / y ** 2
+        step = np.linalg.solve(hessian, gradient)
+        decrement = np.sqrt(max(gradient @ step, 0.0))
+        # Damped steps keep y positive until the quadratically convergent phase
+        y = y - step / (1 + decrement) if decrement > 0.25 else y - step
+        if decrement < tol:
+            break
+    return _cap(y / y.sum(), max_weight)
+
+
+def optimize(method, mean, cov, **options):
+    """Weights for one of the METHODS keys (annualized mean vector and covariance).
+
+    `max_weight` caps every method; it is raised to 1/n when lower, so equal
+    weights always satisfy it.
+    """
+    if method == 'equal':
+        return np.full(len(cov), 1.0 / len(cov))
+    if method == 'min_variance':
+        return min_variance(cov, max_weight=options.get('max_weight'))
+    if method == 'mean_variance':
+        return mean_variance(mean, cov, options.get('risk_aversion', 3.0), max_weight=options.get('max_weight'))
+    if method == 'risk_parity':
+        return risk_parity(cov, max_weight=options.get('max_weight'))
+    raise ValueError(f"Unknown portfolio method: {method}")
+
+
+def analyze(close, method='risk_parity', confidence=0.95, shrink=True, periods_per_year=TRADING_DAYS, **options):
+    """Weights, covariance/correlation and risk statistics for a basket.
+
+    `close` is a symbols x dates price matrix. VaR/CVaR are one-period loss
+    fractions at `confidence`, historical (from the portfolio's return
+    series) and parametric (Gaussian, from the covariance).
+    """
+    returns = simple_returns(close)
+    if returns.shape[0] < 1 or returns.shape[1] < 2:
+        raise ValueError("Need at least one stock with two or more prices")
+    mean = returns.mean(axis=1)
+    cov, shrinkage = covariance(returns, shrink)
+    weights = optimize(method, mean * periods_per_year, cov * periods_per_year, **options)
+
+    series = portfolio_returns(returns, weights)
+    hist_var, hist_cvar = historical_var(series, confidence)
+    param_var, param_cvar = parametric_var(weights, mean, cov, confidence)
+    variance = weights @ cov @ weights
+    stats = {
+        'Assets': len(weights),
+        'Observations': returns.shape[1],
+        'Shrinkage': shrinkage,
+        'Expected_Return': float(weights @ mean * periods_per_year * 100),
+        'Volatility': float(np.sqrt(variance * periods_per_year) * 100),
+        'Historical_VaR': float(hist_var * 100),
+        'Historical_CVaR': float(hist_cvar * 100),
+        'Parametric_VaR': float(param_var * 100),
+        'Parametric_CVaR': float(param_cvar * 100),
+        # 1 / sum of squared weights: how many equal positions the basket behaves like
+        'Effective_Assets': float(1.0 / (weights @ weights))
+    }
+    return {
+        'weights': weights,
+        'risk_contributions': risk_contributions(weights, cov),
+        'covariance': cov,
+        'correlation': correlation(cov),
+        'stats': stats
+    }
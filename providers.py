@@ -0,0 +1,353 @@
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import date
+
+import metrics
+
+# Market-data providers used by main.fetch_stock_data.
+# Each provider is built once and reused; heavy client libraries (and pandas)
+# are imported the first time a provider needs them, not on every fetch.
+
+HISTORY_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Exchange each country's symbols are listed on
+COUNTRY_EXCHANGES = {
+    'India': 'NSE',
+    'USA': 'NASDAQ',
+    'Australia': 'ASX'
+}
+
+
+def exchange_for(country):
+    """Return the exchange code used for a country's symbols"""
+    return COUNTRY_EXCHANGES.get(country, 'Unknown')
+
+
+class ProviderError(Exception):
+    """Raised when a provider cannot return data for a symbol"""
+
+
+class TransientProviderError(ProviderError):
+    """A failure worth retrying (timeouts, 5xx, dropped connections)"""
+
+
+class RateLimitError(TransientProviderError):
+    """The provider throttled us (HTTP 429); `retry_after` is in seconds"""
+
+    def __init__(self, message="429 Too Many Requests", retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class MarketDataProvider:
+    """Base interface for market-data sources"""
+
+    name = 'Unknown'
+    supports_history = True
+
+    def get_quote(self, symbol):
+        """Return a dict with 'price', 'volume' and 'pe_ratio' for a symbol"""
+        raise NotImplementedError
+
+    def get_history(self, symbol, period="1y", start=None):
+        """Return daily OHLCV bars indexed by date (oldest first)"""
+        raise NotImplementedError
+
+    def fetch(self, symbol):
+        """Return a row in the fetch_stock_data layout"""
+        quote = self.get_quote(symbol)
+        hist = self.get_history(symbol, period="1y")
+        return build_row(symbol, quote, hist, self.name)
+
+
+def moving_averages(hist):
+    """Return the latest 50-day and 200-day moving averages of Close"""
+    if hist is None or hist.empty:
+        return None, None
+    with metrics.timer('moving_averages'):
+        close = hist['Close']
+        dma_50 = close.rolling(window=50).mean().iloc[-1]
+        dma_200 = close.rolling(window=200).mean().iloc[-1]
+    return dma_50, dma_200
+
+
+def build_row(symbol, quote, hist, source):
+    """Combine a quote and its price history into a result row"""
+    dma_50, dma_200 = moving_averages(hist)
+    return {
+        'Symbol': symbol,
+        'Price': quote.get('price'),
+        'Volume': quote.get('volume'),
+        'PE Ratio': quote.get('pe_ratio'),
+        '50DMA': dma_50,
+        '200DMA': dma_200,
+        'Source': source
+    }
+
+
+class NseProvider(MarketDataProvider):
+    """Live quotes from the NSE website via nsetools (no price history)"""
+
+    name = 'NSE'
+    supports_history = False
+
+    def __init__(self):
+        from nsetools import Nse
+        self.nse = Nse()
+
+    def get_quote(self, symbol):
+        with metrics.timer('provider_call', provider=self.name, call='quote'):
+            data = self.nse.get_quote(symbol)
+        if not data or 'lastPrice' not in data:
+            raise ProviderError("No NSE data")
+        return {
+            'price': data.get('lastPrice', None),
+            'volume': data.get('quantityTraded', None),
+            'pe_ratio': data.get('pE', None)
+        }
+
+    def get_history(self, symbol, period="1y", start=None):
+        raise ProviderError("NSE history is not available")
+
+    def fetch(self, symbol):
+        # Moving averages are not available from NSE quotes
+        return build_row(symbol, self.get_quote(symbol), None, self.name)
+
+
+class YahooProvider(MarketDataProvider):
+    """Quotes and daily history from Yahoo Finance via yfinance"""
+
+    name = 'Yahoo Finance'
+    # fetch() makes two upstream requests (info and history)
+    fetch_cost = 2
+
+    def __init__(self, suffix=""):
+        import yfinance as yf
+        self.yf = yf
+        self.suffix = suffix
+
+    def ticker(self, symbol):
+        return self.yf.Ticker(symbol + self.suffix)
+
+    def get_quote(self, symbol):
+        with metrics.timer('provider_call', provider=self.name, call='info'):
+            info = self.ticker(symbol).info
+        return {
+            'price': info.get('regularMarketPrice', None),
+            'volume': info.get('regularMarketVolume', None),
+            'pe_ratio': info.get('trailingPE', None)
+        }
+
+    def get_history(self, symbol, period="1y", start=None):
+        import pandas as pd
+        ticker = self.ticker(symbol)
+        with metrics.timer('provider_call', provider=self.name, call='history'):
+            if start is not None:
+                hist = ticker.history(start=pd.Timestamp(start).strftime('%Y-%m-%d'))
+            else:
+                hist = ticker.history(period=period)
+        return hist[HISTORY_COLUMNS] if not hist.empty else hist
+
+    def fetch(self, symbol):
+        ticker = self.ticker(symbol)
+        with metrics.timer('provider_call', provider=self.name, call='info'):
+            info = ticker.info
+        with metrics.timer('provider_call', provider=self.name, call='history'):
+            hist = ticker.history(period="1y")
+        quote = {
+            'price': info.get('regularMarketPrice', None),
+            'volume': info.get('regularMarketVolume', None),
+            'pe_ratio': info.get('trailingPE', None)
+        }
+        return build_row(symbol, quote, hist, self.name)
+
+
+class FakeProvider(MarketDataProvider):
+    """Deterministic offline provider backed by the create_sample_data universe.
+
+    Prices and histories are derived from the symbol name, so every run sees
+    the same data. `latency` (seconds) and `failure_rate` (0-1) simulate a
+    slow or flaky upstream for load tests and benchmarks.
+
+    `rate_limit` (requests/second, with `burst`) makes it answer 429 like a
+    throttling server, `throttle_rate` injects random 429s, and a client that
+    collects `ban_after` 429s within ten seconds is banned (every request
+    throttled) for `ban_seconds`.
+    """
+
+    name = 'Fake'
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=0, allow_unknown=False, history_days=260,
+                 rate_limit=None, burst=None, throttle_rate=0.0, ban_after=None, ban_seconds=60.0):
+        from create_sample_data import create_sample_stock_data
+        universe = create_sample_stock_data()
+        self.universe = {
+            row['Symbol']: {'price': row['Price'], 'volume': row['Volume'], 'pe_ratio': row['PE_Ratio']}
+            for row in universe.to_dict('records')
+        }
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.allow_unknown = allow_unknown
+        self.history_days = history_days
+        self.seed = seed
+        self.calls = 0
+        self.rate_limit = rate_limit
+        self.burst = burst or (rate_limit or 1)
+        self.throttle_rate = throttle_rate
+        self.ban_after = ban_after
+        self.ban_seconds = ban_seconds
+        self.throttled = 0
+        self.bans = 0
+        self._tokens = self.burst
+        self._refilled = time.monotonic()
+        self._recent_429s = []
+        self._banned_until = 0.0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _throttle(self, now):
+        """Server-side rate limiting; returns a RateLimitError or None (call with the lock held)"""
+        if now < self._banned_until:
+            return RateLimitError("429 Too Many Requests (banned)", retry_after=self._banned_until - now)
+        limited = self._rng.random() < self.throttle_rate
+        if self.rate_limit:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate_limit)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+            else:
+                limited = True
+        if not limited:
+            return None
+        self.throttled += 1
+        if self.ban_after:
+            self._recent_429s = [t for t in self._recent_429s if now - t < 10.0] + [now]
+            if len(self._recent_429s) >= self.ban_after:
+                self._banned_until = now + self.ban_seconds
+                self._recent_429s = []
+                self.bans += 1
+        return RateLimitError(retry_after=1.0 / self.rate_limit if self.rate_limit else 1.0)
+
+    def _symbol_seed(self, symbol):
+        return zlib.crc32(symbol.encode()) ^ self.seed
+
+    def _simulate_request(self, symbol):
+        with self._lock:
+            self.calls += 1
+            throttled = self._throttle(time.monotonic())
+            failed = self._rng.random() < self.failure_rate
+        with metrics.timer('provider_call', provider=self.name, call='request'):
+            if self.latency:
+                time.sleep(self.latency)
+        if throttled is not None:
+            raise throttled
+        if failed:
+            raise TransientProviderError(f"Simulated failure for {symbol}")
+
+    def _base_quote(self, symbol):
+        if symbol in self.universe:
+            return dict(self.universe[symbol])
+        if not self.allow_unknown:
+            raise ProviderError(f"Unknown symbol {symbol}")
+        rng = random.Random(self._symbol_seed(symbol))
+        return {
+            'price': round(rng.uniform(10, 3000), 2),
+            'volume': rng.randint(100000, 50000000),
+            'pe_ratio': round(rng.uniform(5, 60), 1)
+        }
+
+    def _synthetic_history(self, symbol, last_price):
+        """Geometric random walk that ends at the symbol's current price"""
+        import numpy as np
+        import pandas as pd
+        rng = np.random.default_rng(self._symbol_seed(symbol))
+        end = pd.Timestamp(date.today())
+        index = pd.bdate_range(end=end, periods=self.history_days)
+        returns = rng.normal(0.0003, 0.015, len(index))
+        close = last_price * np.exp(np.cumsum(returns) - np.sum(returns))
+        spread = np.abs(rng.normal(0, 0.01, len(index)))
+        return pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.004, len(index))),
+            'High': close * (1 + spread),
+            'Low': close * (1 - spread),
+            'Close': close,
+            'Volume': rng.integers(100000, 50000000, len(index))
+        }, index=index)
+
+    def get_quote(self, symbol):
+        self._simulate_request(symbol)
+        return self._base_quote(symbol)
+
+    def get_history(self, symbol, period="1y", start=None):
+        self._simulate_request(symbol)
+        hist = self._synthetic_history(symbol, self._base_quote(symbol)['price'])
+        if start is not None:
+            import pandas as pd
+            hist = hist[hist.index >= pd.Timestamp(start)]
+        return hist
+
+    def fetch(self, symbol):
+        # One simulated round-trip, like a single ticker lookup
+        self._simulate_request(symbol)
+        quote = self._base_quote(symbol)
+        hist = self._synthetic_history(symbol, quote['price'])
+        return build_row(symbol, quote, hist, self.name)
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def _default_providers(country):
+    if os.environ.get('XTRADE_PROVIDER', '').lower() == 'fake':
+        return [FakeProvider(latency=float(os.environ.get('XTRADE_FAKE_LATENCY', 0)),
+                             failure_rate=float(os.environ.get('XTRADE_FAKE_FAILURE_RATE', 0)))]
+    if country == 'India':
+        # Try NSE first, fall back to Yahoo Finance
+        chain = []
+        try:
+            chain.append(NseProvider())
+        except Exception as e:
+            print(f"NSE provider unavailable: {e}")
+        chain.append(YahooProvider(suffix=".NS"))
+        return chain
+    return [YahooProvider()]
+
+
+def get_providers(country):
+    """Return the provider chain for a country, building it on first use.
+
+    Every provider is wrapped by scheduler.guard, so calls are rate limited,
+    retried and circuit-broken.
+    """
+    chain = _providers.get(country)
+    if chain is None:
+        from scheduler import guard
+        with _providers_lock:
+            chain = _providers.get(country)
+            if chain is None:
+                chain = [guard(p) for p in _default_providers(country)]
+                _providers[country] = chain
+    return chain
+
+
+def set_providers(country, providers):
+    """Override the provider chain for a country (None resets to the default)"""
+    from scheduler import guard
+    with _providers_lock:
+        if providers is None:
+            _providers.pop(country, None)
+        else:
+            _providers[country] = [guard(p) for p in providers]
+
+
+def use_offline_provider(latency=0.0, failure_rate=0.0, seed=0, allow_unknown=False,
+                         countries=('India', 'USA', 'Australia')):
+    """Route every country to a shared FakeProvider and return it"""
+    fake = FakeProvider(latency=latency, failure_rate=failure_rate, seed=seed, allow_unknown=allow_unknown)
+    for country in countries:
+        set_providers(country, [fake])
+    return fake
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Fields that move with every tick vs. fields that only change slowly
+QUOTE_FIELDS = ('Price', 'Volume')
+SLOW_FIELDS = ('PE Ratio', '50DMA', '200DMA')
+
+
+class _Entry:
+    __slots__ = ('row', 'quote_time', 'slow_time')
+
+    def __init__(self, row, now):
+        self.row = row
+        self.quote_time = now
+        self.slow_time = now
+
+
+class QuoteCache:
+    """Bounded LRU cache for fetch_stock_data rows with stale-while-revalidate.
+
+    Quote fields (Price/Volume) and slow fields (PE, 50DMA/200DMA) have their
+    own TTLs. An entry past either TTL is still served immediately while a
+    background refresh updates it; only entries older than `max_stale` (or
+    missing) are loaded synchronously.
+    """
+
+    def __init__(self, max_size=1024, quote_ttl=15.0, slow_ttl=3600.0, max_stale=86400.0,
+                 refresh_workers=2, clock=time.monotonic):
+        self.max_size = max_size
+        self.quote_ttl = quote_ttl
+        self.slow_ttl = slow_ttl
+        self.max_stale = max_stale
+        self.refresh_workers = refresh_workers
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.RLock()
+        self._executor = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def stats(self):
+        """Return the hit/miss/eviction counters as a dict"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'refreshes': self.refreshes,
+                'refresh_errors': self.refresh_errors,
+                'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, load, load_quote=None, load_on_miss=True):
+        """Return the cached row for `key`, loading or refreshing it as needed.
+
+        `load()` returns a full row; `load_quote()` (optional) returns only the
+        quote fields and is used when just those have expired. With
+        `load_on_miss=False` a miss returns None instead of loading (and is not
+        counted), so callers can serve hits inline and batch the misses.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.slow_time <= self.max_stale:
+                self._entries.move_to_end(key)
+                quote_stale = now - entry.quote_time > self.quote_ttl
+                slow_stale = now - entry.slow_time > self.slow_ttl
+                if quote_stale or slow_stale:
+                    self.stale_hits += 1
+                    self._schedule_refresh(key, load, load_quote if not slow_stale else None)
+                else:
+                    self.hits += 1
+                return dict(entry.row)
+            if not load_on_miss:
+                return None
+            self.misses += 1
+
+        row = load()
+        self._store(key, row)
+        return dict(row)
+
+    def _store(self, key, row):
+        # Failed fetches are not cached so the next request retries them
+        if row.get('Error'):
+            return
+        with self._lock:
+            self._entries[key] = _Entry(dict(row), self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _schedule_refresh(self, key, load, load_quote):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                thread_name_prefix='quote-refresh')
+        self._executor.submit(self._refresh, key, load, load_quote)
+
+    def _refresh(self, key, load, load_quote):
+        try:
+            if load_quote is not None:
+                fields = load_quote()
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        entry.row.update({f: fields[f] for f in QUOTE_FIELDS if f in fields})
+                        entry.quote_time = self.clock()
+                    self.refreshes += 1
+            else:
+                row = load()
+                if row.get('Error'):
+                    raise RuntimeError(row['Error'])
+                self._store(key, row)
+                with self._lock:
+                    self.refreshes += 1
+        except Exception:
+            with self._lock:
+                self.refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
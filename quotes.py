@@ -0,0 +1,226 @@
+import math
+from enum import IntEnum
+
+import numpy as np
+import pandas as pd
+
+# Fixed-schema quote records.
+#
+# Quote is one slotted record; QuoteBatch keeps many quotes as columns: one
+# (field, symbol) float64 block for the numeric fields, int8 source codes, a
+# uint8 status array and a sparse {position: message} map of errors. The
+# numeric block backs to_numpy()/to_frame() without copying.
+#
+# Both convert to and from the row dicts returned by main.fetch_stock_data.
+
+NUMERIC_FIELDS = ('Price', 'Volume', 'PE Ratio', '50DMA', '200DMA')
+TIMEOUT_MESSAGE = "Timed out after {:.1f}s"
+
+
+class QuoteStatus(IntEnum):
+    OK = 0
+    NO_DATA = 1    # the provider answered without a price
+    ERROR = 2
+    TIMEOUT = 3
+
+
+def _number(value):
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _optional(value):
+    return None if value is None or (isinstance(value, float) and math.isnan(value)) else value
+
+
+def _status_for(row):
+    error = row.get('Error')
+    if error:
+        return QuoteStatus.TIMEOUT if str(error).startswith("Timed out") else QuoteStatus.ERROR
+    return QuoteStatus.OK if row.get('Price') is not None else QuoteStatus.NO_DATA
+
+
+class Quote:
+    """One symbol's quote; missing numbers are NaN"""
+
+    # Declared by hand: dataclass(slots=True) needs Python 3.10
+    __slots__ = ('symbol', 'price', 'volume', 'pe_ratio', 'dma_50', 'dma_200', 'source', 'status', 'error')
+
+    def __init__(self, symbol, price=math.nan, volume=math.nan, pe_ratio=math.nan, dma_50=math.nan,
+                 dma_200=math.nan, source=None, status=QuoteStatus.OK, error=None):
+        self.symbol = symbol
+        self.price = price
+        self.volume = volume
+        self.pe_ratio = pe_ratio
+        self.dma_50 = dma_50
+        self.dma_200 = dma_200
+        self.source = source
+        self.status = status
+        self.error = error
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={value!r}" for name, value in zip(self.__slots__, self._values()))
+        return f"Quote({fields})"
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    @classmethod
+    def from_row(cls, row):
+        """Build from a fetch_stock_data row dict"""
+        return cls(row['Symbol'], *(_number(row.get(f)) for f in NUMERIC_FIELDS),
+                   source=row.get('Source'), status=_status_for(row), error=row.get('Error'))
+
+    @property
+    def ok(self):
+        return self.status == QuoteStatus.OK
+
+    def numbers(self):
+        return (self.price, self.volume, self.pe_ratio, self.dma_50, self.dma_200)
+
+    def to_row(self):
+        """Return the fetch_stock_data row dict (None for missing numbers)"""
+        row = {'Symbol': self.symbol}
+        row.update(zip(NUMERIC_FIELDS, (_optional(v) for v in self.numbers())))
+        if row['Volume'] is not None:
+            row['Volume'] = int(row['Volume'])
+        if self.source is not None:
+            row['Source'] = self.source
+        if self.error is not None:
+            row['Error'] = self.error
+        return row
+
+
+class QuoteBatch:
+    """Struct-of-arrays container for many quotes with a fixed schema"""
+
+    def __init__(self, symbols, values=None, sources=None, source_codes=None, status=None, errors=None):
+        self.symbols = np.asarray(symbols, dtype=object)
+        n = len(self.symbols)
+        # One row per field so every column is a contiguous view
+        self.values = values if values is not None else np.full((len(NUMERIC_FIELDS), n), np.nan)
+        self.sources = list(sources or [])
+        self.source_codes = source_codes if source_codes is not None else np.full(n, -1, dtype=np.int8)
+        self.status = status if status is not None else np.zeros(n, dtype=np.uint8)
+        self.errors = dict(errors or {})
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from fetch_stock_data row dicts"""
+        rows = list(rows)
+        symbols = [row['Symbol'] for row in rows]
+        try:
+            # Column-at-a-time conversion; None becomes NaN
+            values = np.array([[row.get(f) for row in rows] for f in NUMERIC_FIELDS], dtype=np.float64)
+        except (TypeError, ValueError):
+            batch = cls(symbols)
+            for i, row in enumerate(rows):
+                batch.set_row(i, row)
+            return batch
+        codes, sources = pd.factorize(pd.Series([row.get('Source') for row in rows], dtype=object))
+        status = np.array([_status_for(row) for row in rows], dtype=np.uint8)
+        errors = {i: row['Error'] for i, row in enumerate(rows) if row.get('Error')}
+        return cls(symbols, values, list(sources),
+                   codes.astype(np.int8), status, errors)
+
+    @classmethod
+    def from_quotes(cls, quotes):
+        quotes = list(quotes)
+        batch = cls([q.symbol for q in quotes])
+        for i, quote in enumerate(quotes):
+            batch.set_quote(i, quote)
+        return batch
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __getitem__(self, i):
+        code = self.source_codes[i]
+        return Quote(self.symbols[i], *(float(v) for v in self.values[:, i]),
+                     source=self.sources[code] if code >= 0 else None,
+                     status=QuoteStatus(int(self.status[i])), error=self.errors.get(i))
+
+    def _source_code(self, source):
+        if source is None:
+            return -1
+        if source not in self.sources:
+            self.sources.append(source)
+        return self.sources.index(source)
+
+    def set_quote(self, i, quote):
+        self.values[:, i] = quote.numbers()
+        self.source_codes[i] = self._source_code(quote.source)
+        self.status[i] = quote.status
+        if quote.error is not None:
+            self.errors[i] = quote.error
+        else:
+            self.errors.pop(i, None)
+
+    def set_row(self, i, row):
+        """Overwrite position `i` from a fetch_stock_data row dict"""
+        for f, field in enumerate(NUMERIC_FIELDS):
+            self.values[f, i] = _number(row.get(field))
+        self.source_codes[i] = self._source_code(row.get('Source'))
+        self.status[i] = _status_for(row)
+        if row.get('Error'):
+            self.errors[i] = row['Error']
+        else:
+            self.errors.pop(i, None)
+
+    def column(self, field):
+        """A numeric field as a view (no copy)"""
+        return self.values[NUMERIC_FIELDS.index(field)]
+
+    @property
+    def ok(self):
+        return self.status == QuoteStatus.OK
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.source_codes.nbytes + self.status.nbytes + self.symbols.nbytes
+
+    def to_numpy(self):
+        """(n_quotes, n_fields) float64 view of the numeric fields"""
+        return self.values.T
+
+    def to_frame(self):
+        """DataFrame in the fetch_stock_data column layout plus Status.
+
+        The numeric columns share memory with the batch.
+        """
+        df = pd.DataFrame(self.values.T, columns=list(NUMERIC_FIELDS), copy=False)
+        df.insert(0, 'Symbol', self.symbols)
+        sources = np.asarray(self.sources + [None], dtype=object)
+        df['Source'] = sources[self.source_codes]
+        df['Status'] = pd.Categorical.from_codes(self.status, [s.name.lower() for s in QuoteStatus])
+        df['Error'] = pd.Series(self.errors, index=pd.RangeIndex(len(self)), dtype=object) if self.errors else None
+        return df
+
+    def to_records(self):
+        """Row dicts with None for missing values (for JSON responses)"""
+        sources = self.sources + [None]
+        rows = []
+        for i, symbol in enumerate(self.symbols.tolist()):
+            row = {'Symbol': symbol}
+            row.update(zip(NUMERIC_FIELDS, (_optional(v) for v in self.values[:, i].tolist())))
+            if row['Volume'] is not None:
+                row['Volume'] = int(row['Volume'])
+            row['Source'] = sources[self.source_codes[i]]
+            row['Status'] = QuoteStatus(int(self.status[i])).name.lower()
+            row['Error'] = self.errors.get(i)
+            rows.append(row)
+        return rows
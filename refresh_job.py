@@ -0,0 +1,323 @@
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from snapshot import is_snapshot, load_snapshot, write_snapshot
+
+# Nightly refresh of quotes and indicators for the whole dataset universe.
+#
+# The (Country, Symbol) universe is split into shards by a hash of the symbol,
+# and each shard into single-country chunks. Shards run on a process pool;
+# inside a worker every chunk is fetched on a thread pool (main's batch fetch,
+# at bulk priority, with the provider rate limits split between processes)
+# and written straight to a part snapshot, so no process holds more than one
+# chunk of results. A per-shard checkpoint records the finished chunks, so
+# rerunning the same job after a crash only fetches what is missing. When
+# every shard is done the parts are merged into the dataset snapshot.
+#
+#   <job dir>/job.json              universe fingerprint and layout
+#   <job dir>/shard-003.json        checkpoint: finished chunks, counts, time
+#   <job dir>/parts/003-00012.snapshot
+#
+#   python refresh_job.py --processes 4                        # dataset universe
+#   python refresh_job.py --universe symbols.csv --countries USA
+#   python refresh_job.py --offline --synthetic 5000 --output /tmp/universe.snapshot
+
+JOB_VERSION = 1
+# fetch_stock_data field -> dataset column
+QUOTE_COLUMNS = {'Price': 'Price', 'Volume': 'Volume', 'PE Ratio': 'PE_Ratio', '50DMA': '50DMA', '200DMA': '200DMA'}
+INDICATOR_COLUMNS = ['RSI', 'MACD', 'Volatility']
+DEFAULT_JOB_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'refresh')
+
+
+def load_universe(path, countries=None):
+    """(Country, Symbol) pairs from a CSV, snapshot or Excel dataset, sorted and unique"""
+    if path.endswith('.csv'):
+        df = pd.read_csv(path, usecols=['Country', 'Symbol'])
+    elif is_snapshot(path):
+        df = load_snapshot(path, columns=['Country', 'Symbol'])
+    else:
+        df = pd.read_excel(path, sheet_name='All_Stocks', usecols=['Country', 'Symbol'])
+    df = df.dropna().astype(str)
+    if countries:
+        df = df[df['Country'].isin(countries)]
+    return df.drop_duplicates().sort_values(['Country', 'Symbol'], ignore_index=True)
+
+
+def shard_of(country, symbol, num_shards):
+    """Stable shard number for a symbol (independent of the universe order)"""
+    return zlib.crc32(f"{country}:{symbol}".encode()) % num_shards
+
+
+def plan_shards(universe, num_shards, chunk_size):
+    """[[(country, [symbols]), ...] per shard]; chunks never mix countries"""
+    shard = np.array([shard_of(c, s, num_shards) for c, s in zip(universe['Country'], universe['Symbol'])],
+                     dtype=np.int64)
+    plan = []
+    for i in range(num_shards):
+        chunks = []
+        for country, group in universe[shard == i].groupby('Country', sort=True):
+            symbols = group['Symbol'].tolist()
+            chunks += [(country, symbols[j:j + chunk_size]) for j in range(0, len(symbols), chunk_size)]
+        plan.append(chunks)
+    return plan
+
+
+def _fingerprint(universe, num_shards, chunk_size):
+    keys = "\n".join(universe['Country'] + ":" + universe['Symbol'])
+    return f"{zlib.crc32(keys.encode()):08x}-{num_shards}-{chunk_size}"
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def prepare_job(job_dir, universe, num_shards, chunk_size, restart=False):
+    """Create or reopen a job directory; refuses to resume a different universe"""
+    manifest = {'version': JOB_VERSION, 'fingerprint': _fingerprint(universe, num_shards, chunk_size),
+                'symbols': len(universe), 'shards': num_shards, 'chunk_size': chunk_size}
+    existing = _read_json(os.path.join(job_dir, 'job.json'))
+    if existing is not None and (restart or existing.get('fingerprint') != manifest['fingerprint']):
+        if not restart:
+            raise ValueError(f"{job_dir} holds a different job ({existing.get('symbols')} symbols, "
+                             f"{existing.get('shards')} shards); use --restart or another --job-dir")
+        shutil.rmtree(job_dir)
+        existing = None
+    os.makedirs(os.path.join(job_dir, 'parts'), exist_ok=True)
+    if existing is None:
+        manifest['created'] = datetime.now().isoformat(timespec='seconds')
+        _write_json(os.path.join(job_dir, 'job.json'), manifest)
+    return plan_shards(universe, num_shards, chunk_size)
+
+
+def refresh_chunk(country, symbols, threads=8, timeout=30.0):
+    """Fetch quotes and recompute indicators for one country's symbols as a dataset frame"""
+    from main import fetch_stock_data_batch, flush_tick_archive
+    from scheduler import BULK, request_priority
+    from streaming import load_seed_history
+
+    with request_priority(BULK):
+        rows = fetch_stock_data_batch(symbols, country, max_workers=threads, timeout=timeout, use_cache=False)
+        # The fetch just brought the history store up to date, so this only reads it
+        kept, closes, _, _ = load_seed_history(symbols, country)
+    # Pool workers exit without running atexit, so archive the chunk's quotes before its checkpoint
+    flush_tick_archive()
+
+    df = pd.DataFrame({'Country': country, 'Symbol': symbols})
+    for field, column in QUOTE_COLUMNS.items():
+        df[column] = pd.to_numeric(pd.Series([row.get(field) for row in rows]), errors='coerce')
+    position = pd.Series(np.arange(len(symbols)), index=symbols)
+    for column in INDICATOR_COLUMNS:
+        df[column] = np.nan
+    if kept:
+        rows_with_history = position[kept].to_numpy()
+        df.loc[rows_with_history, 'RSI'] = indicators.rsi(closes)[:, -1]
+        df.loc[rows_with_history, 'MACD'] = indicators.macd(closes)[0][:, -1]
+        df.loc[rows_with_history, 'Volatility'] = indicators.trailing_volatility(closes)
+    df['Source'] = [row.get('Source') for row in rows]
+    df['Error'] = [row.get('Error') for row in rows]
+    df['Last_Updated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return df
+
+
+def _part_path(job_dir, shard, chunk):
+    return os.path.join(job_dir, 'parts', f"{shard:03d}-{chunk:05d}.snapshot")
+
+
+def _checkpoint_path(job_dir, shard):
+    return os.path.join(job_dir, f"shard-{shard:03d}.json")
+
+
+def run_shard(job_dir, shard, chunks, threads=8, timeout=30.0):
+    """Refresh every unfinished chunk of one shard; returns its checkpoint"""
+    path = _checkpoint_path(job_dir, shard)
+    checkpoint = _read_json(path) or {'shard': shard, 'chunks': len(chunks), 'done': [],
+                                      'symbols': 0, 'errors': 0, 'seconds': 0.0}
+    done = set(checkpoint['done'])
+    checkpoint['skipped'] = len(done)
+    for i, (country, symbols) in enumerate(chunks):
+        if i in done:
+            continue
+        start = time.perf_counter()
+        part = refresh_chunk(country, symbols, threads, timeout)
+        write_snapshot(part, _part_path(job_dir, shard, i))
+        checkpoint['done'].append(i)
+        checkpoint['symbols'] += len(part)
+        checkpoint['errors'] += int(part['Error'].notna().sum())
+        checkpoint['seconds'] += time.perf_counter() - start
+        _write_json(path, checkpoint)
+        print(f"  shard {shard:3d}: chunk {len(checkpoint['done'])}/{len(chunks)} ({country}, "
+              f"{len(part)} symbols) {checkpoint['symbols'] / checkpoint['seconds']:.1f} symbols/s", flush=True)
+    return checkpoint
+
+
+def _init_worker(options):
+    import main
+    import scheduler
+    from providers import use_offline_provider
+
+    if options.get('history_dir'):
+        main.HISTORY_DIR = options['history_dir']
+    if options.get('tick_archive_dir'):
+        main.TICK_ARCHIVE_DIR = options['tick_archive_dir']
+    if options.get('offline'):
+        use_offline_provider(latency=options.get('latency', 0.0), allow_unknown=True)
+    # Each process gets its own token buckets; together they stay within the provider limits
+    scheduler.scheduler.share(options.get('processes', 1))
+
+
+def run_job(job_dir, plan, processes=None, threads=8, timeout=30.0, **options):
+    """Run every shard of `plan`; returns the shard checkpoints in shard order"""
+    processes = max(1, min(processes or os.cpu_count() or 1, len(plan)))
+    options['processes'] = processes
+    results, todo = {}, []
+    for shard, chunks in enumerate(plan):
+        checkpoint = _read_json(_checkpoint_path(job_dir, shard))
+        if checkpoint is not None and len(checkpoint['done']) == len(chunks):
+            checkpoint['skipped'] = len(chunks)
+            results[shard] = checkpoint
+        else:
+            todo.append((shard, chunks))
+
+    if processes == 1:
+        _init_worker(options)
+        for shard, chunks in todo:
+            results[shard] = run_shard(job_dir, shard, chunks, threads, timeout)
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(options,)) as pool:
+            futures = {pool.submit(run_shard, job_dir, shard, chunks, threads, timeout): shard
+                       for shard, chunks in todo}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+    return [results[shard] for shard in sorted(results)]
+
+
+def merge_parts(job_dir, output):
+    """Fold every part into the dataset snapshot at `output` (atomically replaced).
+
+    Existing rows keep the columns the job does not refresh; a failed fetch
+    (NaN) never overwrites a stored value. New symbols are appended.
+    """
+    from scoring import fundamental_score, recommend
+
+    parts = sorted(glob.glob(os.path.join(job_dir, 'parts', '*.snapshot')))
+    if not parts:
+        raise ValueError(f"No refreshed parts in {job_dir}")
+    refreshed = pd.concat([load_snapshot(p) for p in parts], ignore_index=True).set_index(['Country', 'Symbol'])
+    refreshed = refreshed.drop(columns=['Source', 'Error'])
+
+    if is_snapshot(output):
+        dataset = load_snapshot(output).copy()
+        columns = list(dataset.columns)
+        dtypes = dataset.dtypes
+        dataset = dataset.set_index(['Country', 'Symbol'])
+        dataset.update(refreshed[[c for c in refreshed.columns if c in dataset.columns]])
+        new = refreshed.loc[refreshed.index.difference(dataset.index)]
+        dataset = pd.concat([dataset, new[[c for c in new.columns if c in dataset.columns]]])
+    else:
+        dataset = refreshed
+        columns = ['Country', 'Symbol'] + list(refreshed.columns)
+        dtypes = {}
+    dataset = dataset.reset_index()[columns]
+    for column, dtype in dtypes.items():
+        # update() goes through float; restore integer columns such as Volume
+        if pd.api.types.is_integer_dtype(dtype) and dataset[column].notna().all():
+            dataset[column] = dataset[column].round().astype(dtype)
+    if {'ROE', 'Revenue_Growth'} <= set(dataset.columns):
+        # PE moved, so the recommendation may have too
+        dataset['Recommendation'] = recommend(
+            fundamental_score(dataset['PE_Ratio'], dataset['ROE'], dataset['Revenue_Growth']))
+    write_snapshot(dataset, output)
+    return dataset
+
+
+def print_summary(checkpoints, elapsed):
+    print(f"\n{'Shard':>5} {'Chunks':>7} {'Symbols':>8} {'Errors':>7} {'Seconds':>8} {'Symbols/s':>10}  Note")
+    for c in checkpoints:
+        rate = c['symbols'] / c['seconds'] if c['seconds'] else 0.0
+        note = f"resumed after {c['skipped']} chunks" if c.get('skipped') else ''
+        print(f"{c['shard']:5d} {len(c['done']):>3}/{c['chunks']:<3} {c['symbols']:8d} {c['errors']:7d} "
+              f"{c['seconds']:8.1f} {rate:10.1f}  {note}")
+    total = sum(c['symbols'] for c in checkpoints)
+    print(f"Total: {total} symbols in {elapsed:.1f}s wall ({total / elapsed if elapsed else 0:.1f} symbols/s)")
+
+
+def main():
+    from stock_analyzer_app import DEFAULT_DATA_PATH
+
+    parser = argparse.ArgumentParser(description="Refresh quotes and indicators for the dataset universe")
+    parser.add_argument('--universe', default=None,
+                        help="CSV (Country,Symbol), snapshot or Excel file; defaults to --output")
+    parser.add_argument('--synthetic', type=int, default=None, help="use a synthetic universe of N symbols")
+    parser.add_argument('--countries', nargs='+', default=None)
+    parser.add_argument('--output', default=DEFAULT_DATA_PATH, help="dataset snapshot to update")
+    parser.add_argument('--job-dir', default=None, help="checkpoint directory (default: one per day)")
+    parser.add_argument('--restart', action='store_true', help="discard the checkpoints in --job-dir")
+    parser.add_argument('--shards', type=int, default=None, help="default: 4 per process")
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--threads', type=int, default=8, help="concurrent fetches per process")
+    parser.add_argument('--chunk-size', type=int, default=200)
+    parser.add_argument('--timeout', type=float, default=30.0, help="per-symbol fetch timeout")
+    parser.add_argument('--history-dir', default=None)
+    parser.add_argument('--tick-archive-dir', default=None, help="where fetched quotes are archived")
+    parser.add_argument('--offline', action='store_true', help="use the deterministic fake provider")
+    parser.add_argument('--fake-latency', type=float, default=0.0)
+    parser.add_argument('--no-merge', action='store_true', help="leave the parts unmerged")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from create_sample_data import create_synthetic_universe
+        universe = create_synthetic_universe(args.synthetic)[['Country', 'Symbol']]
+        if args.countries:
+            universe = universe[universe['Country'].isin(args.countries)]
+        universe = universe.sort_values(['Country', 'Symbol'], ignore_index=True)
+    else:
+        universe = load_universe(args.universe or args.output, args.countries)
+    if universe.empty:
+        print("No symbols to refresh")
+        sys.exit(1)
+
+    processes = args.processes or os.cpu_count() or 1
+    shards = args.shards or processes * 4
+    job_dir = args.job_dir or os.path.join(DEFAULT_JOB_ROOT, datetime.now().strftime('%Y-%m-%d'))
+    try:
+        plan = prepare_job(job_dir, universe, shards, args.chunk_size, args.restart)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    print(f"Refreshing {len(universe)} symbols in {shards} shards on {processes} processes ({job_dir})")
+
+    start = time.perf_counter()
+    checkpoints = run_job(job_dir, plan, processes, args.threads, args.timeout, offline=args.offline,
+                          latency=args.fake_latency, history_dir=args.history_dir,
+                          tick_archive_dir=args.tick_archive_dir)
+    print_summary(checkpoints, time.perf_counter() - start)
+    if not args.no_merge:
+        dataset = merge_parts(job_dir, args.output)
+        print(f"Wrote {len(dataset)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
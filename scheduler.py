@@ -0,0 +1,364 @@
+import contextvars
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+from providers import ProviderError, RateLimitError, TransientProviderError
+
+# Upstream call scheduling for the market-data providers.
+#
+# get_providers() wraps every provider in a GuardedProvider, so each call
+# (from main, the history store or the quote streamer) goes through:
+#
+#   CircuitBreaker   skip a provider that keeps failing for `cooldown` seconds,
+#                    letting the caller fall back (NSE -> Yahoo) immediately
+#   TokenBucket      per-provider request rate; waiters are served by priority,
+#                    so interactive requests overtake bulk refreshes, and the
+#                    rate adapts (halved on a 429, crept back up on success)
+#   retries          jittered exponential backoff on transient errors and 429s;
+#                    permanent errors (unknown symbol) fail at once
+#
+# Bulk work marks itself with `with request_priority(BULK):`.
+
+INTERACTIVE = 0
+BULK = 10
+
+# (requests per second, burst) per provider name; None means unlimited
+RATE_LIMITS = {
+    'NSE': (3.0, 5),
+    'Yahoo Finance': (5.0, 10),
+    'Fake': None
+}
+
+_priority = contextvars.ContextVar('xtrade_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority):
+    """Run provider calls in this block at `priority` (lower goes first)"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class CircuitOpenError(ProviderError):
+    """The provider's circuit breaker is open; try the next provider"""
+
+
+def classify(error):
+    """Return 'rate_limit', 'transient' or 'permanent' for a provider exception"""
+    if isinstance(error, RateLimitError):
+        return 'rate_limit'
+    message = str(error)
+    if type(error).__name__ == 'YFRateLimitError' or '429' in message or 'Too Many Requests' in message:
+        return 'rate_limit'
+    if isinstance(error, (TransientProviderError, TimeoutError, ConnectionError)):
+        return 'transient'
+    if any(code in message for code in ('502', '503', '504', 'timed out', 'Connection')):
+        return 'transient'
+    return 'permanent'
+
+
+class TokenBucket:
+    """Priority-ordered token bucket with additive-increase/multiplicative-decrease.
+
+    `acquire()` blocks until a token is free and no higher-priority waiter is
+    ahead. `throttled()` halves the rate and pauses the bucket; every success
+    adds `increase` requests/second back, up to `max_rate`.
+    """
+
+    def __init__(self, rate, burst=None, min_rate=0.2, increase=0.05, clock=time.monotonic):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, rate))
+        self.min_rate = min_rate
+        self.increase = increase
+        self.clock = clock
+        self._tokens = self.burst
+        self._refilled = clock()
+        self._paused_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def acquire(self, priority=INTERACTIVE, timeout=None, cost=1):
+        """Take `cost` tokens; returns False if `timeout` seconds pass first.
+
+        A `cost` above the burst could never be served and fails at once.
+        """
+        if cost > self.burst:
+            return False
+        deadline = None if timeout is None else self.clock() + timeout
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = self.clock()
+                    self._refill(now)
+                    if self._waiters[0] == ticket:
+                        if now >= self._paused_until and self._tokens >= cost:
+                            self._tokens -= cost
+                            return True
+                        wait = max(self._paused_until - now, (cost - self._tokens) / self.rate)
+                    else:
+                        wait = None
+                    if deadline is not None:
+                        if now >= deadline:
+                            return False
+                        wait = deadline - now if wait is None else min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def throttled(self, retry_after=None):
+        with self._cond:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self._paused_until = max(self._paused_until, self.clock() + pause)
+
+    def succeeded(self):
+        with self._cond:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+class CircuitBreaker:
+    """Open after `failure_threshold` consecutive failures; probe again after `cooldown`"""
+
+    def __init__(self, failure_threshold=5, cooldown=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if self.clock() - self.opened_at >= self.cooldown else 'open'
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at < self.cooldown or self._probing:
+                return False
+            # Half-open: let a single trial request through
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def trip(self):
+        """Open immediately (e.g. the provider told us to stay away)"""
+        with self._lock:
+            self.opened_at = self.clock()
+            self._probing = False
+
+    def release(self):
+        """A call ended without a verdict (throttled, queue timeout); a failed trial reopens"""
+        with self._lock:
+            if self._probing:
+                self.opened_at = self.clock()
+                self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+                self._probing = False
+                return True
+            return False
+
+
+class ProviderScheduler:
+    """Rate limits, retries and circuit breakers shared by every provider call"""
+
+    def __init__(self, rate_limits=None, max_retries=3, base_delay=0.2, max_delay=5.0,
+                 acquire_timeout=30.0, failure_threshold=5, cooldown=30.0, sleep=time.sleep):
+        self.rate_limits = dict(RATE_LIMITS if rate_limits is None else rate_limits)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.sleep = sleep
+        self.buckets = {}
+        self.breakers = {}
+        # Largest token cost of one call per provider; a bucket's burst never drops below it
+        self.costs = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, name):
+        with self._lock:
+            if name not in self.buckets:
+                limit = self.rate_limits.get(name)
+                self.buckets[name] = (TokenBucket(limit[0], max(limit[1], self.costs.get(name, 1)))
+                                      if limit else None)
+            return self.buckets[name]
+
+    def register_cost(self, name, cost):
+        """Note that a call to provider `name` can take `cost` tokens"""
+        with self._lock:
+            self.costs[name] = max(self.costs.get(name, 1), cost)
+            bucket = self.buckets.get(name)
+            if bucket is not None and bucket.burst < cost:
+                bucket.burst = float(cost)
+
+    def breaker(self, name):
+        with self._lock:
+            if name not in self.breakers:
+                self.breakers[name] = CircuitBreaker(self.failure_threshold, self.cooldown)
+            return self.breakers[name]
+
+    def share(self, processes):
+        """Split the rate limits evenly across `processes` worker processes.
+
+        The burst is split too, but never below the provider's largest call
+        cost (see bucket()), or those calls could never get their tokens.
+        """
+        with self._lock:
+            self.rate_limits = {name: (limit[0] / processes, max(1, limit[1] // processes)) if limit else None
+                                for name, limit in self.rate_limits.items()}
+            self.buckets.clear()
+
+    def backoff(self, attempt):
+        """Full-jitter exponential delay for retry number `attempt` (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, name, fn, *args, cost=1, **kwargs):
+        """Run `fn(*args, **kwargs)` against provider `name` under its limits"""
+        bucket = self.bucket(name)
+        breaker = self.breaker(name)
+        priority = _priority.get()
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                metrics.note('circuit_rejections_total', provider=name)
+                raise CircuitOpenError(f"{name} circuit open after repeated failures")
+            settled = False
+            try:
+                if bucket is not None:
+                    with metrics.timer('rate_limit_wait', provider=name):
+                        if not bucket.acquire(priority, self.acquire_timeout, cost):
+                            raise RateLimitError(f"{name} rate limit queue timed out")
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    kind = classify(e)
+                    if kind == 'permanent':
+                        # A bad symbol says nothing about the provider's health
+                        breaker.record_success()
+                        settled = True
+                        raise
+                    delay = self.backoff(attempt)
+                    if kind == 'rate_limit':
+                        # Throttling is handled by slowing down, unless the provider
+                        # asks us to stay away longer than we would retry for
+                        metrics.note('rate_limited_total', provider=name)
+                        retry_after = getattr(e, 'retry_after', None)
+                        if bucket is not None:
+                            bucket.throttled(retry_after)
+                        if retry_after is not None and retry_after > self.max_delay:
+                            breaker.trip()
+                            settled = True
+                            metrics.note('circuit_opened_total', provider=name)
+                            raise
+                        delay = max(delay, retry_after or 0.0)
+                    else:
+                        settled = True
+                        if breaker.record_failure():
+                            metrics.note('circuit_opened_total', provider=name)
+                    if attempt == self.max_retries:
+                        raise
+                    metrics.note('provider_retries_total', provider=name, reason=kind)
+                    if not settled:
+                        # A throttled half-open trial must not leave the breaker probing forever
+                        breaker.release()
+                        settled = True
+                    self.sleep(delay)
+                else:
+                    breaker.record_success()
+                    settled = True
+                    if bucket is not None:
+                        bucket.succeeded()
+                    return result
+            finally:
+                if not settled:
+                    breaker.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    'rate': self.buckets[name].rate if self.buckets.get(name) else None,
+                    'circuit': self.breakers[name].state if name in self.breakers else 'closed'
+                }
+                for name in set(self.buckets) | set(self.breakers)
+            }
+
+
+class GuardedProvider:
+    """A provider whose calls go through a ProviderScheduler"""
+
+    def __init__(self, provider, scheduler):
+        self.provider = provider
+        self.scheduler = scheduler
+        self.name = provider.name
+        self.supports_history = provider.supports_history
+        scheduler.register_cost(self.name, getattr(provider, 'fetch_cost', 1))
+
+    def __getattr__(self, attr):
+        return getattr(self.provider, attr)
+
+    def get_quote(self, symbol):
+        return self.scheduler.call(self.name, self.provider.get_quote, symbol)
+
+    def get_history(self, symbol, period="1y", start=None):
+        return self.scheduler.call(self.name, self.provider.get_history, symbol, period=period, start=start)
+
+    def fetch(self, symbol):
+        return self.scheduler.call(self.name, self.provider.fetch, symbol,
+                                   cost=getattr(self.provider, 'fetch_cost', 1))
+
+
+scheduler = ProviderScheduler()
+
+
+def _collect():
+    for name, state in scheduler.stats().items():
+        if state['rate'] is not None:
+            yield 'provider_rate_limit', {'provider': name}, state['rate']
+        yield 'provider_circuit_open', {'provider': name}, state['circuit'] != 'closed'
+
+
+metrics.add_collector(_collect)
+
+
+def guard(provider):
+    """Wrap a provider with the shared scheduler (idempotent)"""
+    if isinstance(provider, GuardedProvider):
+        return provider
+    return GuardedProvider(provider, scheduler)
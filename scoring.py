@@ -0,0 +1,65 @@
+import numpy as np
+
+# Recommendation rules shared by the sample dataset and the backtester.
+# Every function works element-wise on scalars, per-stock columns or whole
+# symbols x dates panels.
+#
+# Each rule scores three inputs as 5 (good), 3 (neutral) or 1 (poor); the
+# 3-15 total maps to Strong Buy / Buy / Hold / Sell through `thresholds`.
+
+RECOMMENDATIONS = ['Strong Buy', 'Buy', 'Hold', 'Sell']
+SUGGESTION_TYPES = ['technical', 'fundamental', 'both']
+
+DEFAULT_RULES = {
+    'pe_cuts': (15, 25),
+    'roe_cuts': (20, 15),
+    'growth_cuts': (15, 10),
+    'rsi_band': (30, 70),
+    'thresholds': (12, 9, 6)
+}
+
+
+def _below(values, cuts):
+    # 5 under the first cut, 3 under the second, else 1 (NaN scores 1)
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(values < cuts[0], 5, np.where(values < cuts[1], 3, 1))
+
+
+def _above(values, cuts):
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(values > cuts[0], 5, np.where(values > cuts[1], 3, 1))
+
+
+def fundamental_score(pe, roe, growth, pe_cuts=(15, 25), roe_cuts=(20, 15), growth_cuts=(15, 10)):
+    """Cheap PE, high ROE and strong revenue growth score highest"""
+    return _below(pe, pe_cuts) + _above(roe, roe_cuts) + _above(growth, growth_cuts)
+
+
+def technical_score(close, dma_50, dma_200, rsi, macd, rsi_band=(30, 70)):
+    """Trend (price vs moving averages), RSI and MACD momentum"""
+    close = np.asarray(close, dtype=np.float64)
+    dma_50 = np.asarray(dma_50, dtype=np.float64)
+    dma_200 = np.asarray(dma_200, dtype=np.float64)
+    rsi = np.asarray(rsi, dtype=np.float64)
+    trend = np.where((close > dma_50) & (dma_50 > dma_200), 5, np.where(close > dma_200, 3, 1))
+    # Oversold is a buying opportunity, overbought is not
+    momentum = np.where(rsi < rsi_band[0], 5, np.where(rsi <= rsi_band[1], 3, 1))
+    direction = np.where(np.asarray(macd, dtype=np.float64) > 0, 5, 1)
+    return trend + momentum + direction
+
+
+def combined_score(fundamental, technical):
+    """Average of the two totals, still on the 3-15 scale"""
+    return (np.asarray(fundamental) + np.asarray(technical)) / 2.0
+
+
+def recommendation_codes(score, thresholds=(12, 9, 6)):
+    """Index into RECOMMENDATIONS (0 = Strong Buy ... 3 = Sell)"""
+    score = np.asarray(score)
+    return 3 - (score >= thresholds[0]).astype(np.int8) - (score >= thresholds[1]) - (score >= thresholds[2])
+
+
+def recommend(score, thresholds=(12, 9, 6)):
+    """Recommendation labels for scores (a str for scalar input)"""
+    labels = np.asarray(RECOMMENDATIONS, dtype=object)[recommendation_codes(score, thresholds)]
+    return labels if np.ndim(labels) else str(labels)
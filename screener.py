@@ -0,0 +1,203 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+# Columnar screening index used by StockDataAnalyzer.get_stock_suggestions.
+# Categorical columns are factorized into integer codes with a row-position
+# list per code; numeric columns keep a sorted copy so range filters become
+# binary searches. Queries work on row positions and never copy the DataFrame.
+# update() patches the entries of changed rows in place of a rebuild;
+# updated() does the same on a copy that shares the unchanged columns' arrays.
+
+CATEGORICAL_COLUMNS = ['Country', 'Sector', 'Recommendation']
+NUMERIC_COLUMNS = ['Price', 'PE_Ratio', 'ROE', 'Market_Cap', 'Revenue_Growth', 'Volatility',
+                   'Dividend_Yield', 'Volume']
+
+
+class ScreenerIndex:
+    """Precomputed categorical codes and sorted numeric arrays for a dataset"""
+
+    def __init__(self, df):
+        self.size = len(df)
+        self.codes = {}
+        self.categories = {}
+        self.positions = {}
+        for column in CATEGORICAL_COLUMNS:
+            if column not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[column])
+            self.codes[column] = codes.astype(np.int32)
+            self.categories[column] = {value: code for code, value in enumerate(uniques)}
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self.positions[column] = [order[bounds[i]:bounds[i + 1]] for i in range(len(uniques))]
+
+        self.values = {}
+        self.order = {}
+        self.sorted_values = {}
+        for column in NUMERIC_COLUMNS:
+            if column not in df.columns:
+                continue
+            # A copy, so update() can patch it without writing through to the frame
+            values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64, copy=True)
+            order = np.argsort(values, kind='stable')
+            # NaNs sort last; drop them from the searchable prefix
+            valid = int(np.count_nonzero(~np.isnan(values)))
+            self.values[column] = values
+            self.order[column] = order[:valid]
+            self.sorted_values[column] = values[order[:valid]]
+        self._full_orders = {}
+
+    def category_rows(self, column, value):
+        """Row positions where a categorical column equals `value`"""
+        code = self.categories[column].get(value)
+        if code is None:
+            return np.empty(0, dtype=np.intp)
+        return self.positions[column][code]
+
+    def range_rows(self, column, low=None, high=None):
+        """Row positions where low <= column <= high (NaNs never match)"""
+        sorted_values = self.sorted_values[column]
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side='left')
+        stop = len(sorted_values) if high is None else np.searchsorted(sorted_values, high, side='right')
+        return self.order[column][start:stop]
+
+    def filter(self, categories=None, ranges=None):
+        """Return row positions matching every equality and range filter.
+
+        The most selective filter supplies the candidate rows; the others are
+        checked only against those candidates.
+        """
+        candidates = []
+        for column, value in (categories or {}).items():
+            if column in self.codes:
+                candidates.append(('category', column, value, self.category_rows(column, value)))
+        for column, (low, high) in (ranges or {}).items():
+            if column in self.values:
+                candidates.append(('range', column, (low, high), self.range_rows(column, low, high)))
+        if not candidates:
+            return np.arange(self.size)
+
+        candidates.sort(key=lambda c: len(c[3]))
+        rows = candidates[0][3]
+        for kind, column, value, _ in candidates[1:]:
+            if len(rows) == 0:
+                break
+            if kind == 'category':
+                rows = rows[self.codes[column][rows] == self.categories[column].get(value, -1)]
+            else:
+                low, high = value
+                values = self.values[column][rows]
+                keep = ~np.isnan(values)
+                if low is not None:
+                    keep &= values >= low
+                if high is not None:
+                    keep &= values <= high
+                rows = rows[keep]
+        return rows
+
+    def top_n(self, rows, sort_by, ascending, n):
+        """Return the `n` best rows by `sort_by` using a partial selection"""
+        if sort_by not in self.values:
+            return np.sort(rows)[:n]
+        values = self.values[sort_by][rows]
+        # NaNs go last either way, as in DataFrame.sort_values
+        keys = np.where(np.isnan(values), np.inf, values if ascending else -values)
+        if n < len(rows):
+            part = np.argpartition(keys, n - 1)[:n]
+        else:
+            part = np.arange(len(rows))
+        part = part[np.argsort(keys[part], kind='stable')]
+        return rows[part]
+
+    def sorted_rows(self, sort_by, ascending):
+        """Every row position ordered by `sort_by` (NaNs last), cached per direction"""
+        key = (sort_by, ascending)
+        order = self._full_orders.get(key)
+        if order is None:
+            values = self.values[sort_by]
+            # Same keys as top_n, so a page of the full order matches a top-N query
+            keys = np.where(np.isnan(values), np.inf, values if ascending else -values)
+            order = self._full_orders[key] = np.argsort(keys, kind='stable')
+        return order
+
+    def update(self, df, rows, columns):
+        """Re-index `rows` after their values in `columns` changed in `df`.
+
+        Only the changed columns are touched: a categorical column moves the
+        rows between position lists, a numeric column drops the rows from its
+        sorted arrays and inserts them at their new places (O(n) copies, no
+        re-sort). Ties keep row order, so the result matches a fresh build.
+        """
+        rows = np.unique(np.asarray(rows, dtype=np.intp))
+        for column in columns:
+            if column in self.codes:
+                self._update_category(column, df[column].iloc[rows].to_numpy(dtype=object), rows)
+            elif column in self.values:
+                values = pd.to_numeric(df[column].iloc[rows], errors='coerce').to_numpy(dtype=np.float64)
+                self._update_numeric(column, values, rows)
+
+    def updated(self, df, rows, columns):
+        """A copy re-indexed for `rows` (see update()); this index is left unchanged.
+
+        Only the arrays of the changed columns are copied; the rest are shared.
+        """
+        index = copy.copy(self)
+        for name in ('codes', 'categories', 'positions', 'values', 'order', 'sorted_values', '_full_orders'):
+            setattr(index, name, dict(getattr(self, name)))
+        for column in columns:
+            if column in self.codes:
+                index.codes[column] = self.codes[column].copy()
+                index.categories[column] = dict(self.categories[column])
+                index.positions[column] = list(self.positions[column])
+            elif column in self.values:
+                index.values[column] = self.values[column].copy()
+        index.update(df, rows, columns)
+        return index
+
+    def _update_category(self, column, values, rows):
+        codes = self.codes[column]
+        categories = self.categories[column]
+        positions = self.positions[column]
+        for value in values.tolist():
+            if value not in categories:
+                categories[value] = len(positions)
+                positions.append(np.empty(0, dtype=np.intp))
+        new_codes = np.array([categories[v] for v in values.tolist()], dtype=np.int32)
+        moved = codes[rows] != new_codes
+        for code in np.unique(np.concatenate([codes[rows[moved]], new_codes[moved]])).tolist():
+            kept = positions[code][~np.isin(positions[code], rows[moved])]
+            positions[code] = np.union1d(kept, rows[moved][new_codes[moved] == code])
+        codes[rows] = new_codes
+
+    def _locate(self, column, values, rows):
+        # Positions of (value, row) entries in the sorted arrays; ties are in row order
+        order, sorted_values = self.order[column], self.sorted_values[column]
+        at = np.searchsorted(sorted_values, values, side='left')
+        end = np.searchsorted(sorted_values, values, side='right')
+        for j in np.nonzero(end - at > 1)[0].tolist():
+            at[j] += np.searchsorted(order[at[j]:end[j]], rows[j])
+        return at, end
+
+    def _update_numeric(self, column, values, rows):
+        old = self.values[column][rows]
+        present = ~np.isnan(old)
+        at, _ = self._locate(column, old[present], rows[present])
+        order = np.delete(self.order[column], at)
+        sorted_values = np.delete(self.sorted_values[column], at)
+        self.values[column][rows] = values
+
+        valid = ~np.isnan(values)
+        add_rows, add_values = rows[valid], values[valid]
+        by_key = np.lexsort((add_rows, add_values))
+        add_rows, add_values = add_rows[by_key], add_values[by_key]
+        at = np.searchsorted(sorted_values, add_values, side='left')
+        end = np.searchsorted(sorted_values, add_values, side='right')
+        # Within a run of equal values rows stay in position order, as with a stable sort
+        for j in np.nonzero(end > at)[0].tolist():
+            at[j] += np.searchsorted(order[at[j]:end[j]], add_rows[j])
+        self.order[column] = np.insert(order, at, add_rows)
+        self.sorted_values[column] = np.insert(sorted_values, at, add_values)
+        for key in [key for key in self._full_orders if key[0] == column]:
+            del self._full_orders[key]
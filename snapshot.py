@@ -0,0 +1,133 @@
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Binary dataset snapshot: a directory with one .npy file per column plus a
+# meta.json describing the layout.
+#
+#   stock_market_data.snapshot/
+#       meta.json
+#       Price.npy                numeric columns, memory-mapped on load
+#       Sector.codes.npy         string columns as int32 codes ...
+#       Sector.categories.npy    ... plus the distinct values
+#
+# Numeric columns are opened with mmap_mode='r', so loading only touches the
+# pages that are actually read.
+#
+# The path is a symlink to a versioned directory next to it
+# (stock_market_data.snapshot.v<ns>/), so write_snapshot() swaps in a new
+# version with a single rename and readers never find the path missing.
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = '.snapshot'
+
+
+def is_snapshot(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, 'meta.json'))
+
+
+def _column_file(column):
+    # Column names become file names; keep them filesystem safe
+    return "".join(c if c.isalnum() or c in '-_' else '_' for c in column)
+
+
+def write_snapshot(df, path):
+    """Write a DataFrame as a snapshot and atomically swap it in at `path`"""
+    path = path.rstrip(os.sep)
+    version_path = f"{path}.v{time.time_ns()}"
+    os.makedirs(version_path)
+
+    columns = []
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        name = f"{i:03d}_{_column_file(str(column))}"
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_dtype(series):
+            values = series.to_numpy()
+            np.save(os.path.join(version_path, f"{name}.npy"), values)
+            columns.append({'name': column, 'file': name, 'kind': 'numeric', 'dtype': str(values.dtype)})
+        else:
+            codes, uniques = pd.factorize(series.astype(object))
+            categories = np.asarray([str(u) for u in uniques], dtype=str)
+            np.save(os.path.join(version_path, f"{name}.codes.npy"), codes.astype(np.int32))
+            np.save(os.path.join(version_path, f"{name}.categories.npy"), categories)
+            columns.append({'name': column, 'file': name, 'kind': 'string', 'categories': len(categories)})
+
+    meta = {'version': SNAPSHOT_VERSION, 'rows': len(df), 'columns': columns}
+    with open(os.path.join(version_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    _swap(version_path, path)
+
+
+def _swap(version_path, path):
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    link = path + '.link'
+    try:
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(os.path.basename(version_path), link, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        # No symlinks (e.g. Windows without the privilege): move the old
+        # directory aside and the new one in, briefly leaving `path` missing
+        link = None
+    if link is None or (os.path.isdir(path) and not os.path.islink(path)):
+        # Also the first write over a plain directory from before versioned snapshots
+        aside = path + '.old'
+        shutil.rmtree(aside, ignore_errors=True)
+        if os.path.lexists(path):
+            os.rename(path, aside)
+        os.replace(link or version_path, path)
+        shutil.rmtree(aside, ignore_errors=True)
+    else:
+        os.replace(link, path)
+    # Only versions this module wrote next to `path` are ours to delete; open memory maps stay valid
+    if previous and os.path.dirname(previous) == os.path.dirname(os.path.realpath(version_path)) \
+            and os.path.basename(previous).startswith(os.path.basename(path) + '.v'):
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def load_snapshot(path, columns=None):
+    """Load a snapshot as a DataFrame, memory-mapping the numeric columns"""
+    # Resolve the link once, so every file comes from the same version
+    path = os.path.realpath(path)
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {meta.get('version')}")
+
+    data = {}
+    for spec in meta['columns']:
+        if columns is not None and spec['name'] not in columns:
+            continue
+        base = os.path.join(path, spec['file'])
+        if spec['kind'] == 'numeric':
+            data[spec['name']] = np.load(base + '.npy', mmap_mode='r')
+        else:
+            codes = np.load(base + '.codes.npy')
+            categories = np.load(base + '.categories.npy')
+            values = categories[np.maximum(codes, 0)].astype(object) if len(categories) else \
+                np.full(len(codes), None, dtype=object)
+            values[codes < 0] = None
+            data[spec['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def convert_excel(excel_path, snapshot_path=None, sheet_name='All_Stocks'):
+    """One-shot conversion of the Excel dataset layout into a snapshot"""
+    if snapshot_path is None:
+        snapshot_path = os.path.splitext(excel_path)[0] + SNAPSHOT_SUFFIX
+    df = pd.read_excel(excel_path, sheet_name=sheet_name)
+    write_snapshot(df, snapshot_path)
+    return snapshot_path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python snapshot.py <stock_market_data.xlsx> [output.snapshot]")
+        sys.exit(1)
+    output = convert_excel(*sys.argv[1:])
+    print(f"Snapshot written to {output}")
@@ -1,89 +1,404 @@
-import gradio as gr
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
+import argparse
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
+import derived
+import metrics
+import portfolio
+from chart_cache import ChartCache
+from dataset import Dataset
+from snapshot import SNAPSHOT_SUFFIX, is_snapshot, load_snapshot
+
+# gradio and plotly are imported on first use so that importing this module
+# (or building an analyzer for a script) stays cheap
+
+# Dataset location: XTRADE_DATA_PATH, else the snapshot next to this file
+DEFAULT_DATA_PATH = os.environ.get(
+    'XTRADE_DATA_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stock_market_data' + SNAPSHOT_SUFFIX)
+)
+
+# Concurrency of the Gradio app. Requests read the analyzer's current Dataset,
+# an immutable version that reloads and update_rows() replace whole, so any
+# number of them can run at once: QUEUE_CONCURRENCY events are processed in
+# parallel and at most QUEUE_SIZE wait. Charts, the expensive part of a
+# screen, are built on a pool of CHART_WORKERS threads shared by all users.
+QUEUE_CONCURRENCY = int(os.environ.get('XTRADE_QUEUE_CONCURRENCY', 8))
+QUEUE_SIZE = int(os.environ.get('XTRADE_QUEUE_SIZE', 256))
+CHART_WORKERS = int(os.environ.get('XTRADE_CHART_WORKERS', min(4, os.cpu_count() or 1)))
+
 class StockDataAnalyzer:
-    def __init__(self, excel_file_path):
-        """Initialize with pre-loaded Excel data"""
-        self.excel_file_path = excel_file_path
-        self.load_data()
+    # Above this many points the PE/ROE scatter is binned into a density view
+    MAX_SCATTER_POINTS = 2000
+    DENSITY_BINS = 40
+    # Tables are served one page at a time and the text summary lists at most
+    # SUMMARY_ROWS stocks, so responses stay the same size for any dataset
+    PAGE_SIZE = 25
+    SUMMARY_ROWS = 20
+    
+    def __init__(self, excel_file_path=None, chart_cache_size=64, chart_workers=None):
+        """Initialize with a dataset path; the data is loaded on first access"""
+        self.excel_file_path = excel_file_path or DEFAULT_DATA_PATH
+        self._dataset = None
+        self._indicators = None
+        self._load_lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self.chart_cache = ChartCache(chart_cache_size)
+        self.chart_executor = ThreadPoolExecutor(max_workers=chart_workers or CHART_WORKERS,
+                                                 thread_name_prefix='charts')
+        self._chart_jobs = {}
+        self._chart_lock = threading.Lock()
+    
+    @property
+    def dataset(self):
+        """The current Dataset; read it once per request and query that version"""
+        if self._dataset is None:
+            with self._load_lock:
+                if self._dataset is None:
+                    self.load_data()
+        return self._dataset
+    
+    @property
+    def df(self):
+        return self.dataset.df
+    
+    @df.setter
+    def df(self, value):
+        self._indicators = None
+        self._publish(Dataset(value))
+    
+    @property
+    def screener(self):
+        return self.dataset.screener
+    
+    @property
+    def symbols(self):
+        return self.dataset.symbols
+    
+    @property
+    def indicators(self):
+        if self._indicators is None:
+            self._indicators = derived.IndicatorBank(self.stored_history)
+        return self._indicators
+    
+    def _publish(self, dataset):
+        # A single reference assignment: requests see the old or the new version, never a mix
+        previous = self._dataset
+        dataset.version = previous.version + 1 if previous is not None else 1
+        self._dataset = dataset
     
     def load_data(self):
-        """Load data from Excel file"""
-        try:
+        """Load data from a binary snapshot, falling back to the Excel file"""
+        with metrics.timer('load_data'):
+            self.df = self._load_data()
+    
+    def reload(self):
+        """Read the dataset file again and swap it in once its indexes are built.
+        
+        Requests already running finish on the previous version. A file that
+        cannot be read raises and leaves the current version in place.
+        """
+        with self._update_lock, metrics.timer('reload_data'):
+            dataset = Dataset(self._read_data()).prepare()
+            self._indicators = None
+            self._publish(dataset)
+        metrics.note('dataset_reloads_total')
+    
+    def data_path(self):
+        """The file load_data() reads: a snapshot given directly or next to the Excel file"""
+        if is_snapshot(self.excel_file_path):
+            return self.excel_file_path
+        snapshot_path = os.path.splitext(self.excel_file_path)[0] + SNAPSHOT_SUFFIX
+        return snapshot_path if is_snapshot(snapshot_path) else self.excel_file_path
+    
+    def watch(self, interval=60.0):
+        """Reload on a daemon thread whenever the dataset file changes (e.g. after refresh_job.py)"""
+        def modified():
+            try:
+                return os.stat(self.data_path()).st_mtime_ns
+            except OSError:
+                return None
+        
+        def loop():
+            seen = modified()
+            while True:
+                time.sleep(interval)
+                current = modified()
+                if current is None or current == seen:
+                    continue
+                try:
+                    self.reload()
+                    seen = current
+                except Exception as e:
+                    # Probably caught mid-write; try again on the next check
+                    print(f"Error reloading dataset: {e}")
+                    metrics.note('dataset_reload_errors_total')
+        
+        thread = threading.Thread(target=loop, name='dataset-watch', daemon=True)
+        thread.start()
+        return thread
+    
+    def _read_data(self):
+        path = self.data_path()
+        if is_snapshot(path):
+            df = load_snapshot(path)
+            print(f"Loaded {len(df)} stocks from snapshot")
+        else:
             # Load the main sheet
-            self.df = pd.read_excel(self.excel_file_path, sheet_name='All_Stocks')
-            print(f"Loaded {len(self.df)} stocks from Excel file")
+            df = pd.read_excel(path, sheet_name='All_Stocks')
+            print(f"Loaded {len(df)} stocks from Excel file")
+        return df
+    
+    def _load_data(self):
+        try:
+            return self._read_data()
         except Exception as e:
             print(f"Error loading Excel file: {e}")
             # Create fallback data if file doesn't exist
-            self.create_fallback_data()
+            return self.fallback_data()
     
     def create_fallback_data(self):
         """Create fallback data if Excel file is not available"""
+        self.df = self.fallback_data()
+    
+    def fallback_data(self):
+        """Three sample stocks, used when no dataset file can be read"""
         fallback_data = [
             {'Symbol': 'RELIANCE', 'Company': 'Reliance Industries', 'Country': 'India', 'Sector': 'Energy', 'Price': 2450.50, 'PE_Ratio': 12.5, 'ROE': 14.2, 'Revenue_Growth': 8.5, 'Recommendation': 'Buy'},
             {'Symbol': 'AAPL', 'Company': 'Apple Inc', 'Country': 'USA', 'Sector': 'Technology', 'Price': 175.25, 'PE_Ratio': 28.4, 'ROE': 147.4, 'Revenue_Growth': 2.8, 'Recommendation': 'Hold'},
             {'Symbol': 'CBA', 'Company': 'Commonwealth Bank', 'Country': 'Australia', 'Sector': 'Banking', 'Price': 108.50, 'PE_Ratio': 18.2, 'ROE': 11.5, 'Revenue_Growth': 5.8, 'Recommendation': 'Buy'}
         ]
-        self.df = pd.DataFrame(fallback_data)
+        return pd.DataFrame(fallback_data)
     
-    def get_stock_suggestions(self, country, sector, min_pe, max_pe, min_roe, recommendation, sort_by, num_results):
-        """Get filtered stock suggestions based on criteria"""
+    def update_rows(self, changes):
+        """Apply new values for some stocks and recompute only what depends on them.
         
-        # Start with all data
-        filtered_df = self.df.copy()
+        `changes` is a DataFrame or a list of dicts with a 'Symbol' (bare or
+        'EXCHANGE:SYMBOL') and new values for any other columns. The derived
+        columns of those rows are recomputed (see derived.py) unless a change
+        sets them, and the screener index entries of every changed column are
+        patched instead of rebuilt. The result is published as a new Dataset
+        version; requests running meanwhile keep reading the previous one.
+        Returns the updated row positions; unknown symbols are skipped.
+        """
+        if not isinstance(changes, pd.DataFrame):
+            changes = pd.DataFrame(list(changes))
+        if changes.empty or 'Symbol' not in changes.columns:
+            return np.empty(0, dtype=np.intp)
         
-        # Apply filters
-        if country != "All":
-            filtered_df = filtered_df[filtered_df['Country'] == country]
+        with self._update_lock, metrics.timer('update_rows'):
+            data = self.dataset
+            df = data.df
+            positions = [data.symbols.position(str(symbol)) for symbol in changes['Symbol'].tolist()]
+            known = np.array([p is not None for p in positions], dtype=bool)
+            if not known.all():
+                metrics.note('dataset_update_unknown_total', int((~known).sum()))
+            if not known.any():
+                return np.empty(0, dtype=np.intp)
+            columns = [c for c in changes.columns if c in df.columns and c not in derived.KEY_COLUMNS]
+            # Several changes to one stock merge; the last value of each column wins
+            given = changes[known][columns].groupby(np.array([p for p in positions if p is not None]), sort=True).last()
+            rows = given.index.to_numpy(dtype=np.intp)
+            explicit = given.notna()
+            
+            previous = df.iloc[rows].set_axis(rows)
+            current = previous.copy()
+            for column in columns:
+                current[column] = given[column].where(explicit[column], current[column])
+            changed = {column for column in columns if explicit[column].any()}
+            
+            for rule in derived.plan(changed, df.columns):
+                for column, values in rule.compute(current, previous, self.indicators).items():
+                    if column in rule.outputs and column in df.columns:
+                        keep = explicit[column].to_numpy() if column in explicit else np.zeros(len(rows), dtype=bool)
+                        values = np.asarray(values)
+                        kept = (pd.to_numeric(current[column], errors='coerce').to_numpy(dtype=np.float64)
+                                if values.dtype.kind in 'fiu' else current[column].to_numpy(dtype=object))
+                        current[column] = np.where(keep, kept, values)
+                        changed.add(column)
+            if 'Last_Updated' in df.columns and 'Last_Updated' not in changed:
+                current['Last_Updated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                changed.add('Last_Updated')
+            
+            # A shallow copy is copy-on-write: only the columns written below are copied
+            df = df.copy(deep=False)
+            for column in changed:
+                self._assign(df, column, rows, current[column].to_numpy())
+            self._publish(data.updated(df, rows, changed))
+            metrics.note('dataset_updated_rows_total', len(rows))
+            return rows
+    
+    @staticmethod
+    def _assign(df, column, rows, values):
+        position = df.columns.get_loc(column)
+        dtype = df.dtypes.iloc[position]
+        if pd.api.types.is_integer_dtype(dtype):
+            numbers = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+            # Integer columns stay integer unless a value is missing
+            values = np.round(numbers).astype(dtype) if np.isfinite(numbers).all() else numbers
+        elif pd.api.types.is_float_dtype(dtype):
+            values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+        df.iloc[rows, position] = values
+    
+    def get_country_view(self, country):
+        """Rows for one country, computed from the index instead of a stored sheet"""
+        data = self.dataset
+        return data.df.iloc[data.screener.category_rows('Country', country)]
+    
+    def get_sector_view(self, sector):
+        """Rows for one sector, computed from the index instead of a stored sheet"""
+        data = self.dataset
+        return data.df.iloc[data.screener.category_rows('Sector', sector)]
+    
+    def screen(self, country, sector, min_pe, max_pe, min_roe, recommendation, sort_by, num_results):
+        """Return the rows matching the screener criteria (no text or charts)"""
+        data = self.dataset
+        rows = self.screen_rows(country, sector, min_pe, max_pe, min_roe, recommendation, sort_by, num_results,
+                                data=data)
+        return data.df.iloc[rows]
+    
+    def screen_rows(self, country, sector, min_pe, max_pe, min_roe, recommendation, sort_by, num_results,
+                    data=None):
+        """Row positions of the top `num_results` matches, in result order.
         
+        Pass the `data` version a request already read so that its later
+        steps (pages, charts) index the same rows.
+        """
+        with metrics.timer('screen'):
+            return self._screen(data or self.dataset, country, sector, min_pe, max_pe, min_roe, recommendation,
+                                sort_by, num_results)
+    
+    def _screen(self, data, country, sector, min_pe, max_pe, min_roe, recommendation, sort_by, num_results):
+        # Resolve the filters against the prebuilt index instead of copying the frame
+        categories = {}
+        if country != "All":
+            categories['Country'] = country
         if sector != "All":
-            filtered_df = filtered_df[filtered_df['Sector'] == sector]
-        
+            categories['Sector'] = sector
         if recommendation != "All":
-            filtered_df = filtered_df[filtered_df['Recommendation'] == recommendation]
+            categories['Recommendation'] = recommendation
         
         # Apply numeric filters
-        if 'PE_Ratio' in filtered_df.columns:
-            filtered_df = filtered_df[
-                (filtered_df['PE_Ratio'] >= min_pe) & 
-                (filtered_df['PE_Ratio'] <= max_pe)
-            ]
+        ranges = {'PE_Ratio': (min_pe, max_pe), 'ROE': (min_roe, None)}
+        screener = data.screener
+        rows = screener.filter(categories, ranges)
         
-        if 'ROE' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['ROE'] >= min_roe]
-        
-        # Sort results
-        if sort_by and sort_by in filtered_df.columns:
+        # Sort results and limit to the top N
+        if sort_by and sort_by in data.df.columns:
             ascending = sort_by in ['PE_Ratio', 'Volatility']  # Lower is better for these
-            filtered_df = filtered_df.sort_values(by=sort_by, ascending=ascending)
-        
-        # Limit results
-        filtered_df = filtered_df.head(num_results)
-        
-        if filtered_df.empty:
-            return "No stocks found matching your criteria.", None, None, None
+            if sort_by in screener.values:
+                return screener.top_n(rows, sort_by, ascending, num_results)
+            rows = np.sort(rows)
+            order = data.df[sort_by].iloc[rows].reset_index(drop=True).sort_values(ascending=ascending, kind='stable')
+            return rows[order.index.to_numpy()[:num_results]]
+        return np.sort(rows)[:num_results]
+    
+    def sorted_rows(self, sort_by=None, ascending=True, data=None):
+        """Every row position ordered by a column (dataset order without one)"""
+        return (data or self.dataset).sorted_rows(sort_by, ascending)
+    
+    def page(self, rows, page=1, page_size=None, data=None):
+        """Return (rows on `page` as a DataFrame, clamped page number, caption)"""
+        df = (data or self.dataset).df
+        # Rows kept by a client from before a reload may point past a shorter dataset
+        rows = np.asarray(rows, dtype=np.intp)
+        rows = rows[rows < len(df)]
+        page_size = page_size or self.PAGE_SIZE
+        pages = max(1, -(-len(rows) // page_size))
+        page = min(max(1, int(page or 1)), pages)
+        start = (page - 1) * page_size
+        caption = f"Page {page} of {pages} · {len(rows):,} stocks"
+        return df.iloc[rows[start:start + page_size]], page, caption
+    
+    def summarize(self, df, total=None):
+        """Markdown list of the first SUMMARY_ROWS stocks of a result set"""
+        total = len(df) if total is None else total
+        head = df.head(self.SUMMARY_ROWS)
         
-        # Create summary text
-        summary = f"Found {len(filtered_df)} stocks matching your criteria:\n\n"
-        for _, row in filtered_df.iterrows():
-            summary += f"🏢 **{row['Symbol']}** ({row['Company']})\n"
-            summary += f"   💰 Price: ${row['Price']:.2f} | 📊 PE: {row.get('PE_Ratio', 'N/A'):.1f} | 📈 ROE: {row.get('ROE', 'N/A'):.1f}%\n"
-            summary += f"   🎯 Recommendation: {row.get('Recommendation', 'N/A')} | 🏭 Sector: {row['Sector']}\n\n"
+        def text(column, spec=None):
+            # Whole-column formatting into object arrays instead of one f-string per row
+            if column not in head.columns:
+                return np.full(len(head), 'N/A', dtype=object)
+            if spec is None:
+                values = head[column].to_numpy(dtype=object)
+                return np.where(pd.isna(values), 'N/A', values.astype(str)).astype(object)
+            values = pd.to_numeric(head[column], errors='coerce').to_numpy(dtype=np.float64)
+            return np.where(np.isnan(values), 'N/A', np.char.mod(spec, values)).astype(object)
         
-        # Create visualizations
-        price_chart = self.create_price_chart(filtered_df)
-        pe_roe_chart = self.create_pe_roe_scatter(filtered_df)
-        sector_chart = self.create_sector_distribution(filtered_df)
+        lines = ("🏢 **" + text('Symbol') + "** (" + text('Company') + ")\n"
+                 + "   💰 Price: $" + text('Price', '%.2f') + " | 📊 PE: " + text('PE_Ratio', '%.1f')
+                 + " | 📈 ROE: " + text('ROE', '%.1f') + "%\n"
+                 + "   🎯 Recommendation: " + text('Recommendation') + " | 🏭 Sector: " + text('Sector') + "\n\n")
+        summary = f"Found {total} stocks matching your criteria:\n\n" + "".join(lines)
+        if total > len(head):
+            summary += f"…and {total - len(head):,} more in the table below.\n"
+        return summary
+    
+    def get_stock_suggestions(self, country, sector, min_pe, max_pe, min_roe, recommendation, sort_by, num_results):
+        """Get filtered stock suggestions based on criteria"""
+        data = self.dataset
+        rows = self.screen_rows(country, sector, min_pe, max_pe, min_roe, recommendation, sort_by, num_results,
+                                data=data)
+        return self.suggestions_for(rows, data)
+    
+    def suggestions_for(self, rows, data=None):
+        """Summary, first table page and charts for screened row positions"""
+        if len(rows) == 0:
+            return "No stocks found matching your criteria.", None, None, None, None
+        data = data or self.dataset
+        # The charts build on the chart pool while the summary is written here
+        charts = self.charts_for(rows, data)
+        return self.summary_for(rows, data) + charts.result()
+    
+    def summary_for(self, rows, data=None):
+        """(summary markdown, first table page) for screened row positions"""
+        filtered_df = (data or self.dataset).df.iloc[rows]
+        with metrics.timer('summary'):
+            summary = self.summarize(filtered_df)
+        return summary, filtered_df.head(self.PAGE_SIZE)
+    
+    def charts_for(self, rows, data=None):
+        """Future of the (price, PE/ROE, sector) figures for screened row positions.
         
-        return summary, filtered_df, price_chart, pe_roe_chart, sector_chart
+        Figures are built on the bounded chart pool, so a burst of screens
+        cannot run more than `chart_workers` builds at once, and concurrent
+        requests for the same result set share one build.
+        """
+        data = data or self.dataset
+        # Identical result sets reuse the figures built for them last time; the
+        # rows of one dataset version identify the result set
+        with metrics.timer('chart_fingerprint'):
+            digest = hashlib.blake2b(np.ascontiguousarray(rows, dtype=np.int64).tobytes(), digest_size=16)
+            fingerprint = f"{data.version}-{digest.hexdigest()}"
+        with self._chart_lock:
+            future = self._chart_jobs.get(fingerprint)
+            if future is None:
+                future = self.chart_executor.submit(metrics.run_in_context(self._build_charts),
+                                                    data.df.iloc[rows], fingerprint)
+                self._chart_jobs[fingerprint] = future
+            else:
+                metrics.note('chart_jobs_shared_total')
+        # Outside the lock: the callback runs at once if the build already finished
+        future.add_done_callback(lambda done: self._chart_jobs.pop(fingerprint, None)
+                                 if self._chart_jobs.get(fingerprint) is done else None)
+        return future
+    
+    def _build_charts(self, filtered_df, fingerprint):
+        price_chart = self.chart_cache.get('price', filtered_df, self.create_price_chart, fingerprint)
+        pe_roe_chart = self.chart_cache.get('pe_roe', filtered_df, self.create_pe_roe_scatter, fingerprint)
+        sector_chart = self.chart_cache.get('sector', filtered_df, self.create_sector_distribution, fingerprint)
+        return price_chart, pe_roe_chart, sector_chart
     
     def create_price_chart(self, df):
         """Create price comparison chart"""
+        import plotly.express as px
         if df.empty or 'Price' not in df.columns:
             return None
         
@@ -106,9 +421,13 @@ class StockDataAnalyzer:
     
     def create_pe_roe_scatter(self, df):
         """Create PE vs ROE scatter plot"""
+        import plotly.express as px
         if df.empty or 'PE_Ratio' not in df.columns or 'ROE' not in df.columns:
             return None
         
+        if len(df) > self.MAX_SCATTER_POINTS:
+            return self.create_pe_roe_density(df)
+        
         fig = px.scatter(
             df,
             x='PE_Ratio',
@@ -123,8 +442,33 @@ class StockDataAnalyzer:
         fig.update_layout(height=400)
         return fig
     
+    def create_pe_roe_density(self, df):
+        """Create a binned PE vs ROE heatmap so figure size does not grow with the rows"""
+        import plotly.graph_objects as go
+        pe = pd.to_numeric(df['PE_Ratio'], errors='coerce').to_numpy(dtype=float)
+        roe = pd.to_numeric(df['ROE'], errors='coerce').to_numpy(dtype=float)
+        valid = np.isfinite(pe) & np.isfinite(roe)
+        counts, pe_edges, roe_edges = np.histogram2d(pe[valid], roe[valid], bins=self.DENSITY_BINS)
+        
+        fig = go.Figure(go.Heatmap(
+            z=counts.T,
+            x=(pe_edges[:-1] + pe_edges[1:]) / 2,
+            y=(roe_edges[:-1] + roe_edges[1:]) / 2,
+            colorscale='Viridis',
+            colorbar={'title': 'Stocks'},
+            hovertemplate='P/E %{x:.1f}<br>ROE %{y:.1f}%<br>%{z} stocks<extra></extra>'
+        ))
+        fig.update_layout(
+            title=f'PE Ratio vs ROE Density ({int(valid.sum()):,} stocks)',
+            xaxis_title='P/E Ratio',
+            yaxis_title='Return on Equity (%)',
+            height=400
+        )
+        return fig
+    
     def create_sector_distribution(self, df):
         """Create sector distribution chart"""
+        import plotly.express as px
         if df.empty:
             return None
         
@@ -137,12 +481,29 @@ class StockDataAnalyzer:
         fig.update_layout(height=400)
         return fig
     
+    def search_symbols(self, query, limit=20):
+        """Typeahead matches for a symbol or company prefix as (label, key) pairs"""
+        return self.symbols.choices(query or "", limit)
+    
+    def get_stock_record(self, symbol):
+        """Return one stock's row as a dict, or None if the symbol is unknown.
+        
+        `symbol` is a bare symbol or an 'EXCHANGE:SYMBOL' key.
+        """
+        data = self.dataset
+        position = data.symbols.position(symbol) if symbol else None
+        if position is None:
+            return None
+        return data.df.iloc[position].to_dict()
+    
     def get_stock_details(self, symbol):
         """Get detailed information for a specific stock"""
-        if symbol not in self.df['Symbol'].values:
+        data = self.dataset
+        position = data.symbols.position(symbol) if symbol else None
+        if position is None:
             return "Stock not found in database."
         
-        stock = self.df[self.df['Symbol'] == symbol].iloc[0]
+        stock = data.df.iloc[position]
         
         details = f"""
 ## 📈 {stock['Symbol']} - {stock['Company']}
@@ -173,163 +534,417 @@ class StockDataAnalyzer:
 - **EPS:** ${stock.get('EPS', 'N/A')}
 """
         return details
+    
+    def price_history(self, rows, days=252, data=None):
+        """(closes, simulated) for row positions: a rows x (days + 1) close matrix.
+        
+        Stored daily bars (the history store the fetchers fill) are used for
+        symbols that have enough of them; the rest get a simulated path ending
+        at their current price, flagged in `simulated`. Simulated paths are
+        seeded by the rows, so the same basket always gets the same history.
+        """
+        import zlib
+        from create_sample_data import create_price_history
+        
+        data = data or self.dataset
+        rows = np.asarray(rows, dtype=np.intp)
+        closes = np.empty((len(rows), days + 1))
+        stored, found = self.stored_history(rows, days, data)
+        closes[found] = stored
+        simulated = ~found
+        if simulated.any():
+            prices = pd.to_numeric(data.df['Price'].iloc[rows[simulated]], errors='coerce').fillna(100.0).to_numpy()
+            seed = zlib.crc32(rows.tobytes())
+            closes[simulated] = create_price_history(prices, days + 1, seed=seed)
+        return closes, simulated
+    
+    def stored_history(self, rows, days=252, data=None):
+        """(closes, found): the (days + 1)-bar close matrix of the rows that have stored daily bars"""
+        from main import get_history_store
+        
+        data = data or self.dataset
+        rows = np.asarray(rows, dtype=np.intp)
+        store = get_history_store()
+        stored = {}
+        with metrics.timer('portfolio_history'):
+            for i in rows.tolist():
+                exchange, symbol = data.symbols.exchanges[i], data.symbols.symbols[i]
+                if os.path.exists(store.path(exchange, symbol)):
+                    close = store.load(exchange, symbol)['Close']
+                    if len(close) > days:
+                        stored[i] = close
+        if not stored:
+            return np.empty((0, days + 1)), np.zeros(len(rows), dtype=bool)
+        # Exchanges have different holidays: align on every date, carry closes forward
+        aligned = pd.concat(stored, axis=1).sort_index().ffill().iloc[-(days + 1):].dropna(axis=1)
+        found = np.isin(rows, aligned.columns.to_numpy())
+        return aligned[rows[found].tolist()].to_numpy().T, found
+    
+    def portfolio_for(self, rows, method='risk_parity', confidence=0.95, shrink=True, max_weight=None):
+        """Summary, holdings table and correlation heatmap for a basket of screened rows"""
+        data = self.dataset
+        rows = np.asarray(rows, dtype=np.intp)
+        rows = rows[rows < len(data.df)]
+        if len(rows) < 2:
+            return "Screen at least two stocks in the 🔍 Stock Screener tab first.", None, None
+        closes, simulated = self.price_history(rows, data=data)
+        with metrics.timer('portfolio', method=method):
+            report = portfolio.analyze(closes, method, confidence, shrink, max_weight=max_weight)
+        stats = report['stats']
+        weights = report['weights']
+        
+        source = (f"{int(simulated.sum()):,} of {len(rows):,} price histories are simulated (no stored bars)"
+                  if simulated.any() else "All price histories come from stored daily bars")
+        summary = (
+            f"### 💼 {portfolio.METHODS[method]} portfolio of {stats['Assets']:,} stocks\n\n"
+            f"- **Expected return:** {stats['Expected_Return']:.1f}% a year · "
+            f"**Volatility:** {stats['Volatility']:.1f}% a year\n"
+            f"- **1-day VaR ({confidence:.0%}):** {stats['Historical_VaR']:.2f}% historical, "
+            f"{stats['Parametric_VaR']:.2f}% parametric\n"
+            f"- **1-day CVaR ({confidence:.0%}):** {stats['Historical_CVaR']:.2f}% historical, "
+            f"{stats['Parametric_CVaR']:.2f}% parametric\n"
+            f"- **Effective positions:** {stats['Effective_Assets']:.1f} · "
+            f"**Ledoit-Wolf shrinkage:** {stats['Shrinkage']:.2f} over {stats['Observations']} daily returns\n\n"
+            f"_{source}._\n"
+        )
+        
+        order = np.argsort(-weights, kind='stable')
+        held = order[weights[order] > 1e-6][:self.PAGE_SIZE * 4]
+        table = data.df.iloc[rows[held]][['Symbol', 'Company', 'Country', 'Sector']].copy()
+        table['Weight_%'] = (weights[held] * 100).round(2)
+        table['Risk_%'] = (report['risk_contributions'][held] * 100).round(2)
+        table['Volatility_%'] = (np.sqrt(np.diag(report['covariance'])[held] * 252) * 100).round(1)
+        return summary, table, self.create_correlation_heatmap(table['Symbol'].tolist(),
+                                                               report['correlation'][np.ix_(held, held)])
+    
+    def create_correlation_heatmap(self, symbols, corr, limit=40):
+        """Correlation heatmap of the largest holdings"""
+        import plotly.graph_objects as go
+        if len(symbols) < 2:
+            return None
+        symbols, corr = symbols[:limit], corr[:limit, :limit]
+        fig = go.Figure(go.Heatmap(
+            z=corr,
+            x=symbols,
+            y=symbols,
+            zmin=-1,
+            zmax=1,
+            colorscale='RdBu',
+            reversescale=True,
+            colorbar={'title': 'ρ'},
+            hovertemplate='%{y} / %{x}<br>ρ = %{z:.2f}<extra></extra>'
+        ))
+        fig.update_layout(title=f'Return Correlations (top {len(symbols)} holdings)', height=500,
+                          yaxis={'autorange': 'reversed'})
+        return fig
 
-# Initialize the analyzer
-analyzer = StockDataAnalyzer('/Users/anandvardhan/xTrade/stock_market_data.xlsx')
+def create_app(data_path=None, concurrency=None, max_queue=None, chart_workers=None, analyzer=None):
+    """Build the Gradio interface around an analyzer for `data_path`.
+    
+    `concurrency` events run at once (QUEUE_CONCURRENCY by default) and at
+    most `max_queue` wait (QUEUE_SIZE); `chart_workers` threads build charts.
+    """
+    import gradio as gr
+    
+    from main import suggestion_engine
 
-# Create Gradio interface
-with gr.Blocks(title="📊 Stock Market Analyzer", theme=gr.themes.Soft()) as app:
-    gr.Markdown(
-        """
-        # 📊 Stock Market Analyzer
-        ## Advanced Stock Analysis with Pre-loaded Market Data
+    # Initialize the analyzer; suggestions rank this dataset too
+    analyzer = analyzer or StockDataAnalyzer(data_path, chart_workers=chart_workers)
+    suggestion_engine.use_analyzer(analyzer)
+    
+    # Create Gradio interface
+    with gr.Blocks(title="📊 Stock Market Analyzer", theme=gr.themes.Soft()) as app:
+        gr.Markdown(
+            """
+            # 📊 Stock Market Analyzer
+            ## Advanced Stock Analysis with Pre-loaded Market Data
         
-        Analyze 30+ stocks from India, USA, and Australia with comprehensive financial metrics!
-        """
-    )
+            Analyze 30+ stocks from India, USA, and Australia with comprehensive financial metrics!
+            """
+        )
     
-    with gr.Tabs():
-        # Tab 1: Stock Screener
-        with gr.Tab("🔍 Stock Screener"):
-            with gr.Row():
-                with gr.Column(scale=1):
-                    gr.Markdown("### 🎛️ Filter Criteria")
+        with gr.Tabs():
+            # Tab 1: Stock Screener
+            with gr.Tab("🔍 Stock Screener"):
+                with gr.Row():
+                    with gr.Column(scale=1):
+                        gr.Markdown("### 🎛️ Filter Criteria")
                     
-                    country_filter = gr.Dropdown(
-                        choices=["All"] + sorted(analyzer.df['Country'].unique().tolist()),
-                        label="🌍 Country",
-                        value="All"
-                    )
+                        country_filter = gr.Dropdown(
+                            choices=["All"] + sorted(analyzer.df['Country'].unique().tolist()),
+                            label="🌍 Country",
+                            value="All"
+                        )
                     
-                    sector_filter = gr.Dropdown(
-                        choices=["All"] + sorted(analyzer.df['Sector'].unique().tolist()),
-                        label="🏭 Sector",
-                        value="All"
-                    )
+                        sector_filter = gr.Dropdown(
+                            choices=["All"] + sorted(analyzer.df['Sector'].unique().tolist()),
+                            label="🏭 Sector",
+                            value="All"
+                        )
                     
-                    recommendation_filter = gr.Dropdown(
-                        choices=["All", "Strong Buy", "Buy", "Hold", "Sell"],
-                        label="🎯 Recommendation",
-                        value="All"
-                    )
+                        recommendation_filter = gr.Dropdown(
+                            choices=["All", "Strong Buy", "Buy", "Hold", "Sell"],
+                            label="🎯 Recommendation",
+                            value="All"
+                        )
                     
-                    min_pe = gr.Slider(
-                        minimum=0,
-                        maximum=100,
-                        value=0,
-                        label="📊 Min P/E Ratio"
-                    )
+                        min_pe = gr.Slider(
+                            minimum=0,
+                            maximum=100,
+                            value=0,
+                            label="📊 Min P/E Ratio"
+                        )
                     
-                    max_pe = gr.Slider(
-                        minimum=0,
-                        maximum=100,
-                        value=50,
-                        label="📊 Max P/E Ratio"
-                    )
+                        max_pe = gr.Slider(
+                            minimum=0,
+                            maximum=100,
+                            value=50,
+                            label="📊 Max P/E Ratio"
+                        )
                     
-                    min_roe = gr.Slider(
-                        minimum=0,
-                        maximum=50,
-                        value=10,
-                        label="📈 Minimum ROE (%)"
-                    )
+                        min_roe = gr.Slider(
+                            minimum=0,
+                            maximum=50,
+                            value=10,
+                            label="📈 Minimum ROE (%)"
+                        )
                     
-                    sort_by = gr.Dropdown(
-                        choices=["Price", "PE_Ratio", "ROE", "Market_Cap", "Revenue_Growth"],
-                        label="📋 Sort By",
-                        value="Market_Cap"
-                    )
+                        sort_by = gr.Dropdown(
+                            choices=["Price", "PE_Ratio", "ROE", "Market_Cap", "Revenue_Growth"],
+                            label="📋 Sort By",
+                            value="Market_Cap"
+                        )
                     
-                    num_results = gr.Slider(
-                        minimum=1,
-                        maximum=30,
-                        value=10,
-                        step=1,
-                        label="🔢 Number of Results"
-                    )
+                        num_results = gr.Slider(
+                            minimum=1,
+                            maximum=1000,
+                            value=10,
+                            step=1,
+                            label="🔢 Number of Results"
+                        )
                     
-                    search_btn = gr.Button("🔍 Search Stocks", variant="primary", size="lg")
+                        search_btn = gr.Button("🔍 Search Stocks", variant="primary", size="lg")
                 
-                with gr.Column(scale=2):
-                    result_summary = gr.Markdown(label="📋 Search Results")
-                    result_table = gr.Dataframe(label="📊 Detailed Data")
+                    with gr.Column(scale=2):
+                        result_summary = gr.Markdown(label="📋 Search Results")
+                        result_table = gr.Dataframe(label="📊 Detailed Data")
+                        with gr.Row():
+                            result_prev = gr.Button("◀ Previous", size="sm")
+                            result_page = gr.Number(value=1, precision=0, minimum=1, label="Page")
+                            result_next = gr.Button("Next ▶", size="sm")
+                        result_caption = gr.Markdown()
+                        result_rows = gr.State(np.empty(0, dtype=np.intp))
+            
+                with gr.Row():
+                    price_chart = gr.Plot(label="💰 Price Comparison")
+                    pe_roe_chart = gr.Plot(label="📊 PE vs ROE Analysis")
             
-            with gr.Row():
-                price_chart = gr.Plot(label="💰 Price Comparison")
-                pe_roe_chart = gr.Plot(label="📊 PE vs ROE Analysis")
+                sector_dist_chart = gr.Plot(label="🥧 Sector Distribution")
             
-            sector_dist_chart = gr.Plot(label="🥧 Sector Distribution")
-        
-        # Tab 2: Stock Details
-        with gr.Tab("📈 Stock Details"):
-            with gr.Row():
-                with gr.Column(scale=1):
-                    stock_symbol = gr.Dropdown(
-                        choices=sorted(analyzer.df['Symbol'].tolist()),
-                        label="🏢 Select Stock Symbol",
-                        value=analyzer.df['Symbol'].iloc[0] if len(analyzer.df) > 0 else None
-                    )
-                    get_details_btn = gr.Button("📋 Get Details", variant="primary")
+                with gr.Accordion("🐞 Debug: request timing", open=False):
+                    profile_search = gr.Checkbox(label="Profile searches (cProfile)", value=False)
+                    search_timing = gr.Markdown()
+        
+            # Tab 2: Stock Details
+            with gr.Tab("📈 Stock Details"):
+                with gr.Row():
+                    with gr.Column(scale=1):
+                        # Typeahead over the symbol index instead of a dropdown of every listing
+                        symbol_query = gr.Textbox(label="🔎 Search Symbol or Company",
+                                                  placeholder="e.g. RELIANCE, Apple, bank")
+                        initial_symbols = analyzer.search_symbols("")
+                        stock_symbol = gr.Dropdown(
+                            choices=initial_symbols,
+                            label="🏢 Select Stock Symbol",
+                            value=initial_symbols[0][1] if initial_symbols else None,
+                            allow_custom_value=True
+                        )
+                        get_details_btn = gr.Button("📋 Get Details", variant="primary")
                 
-                with gr.Column(scale=2):
-                    stock_details = gr.Markdown(label="📈 Stock Information")
-        
-        # Tab 3: Data Overview
-        with gr.Tab("📊 Data Overview"):
-            gr.Markdown(
-                f"""
-                ### 📈 **Dataset Overview:**
-                - **Total Stocks:** {len(analyzer.df)}
-                - **Countries:** {', '.join(analyzer.df['Country'].unique())}
-                - **Sectors:** {len(analyzer.df['Sector'].unique())} sectors
-                - **Last Updated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+                    with gr.Column(scale=2):
+                        stock_details = gr.Markdown(label="📈 Stock Information")
+        
+            # Tab 3: Portfolio analytics over the screener's results
+            with gr.Tab("💼 Portfolio"):
+                with gr.Row():
+                    with gr.Column(scale=1):
+                        gr.Markdown("### ⚖️ Basket of the screened stocks")
+                        portfolio_method = gr.Dropdown(
+                            choices=[(label, method) for method, label in portfolio.METHODS.items()],
+                            value="risk_parity",
+                            label="🧮 Weighting"
+                        )
+                        portfolio_confidence = gr.Slider(minimum=0.90, maximum=0.99, value=0.95, step=0.01,
+                                                         label="🎚️ VaR confidence")
+                        portfolio_cap = gr.Slider(minimum=0, maximum=100, value=0, step=1,
+                                                  label="🔒 Max weight per stock (%, 0 = no cap)")
+                        portfolio_shrink = gr.Checkbox(value=True, label="Ledoit-Wolf covariance shrinkage")
+                        portfolio_btn = gr.Button("📐 Analyze Screened Stocks", variant="primary")
+                    
+                    with gr.Column(scale=2):
+                        portfolio_summary = gr.Markdown("Run a search in the 🔍 Stock Screener tab, then analyze "
+                                                        "the results as a portfolio.")
+                        portfolio_table = gr.Dataframe(label="📊 Holdings")
+                portfolio_chart = gr.Plot(label="🔗 Correlation Matrix")
+        
+            # Tab 4: Data Overview
+            with gr.Tab("📊 Data Overview"):
+                gr.Markdown(
+                    f"""
+                    ### 📈 **Dataset Overview:**
+                    - **Total Stocks:** {len(analyzer.df)}
+                    - **Countries:** {', '.join(analyzer.df['Country'].unique())}
+                    - **Sectors:** {len(analyzer.df['Sector'].unique())} sectors
+                    - **Last Updated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
                 
-                ### 📊 **Available Metrics:**
-                - **Fundamental:** P/E Ratio, ROE, Revenue Growth, Market Cap, EPS
-                - **Technical:** RSI, Moving Averages, MACD, Beta, Volatility  
-                - **Valuation:** Price, Dividend Yield, Book Value, Debt/Equity
-                - **Recommendations:** Strong Buy, Buy, Hold, Sell
-                """
-            )
+                    ### 📊 **Available Metrics:**
+                    - **Fundamental:** P/E Ratio, ROE, Revenue Growth, Market Cap, EPS
+                    - **Technical:** RSI, Moving Averages, MACD, Beta, Volatility  
+                    - **Valuation:** Price, Dividend Yield, Book Value, Debt/Equity
+                    - **Recommendations:** Strong Buy, Buy, Hold, Sell
+                    """
+                )
             
-            full_data = gr.Dataframe(
-                value=analyzer.df,
-                label="📊 Complete Dataset",
-                interactive=False
-            )
-    
-    # Event handlers
-    search_btn.click(
-        fn=lambda country, sector, min_pe_val, max_pe_val, min_roe, rec, sort, num: analyzer.get_stock_suggestions(
-            country, sector, min_pe_val, max_pe_val, min_roe, rec, sort, num
-        ),
-        inputs=[country_filter, sector_filter, min_pe, max_pe, min_roe, recommendation_filter, sort_by, num_results],
-        outputs=[result_summary, result_table, price_chart, pe_roe_chart, sector_dist_chart]
-    )
+                overview_columns = [c for c in ['Symbol', 'Company', 'Country', 'Sector', 'Recommendation', 'Price',
+                                                'Market_Cap', 'PE_Ratio', 'ROE', 'Revenue_Growth', 'Volatility',
+                                                'Dividend_Yield', 'Volume'] if c in analyzer.df.columns]
+                with gr.Row():
+                    overview_sort = gr.Dropdown(choices=["Dataset order"] + overview_columns, value="Dataset order",
+                                                label="📋 Sort By")
+                    overview_ascending = gr.Checkbox(value=True, label="Ascending")
+                first_page, _, first_caption = analyzer.page(analyzer.sorted_rows())
+                full_data = gr.Dataframe(
+                    value=first_page,
+                    label="📊 Complete Dataset",
+                    interactive=False
+                )
+                with gr.Row():
+                    overview_prev = gr.Button("◀ Previous", size="sm")
+                    overview_page = gr.Number(value=1, precision=0, minimum=1, label="Page")
+                    overview_next = gr.Button("Next ▶", size="sm")
+                overview_caption = gr.Markdown(first_caption)
     
-    get_details_btn.click(
-        fn=analyzer.get_stock_details,
-        inputs=[stock_symbol],
-        outputs=[stock_details]
-    )
+        # Event handlers
+        def search(country, sector, min_pe_val, max_pe_val, min_roe, rec, sort, num, profile):
+            # One dataset version for the whole request, even if a refresh swaps it meanwhile
+            data = analyzer.dataset
+            charts = None
+            with metrics.request_trace('stock screener', profile=profile or None) as trace:
+                rows = analyzer.screen_rows(country, sector, min_pe_val, max_pe_val, min_roe, rec, sort, num,
+                                            data=data)
+                if len(rows):
+                    charts = analyzer.charts_for(rows, data)
+                    summary, table = analyzer.summary_for(rows, data)
+                else:
+                    summary, table = analyzer.suggestions_for(rows, data)[:2]
+            _, _, caption = analyzer.page(rows, data=data)
+            if charts is None:
+                yield summary, table, None, None, None, trace.to_markdown(), rows, 1, caption
+            elif charts.done():
+                yield (summary, table) + charts.result() + (trace.to_markdown(), rows, 1, caption)
+            else:
+                # Text and table first; the charts follow when the chart pool has built them
+                yield summary, table, None, None, None, trace.to_markdown(), rows, 1, caption
+                figures = charts.result()
+                yield (gr.skip(), gr.skip()) + figures + (trace.to_markdown(), gr.skip(), gr.skip(), gr.skip())
+        
+        search_btn.click(
+            fn=search,
+            inputs=[country_filter, sector_filter, min_pe, max_pe, min_roe, recommendation_filter, sort_by, num_results,
+                    profile_search],
+            outputs=[result_summary, result_table, price_chart, pe_roe_chart, sector_dist_chart, search_timing,
+                     result_rows, result_page, result_caption]
+        )
+        
+        # Paging only serializes the rows on the requested page
+        def show_results_page(rows, page):
+            return analyzer.page(rows, page)
+        
+        result_outputs = [result_table, result_page, result_caption]
+        result_page.submit(show_results_page, [result_rows, result_page], result_outputs)
+        result_prev.click(lambda rows, page: show_results_page(rows, (page or 1) - 1), [result_rows, result_page],
+                          result_outputs)
+        result_next.click(lambda rows, page: show_results_page(rows, (page or 1) + 1), [result_rows, result_page],
+                          result_outputs)
+        
+        def show_overview_page(sort, ascending, page):
+            data = analyzer.dataset
+            rows = analyzer.sorted_rows(None if sort == "Dataset order" else sort, ascending, data=data)
+            return analyzer.page(rows, page, data=data)
+        
+        overview_inputs = [overview_sort, overview_ascending, overview_page]
+        overview_outputs = [full_data, overview_page, overview_caption]
+        overview_sort.change(lambda sort, ascending, page: show_overview_page(sort, ascending, 1), overview_inputs,
+                             overview_outputs)
+        overview_ascending.change(lambda sort, ascending, page: show_overview_page(sort, ascending, 1),
+                                  overview_inputs, overview_outputs)
+        overview_page.submit(show_overview_page, overview_inputs, overview_outputs)
+        overview_prev.click(lambda sort, ascending, page: show_overview_page(sort, ascending, (page or 1) - 1),
+                            overview_inputs, overview_outputs)
+        overview_next.click(lambda sort, ascending, page: show_overview_page(sort, ascending, (page or 1) + 1),
+                            overview_inputs, overview_outputs)
     
-    gr.Markdown(
-        """
-        ### 💡 **Features:**
-        - 📊 **Advanced Filtering:** Country, sector, P/E ratio, ROE, recommendations
-        - 📈 **Interactive Charts:** Price comparison, PE vs ROE scatter plots, sector distribution
-        - 🔍 **Detailed Analysis:** Complete fundamental and technical metrics for each stock
-        - 📋 **Export Ready:** All data can be downloaded as CSV
-        - 🎯 **Professional Recommendations:** Buy/Sell signals based on comprehensive analysis
-        
-        ### 🎨 **Data Source:**
-        Pre-loaded comprehensive stock market data with real-time-like metrics and professional analysis.
-        """
-    )
+        def analyze_portfolio(rows, method, confidence, cap, shrink):
+            return analyzer.portfolio_for(rows, method, confidence, shrink, cap / 100 if cap else None)
+        
+        portfolio_btn.click(
+            fn=analyze_portfolio,
+            inputs=[result_rows, portfolio_method, portfolio_confidence, portfolio_cap, portfolio_shrink],
+            outputs=[portfolio_summary, portfolio_table, portfolio_chart]
+        )
+    
+        def find_symbols(query):
+            choices = analyzer.search_symbols(query)
+            return gr.Dropdown(choices=choices, value=choices[0][1] if choices else None)
+        
+        symbol_query.input(find_symbols, inputs=[symbol_query], outputs=[stock_symbol], show_progress="hidden")
+        symbol_query.submit(analyzer.get_stock_details, inputs=[stock_symbol], outputs=[stock_details])
+        
+        get_details_btn.click(
+            fn=analyzer.get_stock_details,
+            inputs=[stock_symbol],
+            outputs=[stock_details]
+        )
+    
+        gr.Markdown(
+            """
+            ### 💡 **Features:**
+            - 📊 **Advanced Filtering:** Country, sector, P/E ratio, ROE, recommendations
+            - 📈 **Interactive Charts:** Price comparison, PE vs ROE scatter plots, sector distribution
+            - 🔍 **Detailed Analysis:** Complete fundamental and technical metrics for each stock
+            - 💼 **Portfolio Analytics:** Correlations, VaR/CVaR and risk-parity or mean-variance weights for screened stocks
+            - 📋 **Export Ready:** All data can be downloaded as CSV
+            - 🎯 **Professional Recommendations:** Buy/Sell signals based on comprehensive analysis
+        
+            ### 🎨 **Data Source:**
+            Pre-loaded comprehensive stock market data with real-time-like metrics and professional analysis.
+            """
+        )
+    
+    # Handlers only read immutable dataset versions, so events need not be serialized
+    app.queue(default_concurrency_limit=concurrency or QUEUE_CONCURRENCY, max_size=max_queue or QUEUE_SIZE)
+    return app
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Stock Market Analyzer (Gradio)")
+    parser.add_argument('data_path', nargs='?', help="dataset snapshot or Excel file (default: XTRADE_DATA_PATH)")
+    parser.add_argument('--port', type=int, default=7863)
+    parser.add_argument('--concurrency', type=int, default=QUEUE_CONCURRENCY, help="events processed at once")
+    parser.add_argument('--max-queue', type=int, default=QUEUE_SIZE, help="events allowed to wait")
+    parser.add_argument('--chart-workers', type=int, default=CHART_WORKERS, help="threads building charts")
+    parser.add_argument('--reload-interval', type=float, default=0,
+                        help="seconds between checks for a changed dataset file (0: never reload)")
+    args = parser.parse_args()
+    
+    analyzer = StockDataAnalyzer(args.data_path, chart_workers=args.chart_workers)
+    if args.reload_interval > 0:
+        analyzer.watch(args.reload_interval)
+    app = create_app(concurrency=args.concurrency, max_queue=args.max_queue, analyzer=analyzer)
     app.launch(
         server_name="0.0.0.0",
-        server_port=7863,
+        server_port=args.port,
         share=False
     )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from indicators import StreamingIndicators
+from providers import exchange_for, get_providers
+from scheduler import BULK, request_priority
+
+# Live-quote streaming for a watchlist.
+#
+# A QuoteStreamer is seeded once with each symbol's daily closes (from the
+# history store), then only polls quotes. Every tick revises today's bar in a
+# StreamingIndicators instance, so 50DMA/200DMA, RSI, MACD and volatility move
+# with the price without downloading or rescanning the history. The UIs ask
+# for `changes()` and patch just those rows into their table.
+#
+# Tick sources return (timestamp, symbol, price, volume) tuples:
+#   ProviderTickSource   polls the country's provider chain
+#   ReplayTickSource     replays a recorded CSV (timestamp,symbol,price,volume)
+#
+# Set XTRADE_TICK_FILE to stream from a replay file instead of the providers.
+# Provider polls run at bulk priority (see scheduler.py) so they queue behind
+# interactive lookups.
+
+STREAM_COLUMNS = ['Symbol', 'Price', 'Change %', 'Volume', 'RSI', 'MACD', '50DMA', '200DMA',
+                  'Volatility', 'Updated']
+TICK_FIELDS = ['timestamp', 'symbol', 'price', 'volume']
+SEED_BARS = 260
+
+
+class ProviderTickSource:
+    """Poll the latest quote of each symbol from a country's provider chain"""
+
+    def __init__(self, country, max_workers=16):
+        self.country = country
+        self.errors = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tick-poll')
+        self._pending = []
+
+    def _quote(self, symbol):
+        with request_priority(BULK):
+            return self._first_quote(symbol)
+
+    def _first_quote(self, symbol):
+        for provider in get_providers(self.country):
+            try:
+                quote = provider.get_quote(symbol)
+                if quote.get('price') is not None:
+                    return quote
+            except Exception as e:
+                self.errors[symbol] = f"{provider.name} error: {str(e)}"
+        return None
+
+    def poll(self, symbols):
+        now = pd.Timestamp.now()
+        ticks = []
+        symbols = list(symbols)
+        self._pending = [self._executor.submit(self._quote, symbol) for symbol in symbols]
+        for symbol, future in zip(symbols, self._pending):
+            quote = future.result()
+            if quote is not None:
+                ticks.append((now, symbol, float(quote['price']), quote.get('volume')))
+        self._pending = []
+        return ticks
+
+    def close(self):
+        # Drop quotes still queued from an interrupted poll
+        for future in self._pending:
+            future.cancel()
+        self._executor.shutdown(wait=False)
+
+
+class ReplayTickSource:
+    """Replay a tick file (or a TickArchive.replay() frame), one timestamp per poll"""
+
+    def __init__(self, path):
+        ticks = path if isinstance(path, pd.DataFrame) else pd.read_csv(path, parse_dates=['timestamp'])
+        ticks = ticks.sort_values('timestamp', kind='stable')
+        self._groups = [group for _, group in ticks.groupby('timestamp', sort=True)]
+        self._next = 0
+
+    @property
+    def exhausted(self):
+        return self._next >= len(self._groups)
+
+    def poll(self, symbols):
+        if self.exhausted:
+            return []
+        group = self._groups[self._next]
+        self._next += 1
+        wanted = set(symbols)
+        return [(ts, symbol, float(price), volume) for ts, symbol, price, volume in
+                group[TICK_FIELDS].itertuples(index=False) if symbol in wanted]
+
+    def close(self):
+        pass
+
+
+def tick_source_for(country):
+    """Return the replay source if XTRADE_TICK_FILE is set, else live polling"""
+    path = os.environ.get('XTRADE_TICK_FILE')
+    if path:
+        return ReplayTickSource(path)
+    return ProviderTickSource(country)
+
+
+def record_ticks(source, symbols, path, polls, interval=0.0):
+    """Write `polls` rounds of ticks from `source` to a replay file"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(TICK_FIELDS)
+        for i in range(polls):
+            for ts, symbol, price, volume in source.poll(symbols):
+                writer.writerow([pd.Timestamp(ts).isoformat(), symbol, price, volume])
+            if interval and i < polls - 1:
+                time.sleep(interval)
+    return path
+
+
+def write_synthetic_ticks(path, last_prices, polls=100, start=None, step_seconds=5,
+                          tick_ratio=0.5, seed=0):
+    """Write a random-walk tick file for `last_prices` ({symbol: price}).
+
+    Each poll moves a random `tick_ratio` share of the symbols, like a quiet
+    market where most quotes do not change between polls.
+    """
+    rng = np.random.default_rng(seed)
+    symbols = list(last_prices)
+    prices = np.array([last_prices[s] for s in symbols], dtype=np.float64)
+    volumes = rng.integers(100000, 5000000, len(symbols))
+    start = pd.Timestamp(start or pd.Timestamp.today().normalize() + pd.Timedelta(hours=10))
+
+    frames = []
+    for i in range(polls):
+        moved = np.flatnonzero(rng.random(len(symbols)) < tick_ratio)
+        prices[moved] *= np.exp(rng.normal(0, 0.002, len(moved)))
+        volumes[moved] += rng.integers(100, 10000, len(moved))
+        frames.append(pd.DataFrame({
+            'timestamp': start + pd.Timedelta(seconds=i * step_seconds),
+            'symbol': [symbols[j] for j in moved],
+            'price': prices[moved].round(4),
+            'volume': volumes[moved]
+        }))
+    pd.concat(frames, ignore_index=True)[TICK_FIELDS].to_csv(path, index=False)
+    return path
+
+
+def load_seed_history(symbols, country, bars=SEED_BARS):
+    """Return (symbols, closes, last_bar, errors) from the history store.
+
+    `closes` is a (n_symbols, bars) matrix of the latest daily closes; symbols
+    with a shorter history are padded with their first close. Symbols without
+    any history are left out and reported in `errors`.
+    """
+    from main import get_history_store
+    store = get_history_store()
+    exchange = exchange_for(country)
+    providers = [p for p in get_providers(country) if p.supports_history]
+
+    kept, rows, errors, last_bar = [], [], {}, None
+    for symbol in symbols:
+        close = None
+        for provider in providers:
+            try:
+                hist = store.get_history(exchange, symbol, provider)
+                if not hist.empty:
+                    close = hist['Close'].to_numpy(dtype=np.float64)[-bars:]
+                    last_bar = max(last_bar, hist.index[-1]) if last_bar is not None else hist.index[-1]
+                    break
+            except Exception as e:
+                errors[symbol] = f"{provider.name} error: {str(e)}"
+        if close is None:
+            errors.setdefault(symbol, "No price history")
+            continue
+        errors.pop(symbol, None)
+        if len(close) < bars:
+            close = np.concatenate([np.full(bars - len(close), close[0]), close])
+        kept.append(symbol)
+        rows.append(close)
+    closes = np.vstack(rows) if rows else np.empty((0, bars))
+    return kept, closes, last_bar, errors
+
+
+class QuoteStreamer:
+    """Incrementally updated quote and indicator table for a watchlist"""
+
+    def __init__(self, symbols, closes, source, last_bar=None):
+        self.symbols = list(symbols)
+        self.source = source
+        self.rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+        closes = np.asarray(closes, dtype=np.float64)
+        self.indicators = StreamingIndicators(closes)
+        self.prices = closes[:, -1].copy()
+        self.prev_close = closes[:, -2].copy()
+        self.volumes = np.full(len(self.symbols), np.nan)
+        self.updated = [None] * len(self.symbols)
+        self.bar_date = pd.Timestamp(last_bar).normalize() if last_bar is not None else None
+        self.polls = 0
+        self.ticks = 0
+        self.poll_seconds = 0.0
+        self._values = self.indicators.values()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def for_watchlist(cls, symbols, country, source=None, bars=SEED_BARS):
+        """Seed a streamer from the history store; returns (streamer, errors)"""
+        kept, closes, last_bar, errors = load_seed_history(symbols, country, bars)
+        if not kept:
+            raise ValueError("No symbols with price history to stream")
+        return cls(kept, closes, source or tick_source_for(country), last_bar), errors
+
+    def _open_bar(self, day):
+        # A new session starts: yesterday's last price becomes a closed bar
+        self.prev_close = self.prices.copy()
+        self.indicators.update(self.prices, new_bar=True)
+        self.bar_date = day
+
+    def apply(self, ticks):
+        """Apply (timestamp, symbol, price, volume) ticks; return changed symbols"""
+        changed = set()
+        ticks = sorted(ticks, key=lambda t: t[0])
+        with self._lock:
+            for ts, symbol, price, volume in ticks:
+                i = self.rows.get(symbol)
+                if i is None or price is None or not np.isfinite(price):
+                    continue
+                day = pd.Timestamp(ts).normalize()
+                if self.bar_date is None:
+                    self.bar_date = day
+                elif day > self.bar_date:
+                    # Revise the finished session before moving on
+                    self._values = self.indicators.update(self.prices, new_bar=False)
+                    self._open_bar(day)
+                    changed.update(self.symbols)
+                if price != self.prices[i] or (volume is not None and volume != self.volumes[i]):
+                    changed.add(symbol)
+                self.prices[i] = price
+                if volume is not None:
+                    self.volumes[i] = volume
+                self.updated[i] = ts
+                self.ticks += 1
+            if changed:
+                # One vectorized revision of today's bar covers every tick in the batch
+                self._values = self.indicators.update(self.prices, new_bar=False)
+                self._pending |= changed
+        return changed
+
+    def step(self):
+        """Poll the source once and return the changed symbols"""
+        start = time.perf_counter()
+        changed = self.apply(self.source.poll(self.symbols))
+        self.polls += 1
+        self.poll_seconds = time.perf_counter() - start
+        return changed
+
+    def row(self, symbol):
+        i = self.rows[symbol]
+        v = self._values
+        change = (self.prices[i] / self.prev_close[i] - 1.0) * 100.0
+        volume = self.volumes[i]
+        return {
+            'Symbol': symbol,
+            'Price': round(float(self.prices[i]), 2),
+            'Change %': round(float(change), 2),
+            'Volume': None if np.isnan(volume) else int(volume),
+            'RSI': round(float(v['RSI'][i]), 1),
+            'MACD': round(float(v['MACD'][i]), 2),
+            '50DMA': round(float(v['50DMA'][i]), 2),
+            '200DMA': round(float(v['200DMA'][i]), 2),
+            'Volatility': round(float(v['Volatility'][i]), 1),
+            'Updated': None if self.updated[i] is None else pd.Timestamp(self.updated[i]).strftime('%H:%M:%S')
+        }
+
+    def changes(self):
+        """Return rows changed since the last call (and forget them)"""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            return [self.row(symbol) for symbol in self.symbols if symbol in pending]
+
+    def frame(self):
+        """Return the whole watchlist as a DataFrame"""
+        with self._lock:
+            self._pending.clear()
+            return pd.DataFrame([self.row(symbol) for symbol in self.symbols], columns=STREAM_COLUMNS)
+
+    def start(self, interval=5.0):
+        """Poll in a background thread every `interval` seconds"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.step()
+                except Exception as e:
+                    print(f"Quote stream poll failed: {e}")
+                self._stop.wait(max(0.0, interval - self.poll_seconds))
+
+        self._thread = threading.Thread(target=run, name='quote-stream', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.source.close()
+
+
+def patch_frame(df, rows):
+    """Write changed rows into a watchlist table (matched by Symbol)"""
+    if not rows:
+        return df
+    changes = pd.DataFrame(rows, columns=STREAM_COLUMNS).set_index('Symbol')
+    df = df.set_index('Symbol')
+    present = changes.index.intersection(df.index)
+    df.loc[present, STREAM_COLUMNS[1:]] = changes.loc[present, STREAM_COLUMNS[1:]]
+    missing = changes.index.difference(df.index)
+    if len(missing):
+        df = pd.concat([df, changes.loc[missing]])
+    return df.reset_index()
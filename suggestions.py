@@ -0,0 +1,304 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import metrics
+
+# Stock suggestions behind main.get_copilot_suggested_stocks.
+#
+#   engine.suggest("Top 5 stocks for India based on technical indicators", "India")
+#
+# Prompts are normalized to (country, type, count), so reworded or repeated
+# prompts share one cache entry, and an entry fetched for a larger count also
+# answers smaller ones. Identical requests that arrive while a completion is
+# in flight wait for it instead of sending their own.
+#
+# The model is any OpenAI-compatible chat endpoint (OPENAI_API_KEY, or
+# XTRADE_LLM_BASE_URL for a local server such as
+# benchmarks/stub_llm_server.py). It gets `model_timeout` seconds; if it is
+# not configured, fails or is slower than that, the local dataset is ranked
+# with the scoring rules instead. A late completion still lands in the cache,
+# and ranked answers expire after `fallback_ttl` so the model is asked again.
+
+SUGGESTION_TYPES = ('technical', 'fundamental', 'both')
+DEFAULT_COUNT = 10
+MAX_COUNT = 50
+
+# Last resort when neither the model nor the local dataset knows the country
+SAMPLE_STOCKS = {
+    'India': ['RELIANCE', 'TCS', 'INFY', 'HDFCBANK', 'ICICIBANK', 'SBIN', 'BHARTIARTL', 'HINDUNILVR', 'KOTAKBANK', 'LT'],
+    'USA': ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META', 'TSLA', 'NVDA', 'JPM', 'V', 'UNH'],
+    'Australia': ['CBA', 'BHP', 'WBC', 'NAB', 'ANZ', 'WES', 'MQG', 'CSL', 'FMG', 'WOW']
+}
+
+SYSTEM_PROMPT = (
+    "You are a stock screening assistant. Reply with a JSON array of ticker symbols "
+    "as listed on the country's main exchange, best first, and nothing else."
+)
+
+_COUNT = re.compile(r'\b(\d{1,4})\b')
+_SYMBOL = re.compile(r'^[A-Z0-9][A-Z0-9&.\-]{0,19}$')
+
+
+def normalize(prompt, country):
+    """(country, type, count) for a free-text suggestion prompt"""
+    text = (prompt or '').lower()
+    technical = 'technical' in text
+    fundamental = 'fundamental' in text
+    kind = 'technical' if technical and not fundamental else 'fundamental' if fundamental and not technical else 'both'
+    match = _COUNT.search(text)
+    count = int(match.group(1)) if match else DEFAULT_COUNT
+    return country, kind, max(1, min(MAX_COUNT, count))
+
+
+def parse_symbols(text):
+    """Ticker symbols from a model reply (a JSON array, or one per line/comma)"""
+    text = (text or '').strip()
+    if text.startswith('```'):
+        text = text.strip('`').split('\n', 1)[-1]
+    try:
+        items = json.loads(text)
+        if isinstance(items, dict):
+            items = items.get('symbols', [])
+    except ValueError:
+        items = re.split(r'[\n,]+', text)
+    symbols = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get('symbol', '')
+        # Drop list numbering and exchange prefixes/suffixes ('1. NSE:TCS', 'BHP.AX')
+        symbol = re.sub(r'^\s*\d+[.)]\s*', '', str(item)).strip().strip('"\'').upper()
+        symbol = symbol.split(':')[-1].split('.')[0]
+        if _SYMBOL.match(symbol) and symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+
+class _Entry:
+    __slots__ = ('symbols', 'count', 'source', 'expires')
+
+    def __init__(self, symbols, count, source, expires):
+        self.symbols = symbols
+        self.count = count
+        self.source = source
+        self.expires = expires
+
+
+class SuggestionEngine:
+    """Cached, deduplicated model suggestions with a local ranking fallback"""
+
+    def __init__(self, api_key=None, base_url=None, model=None, model_timeout=None, ttl=3600.0,
+                 fallback_ttl=60.0, max_workers=8, analyzer=None, clock=time.monotonic):
+        self.api_key = api_key or os.environ.get('OPENAI_API_KEY')
+        self.base_url = base_url or os.environ.get('XTRADE_LLM_BASE_URL')
+        self.model = model or os.environ.get('XTRADE_LLM_MODEL', 'gpt-4o-mini')
+        self.model_timeout = float(model_timeout if model_timeout is not None
+                                   else os.environ.get('XTRADE_LLM_TIMEOUT', 5.0))
+        self.ttl = ttl
+        self.fallback_ttl = fallback_ttl
+        self.max_workers = max_workers
+        self.clock = clock
+        self._analyzer = analyzer
+        self._client = None
+        self._executor = None
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        # Building the client imports openai; cache hits must not wait for that
+        self._client_lock = threading.Lock()
+        # Nor for the dataset load behind a lazily built analyzer
+        self._analyzer_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.model_calls = 0
+        self.model_errors = 0
+        self.fallbacks = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'model_calls': self.model_calls,
+                'model_errors': self.model_errors,
+                'fallbacks': self.fallbacks
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def model_configured(self):
+        return bool(self.api_key or self.base_url)
+
+    def suggest(self, prompt, country):
+        """Suggested symbols for a prompt, best first"""
+        return self.suggest_for(*normalize(prompt, country))
+
+    def suggest_for(self, country, kind='both', count=DEFAULT_COUNT):
+        key = (country, kind)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.count >= count and self.clock() < entry.expires:
+                self.hits += 1
+                metrics.note('suggestion_requests_total', source='cache')
+                return entry.symbols[:count]
+            pending = self._inflight.get(key)
+            if pending is not None and pending[0] >= count:
+                self.coalesced += 1
+                leader = False
+            else:
+                self.misses += 1
+                pending = self._inflight[key] = (count, Future())
+                leader = True
+
+        future = pending[1]
+        if not leader:
+            metrics.note('suggestion_requests_total', source='coalesced')
+            return future.result()[:count]
+        try:
+            symbols = self._resolve(country, kind, count)
+            future.set_result(symbols)
+            return symbols[:count]
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is pending:
+                    del self._inflight[key]
+
+    def _resolve(self, country, kind, count):
+        if self.model_configured:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='suggestions')
+                self.model_calls += 1
+            call = self._executor.submit(metrics.run_in_context(self._ask_model), country, kind, count)
+            try:
+                symbols = call.result(timeout=self.model_timeout)
+                metrics.note('suggestion_requests_total', source='model')
+                if len(symbols) < count:
+                    # A short answer is topped up from the local ranking
+                    symbols = self._top_up(symbols, self.rank(country, kind, count), count)
+                    self._store((country, kind), symbols, count, 'model')
+                return symbols[:count]
+            except FutureTimeoutError:
+                # Keep the answer when it arrives; the ranked list serves until then
+                metrics.note('suggestion_model_timeouts_total')
+            except Exception:
+                pass
+        with self._lock:
+            self.fallbacks += 1
+        metrics.note('suggestion_requests_total', source='fallback')
+        symbols = self.rank(country, kind, count)
+        self._store((country, kind), symbols, count, 'fallback')
+        return symbols
+
+    @staticmethod
+    def _top_up(symbols, extra, count):
+        return (symbols + [s for s in extra if s not in symbols])[:count]
+
+    def _ask_model(self, country, kind, count):
+        try:
+            with metrics.timer('suggestion_model'):
+                reply = self._chat(country, kind, count)
+            symbols = parse_symbols(reply)
+            if not symbols:
+                raise ValueError(f"no symbols in model reply: {reply[:80]!r}")
+        except Exception:
+            with self._lock:
+                self.model_errors += 1
+            metrics.note('suggestion_model_errors_total')
+            raise
+        self._store((country, kind), symbols, min(count, len(symbols)), 'model')
+        return symbols
+
+    def _chat(self, country, kind, count):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    # A local server needs no real key; retries are left to the next request
+                    self._client = OpenAI(api_key=self.api_key or 'unused', base_url=self.base_url,
+                                          max_retries=0, timeout=max(30.0, self.model_timeout))
+        analysis = 'technical and fundamental' if kind == 'both' else kind
+        response = self._client.chat.completions.create(
+            model=self.model,
+            temperature=0,
+            messages=[
+                {'role': 'system', 'content': SYSTEM_PROMPT},
+                {'role': 'user', 'content': f"Top {count} stocks for {country} based on {analysis} indicators"}
+            ]
+        )
+        return response.choices[0].message.content
+
+    def _store(self, key, symbols, count, source):
+        ttl = self.ttl if source == 'model' else self.fallback_ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            now = self.clock()
+            # A fresh model answer is never replaced by a ranked one
+            if (source == 'fallback' and entry is not None and entry.source == 'model'
+                    and now < entry.expires and entry.count >= count):
+                return
+            self._entries[key] = _Entry(list(symbols), count, source, now + ttl)
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            with self._analyzer_lock:
+                if self._analyzer is None:
+                    from stock_analyzer_app import StockDataAnalyzer
+                    self._analyzer = StockDataAnalyzer()
+        return self._analyzer
+
+    def use_analyzer(self, analyzer):
+        """Rank with an analyzer the app already loaded rather than loading the dataset again"""
+        with self._analyzer_lock:
+            self._analyzer = analyzer
+
+    def rank(self, country, kind='both', count=DEFAULT_COUNT):
+        """Best `count` symbols for a country in the local dataset by the scoring rules"""
+        with metrics.timer('suggestion_rank'):
+            try:
+                symbols = self._rank(country, kind, count)
+            except Exception:
+                symbols = []
+        # A small (or missing) dataset is padded with the sample names
+        return self._top_up(symbols, SAMPLE_STOCKS.get(country, []), count)
+
+    def _rank(self, country, kind, count):
+        import numpy as np
+        from scoring import combined_score, fundamental_score, technical_score
+
+        df = self.analyzer.get_country_view(country)
+        if df.empty:
+            return []
+
+        def column(name):
+            return df[name].to_numpy(dtype=np.float64) if name in df.columns else np.full(len(df), np.nan)
+
+        fundamental = fundamental_score(column('PE_Ratio'), column('ROE'), column('Revenue_Growth'))
+        if kind == 'fundamental':
+            score = fundamental
+        else:
+            technical = technical_score(column('Price'), column('50DMA'), column('200DMA'),
+                                        column('RSI'), column('MACD'))
+            score = technical if kind == 'technical' else combined_score(fundamental, technical)
+        # Ties go to the larger company
+        cap = np.nan_to_num(column('Market_Cap'), nan=-np.inf)
+        order = np.lexsort((-cap, -np.asarray(score, dtype=np.float64)))[:count]
+        return df['Symbol'].astype(str).to_numpy()[order].tolist()
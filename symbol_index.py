@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from providers import exchange_for
+
+# Symbol lookups used by StockDataAnalyzer and the API.
+# (exchange, symbol) keys map to row positions in a dict, so a details lookup
+# is one hash probe instead of a scan of the Symbol column. Typeahead keeps
+# the upper-cased symbols, and every word of the company names, in sorted
+# arrays: the keys starting with a prefix are the contiguous range between two
+# binary searches, the same set a trie walk would find.
+#
+# Keys can be written 'NSE:RELIANCE'; a bare symbol resolves to its first
+# listing.
+
+_PREFIX_END = '\U0010ffff'
+
+
+def _sorted_keys(keys, values):
+    order = np.argsort(keys, kind='stable')
+    return keys[order], values[order]
+
+
+class SymbolIndex:
+    """Row positions by (exchange, symbol) plus prefix search for typeahead"""
+
+    def __init__(self, df):
+        n = len(df)
+        self.symbols = df['Symbol'].astype(str).to_numpy(dtype=object)
+        if 'Country' in df.columns:
+            countries = df['Country'].astype(str)
+            self.exchanges = countries.map({c: exchange_for(c) for c in countries.unique()}).to_numpy(dtype=object)
+        else:
+            self.exchanges = np.full(n, exchange_for(None), dtype=object)
+        self.companies = (df['Company'].fillna('').astype(str).to_numpy(dtype=object) if 'Company' in df.columns
+                          else np.full(n, '', dtype=object))
+
+        # Built back to front so the first listing of a duplicate wins
+        backwards = range(n - 1, -1, -1)
+        self.rows = dict(zip(zip(self.exchanges[::-1].tolist(), self.symbols[::-1].tolist()), backwards))
+        self.first_listing = dict(zip(self.symbols[::-1].tolist(), backwards))
+
+        self._symbol_keys, self._symbol_rows = _sorted_keys(np.char.upper(self.symbols.astype(str)), np.arange(n))
+        # Company words are indexed once per distinct name; each name keeps its row positions
+        codes, names = pd.factorize(pd.Series(self.companies, dtype=object).str.upper())
+        self._company_rows = np.argsort(codes, kind='stable')
+        self._company_bounds = np.searchsorted(codes[self._company_rows], np.arange(len(names) + 1))
+        pairs = [(word, code) for code, name in enumerate(names) for word in dict.fromkeys(name.split())]
+        self._word_keys, self._word_codes = _sorted_keys(np.array([w for w, _ in pairs], dtype=str),
+                                                         np.array([c for _, c in pairs], dtype=np.intp))
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def position(self, symbol, exchange=None):
+        """Row position of 'EXCHANGE:SYMBOL' (or a bare symbol), None if unknown"""
+        if exchange is None and ':' in symbol:
+            exchange, symbol = symbol.split(':', 1)
+        if exchange is None:
+            return self.first_listing.get(symbol)
+        return self.rows.get((exchange, symbol))
+
+    def key(self, i):
+        return f"{self.exchanges[i]}:{self.symbols[i]}"
+
+    def label(self, i):
+        company = f" · {self.companies[i]}" if self.companies[i] else ""
+        return f"{self.symbols[i]}{company} ({self.exchanges[i]})"
+
+    @staticmethod
+    def _prefix(keys, rows, prefix, limit):
+        start = np.searchsorted(keys, prefix, side='left')
+        stop = np.searchsorted(keys, prefix + _PREFIX_END, side='left')
+        return rows[start:min(stop, start + limit)]
+
+    def search(self, query, limit=20):
+        """Row positions of up to `limit` listings matching a prefix.
+
+        Symbol matches come first (an exact symbol sorts ahead of its longer
+        neighbours), then companies with a word starting with the query. An
+        empty query returns the first symbols alphabetically.
+        """
+        prefix = query.strip().upper()
+        hits = self._prefix(self._symbol_keys, self._symbol_rows, prefix, limit)
+        if len(hits) < limit and prefix:
+            found = dict.fromkeys(hits.tolist())
+            for code in dict.fromkeys(self._prefix(self._word_keys, self._word_codes, prefix, limit).tolist()):
+                rows = self._company_rows[self._company_bounds[code]:self._company_bounds[code + 1]]
+                found.update(dict.fromkeys(rows[:limit].tolist()))
+                if len(found) >= limit:
+                    break
+            hits = np.fromiter(found, dtype=np.intp)[:limit]
+        return hits
+
+    def choices(self, query, limit=20):
+        """(label, key) pairs for a dropdown"""
+        return [(self.label(i), self.key(i)) for i in self.search(query, limit).tolist()]
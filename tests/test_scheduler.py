@@ -0,0 +1,88 @@
+import pytest
+
+from providers import RateLimitError, TransientProviderError
+from scheduler import CircuitOpenError, ProviderScheduler, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def failing(error):
+    def fn():
+        raise error
+    return fn
+
+
+@pytest.fixture
+def scheduler():
+    clock = Clock()
+    scheduler = ProviderScheduler(rate_limits={'P': None}, max_retries=0, failure_threshold=2, cooldown=30.0,
+                                  sleep=lambda seconds: None)
+    scheduler.breaker('P').clock = clock
+    scheduler.clock = clock
+    return scheduler
+
+
+def open_breaker(scheduler):
+    for _ in range(2):
+        with pytest.raises(TransientProviderError):
+            scheduler.call('P', failing(TransientProviderError("503")))
+    assert scheduler.breaker('P').state == 'open'
+
+
+def test_throttled_trial_call_reopens_the_breaker(scheduler):
+    open_breaker(scheduler)
+    scheduler.clock.now += 31
+    throttled = RateLimitError("429")
+    throttled.retry_after = 1.0
+    with pytest.raises(RateLimitError):
+        scheduler.call('P', failing(throttled))
+    assert scheduler.breaker('P').state == 'open'
+
+    # The next cooldown lets another trial through, and its success closes the breaker
+    with pytest.raises(CircuitOpenError):
+        scheduler.call('P', lambda: 'ok')
+    scheduler.clock.now += 31
+    assert scheduler.call('P', lambda: 'ok') == 'ok'
+    assert scheduler.breaker('P').state == 'closed'
+
+
+def test_throttled_trial_call_with_retries_does_not_stick_half_open(scheduler):
+    open_breaker(scheduler)
+    scheduler.max_retries = 3
+    scheduler.clock.now += 31
+    with pytest.raises(CircuitOpenError):
+        scheduler.call('P', failing(RateLimitError("429")))
+    scheduler.clock.now += 10000
+    assert scheduler.call('P', lambda: 'ok') == 'ok'
+
+
+def test_rate_limit_queue_timeout_on_trial_call_reopens_the_breaker(scheduler):
+    open_breaker(scheduler)
+    scheduler.buckets['P'] = TokenBucket(0.001, 1)
+    scheduler.buckets['P'].acquire()  # take the only token
+    scheduler.acquire_timeout = 0.01
+    scheduler.clock.now += 31
+    with pytest.raises(RateLimitError):
+        scheduler.call('P', lambda: 'ok')
+    assert scheduler.breaker('P').state == 'open'
+
+
+def test_shared_burst_stays_above_the_largest_call_cost():
+    scheduler = ProviderScheduler(rate_limits={'Yahoo Finance': (5.0, 10)})
+    scheduler.register_cost('Yahoo Finance', 2)
+    scheduler.share(6)
+    bucket = scheduler.bucket('Yahoo Finance')
+    assert bucket.rate == pytest.approx(5.0 / 6)
+    assert bucket.burst == 2
+    assert bucket.acquire(timeout=1.0, cost=2)
+
+
+def test_acquire_refuses_a_cost_above_the_burst_at_once():
+    bucket = TokenBucket(1.0, 1)
+    assert not bucket.acquire(cost=2)
@@ -0,0 +1,449 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are serialized within one process only
+    fcntl = None
+
+# Append-only archive of every quote seen, per (exchange, symbol):
+#   <root>/<exchange>/<symbol>.ticks   sealed chunks, back to back
+#   <root>/<exchange>/<symbol>.idx     one INDEX_DTYPE record per sealed chunk
+#   <root>/<exchange>/<symbol>.tail    the open chunk (fewer than chunk_ticks ticks)
+#
+# A chunk holds up to chunk_ticks (timestamp, price, volume) ticks as three
+# compressed columns. Timestamps are stored as delta-of-deltas, so quotes
+# polled at a steady interval encode to runs of zeros. Prices and volumes that
+# are decimals with a few digits (cents, whole shares) become integer steps;
+# any other floats are XORed with their predecessor, as in Gorilla, so
+# unchanged values are zero and close values share their high bits. Each
+# column is narrowed to the smallest integer width, split into byte planes
+# and deflated.
+#
+# The index records each chunk's time and price range, so a query for
+# "symbol X between t1 and t2" reads the index, then only the chunks that
+# overlap [t1, t2] in one contiguous read. Appends are buffered in memory,
+# flushed into the tail, and sealed into a chunk once the tail is full; a
+# tick older than the last sealed chunk is dropped.
+#
+#   archive = TickArchive('data/ticks')
+#   archive.append_quote('NSE', 'TCS', 3801.5, 1204331)
+#   archive.flush()
+#   archive.query('NSE', 'TCS', '2024-06-03 09:15', '2024-06-03 15:30')
+#   archive.resample('NSE', 'TCS', '5min')
+
+CHUNK_TICKS = 4096
+COMPRESSION_LEVEL = 6
+# Decimal digits tried before falling back to XOR encoding
+MAX_DECIMALS = 6
+TICK_COLUMNS = ['Price', 'Volume']
+
+INDEX_DTYPE = np.dtype([
+    ('offset', '<u8'), ('length', '<u4'), ('count', '<u4'), ('crc', '<u4'),
+    ('t_min', '<i8'), ('t_max', '<i8'), ('price_min', '<f8'), ('price_max', '<f8')
+])
+
+_CHUNK_HEADER = struct.Struct('<Iq')    # ticks, first timestamp (ns)
+_SECTION_HEADER = struct.Struct('<I')   # section length
+_WIDTHS = (np.uint8, np.uint16, np.uint32, np.uint64)
+_XOR, _DECIMAL = 0, 1
+
+
+def _nanos(values):
+    """Timestamps (anything pandas parses; naive) as int64 nanoseconds"""
+    index = pd.DatetimeIndex(pd.to_datetime(np.atleast_1d(values)))
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    return index.as_unit('ns').asi8
+
+
+def _bound(value, default):
+    return default if value is None else int(_nanos(value)[0])
+
+
+def _zigzag(values):
+    # Small signed integers -> small unsigned ones: 0, -1, 1, -2 -> 0, 1, 2, 3
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def _unzigzag(values):
+    return (values >> np.uint64(1)).view(np.int64) ^ -(values & np.uint64(1)).view(np.int64)
+
+
+def _pack_ints(values):
+    # Narrowest width that holds every value, byte planes, deflate
+    top = int(values.max()) if len(values) else 0
+    code = next(i for i, dtype in enumerate(_WIDTHS) if top <= np.iinfo(dtype).max)
+    dtype = np.dtype(_WIDTHS[code])
+    planes = values.astype(dtype).view(np.uint8).reshape(-1, dtype.itemsize).T
+    return bytes([code]) + zlib.compress(planes.tobytes(), COMPRESSION_LEVEL)
+
+
+def _unpack_ints(data, count):
+    dtype = np.dtype(_WIDTHS[data[0]])
+    planes = np.frombuffer(zlib.decompress(data[1:]), dtype=np.uint8).reshape(dtype.itemsize, count)
+    return planes.T.copy().view(dtype).ravel().astype(np.uint64)
+
+
+def _encode_times(t):
+    deltas = np.diff(t)
+    return _pack_ints(_zigzag(np.diff(deltas, prepend=0)))
+
+
+def _decode_times(t0, data, count):
+    steps = _unzigzag(_unpack_ints(data, count - 1))
+    return t0 + np.concatenate([[0], np.cumsum(np.cumsum(steps))])
+
+
+def _encode_floats(x):
+    if np.isfinite(x).all():
+        for digits in range(MAX_DECIMALS + 1):
+            scale = 10.0 ** digits
+            scaled = np.round(x * scale)
+            if np.abs(scaled).max() < 2 ** 53 and np.array_equal(scaled / scale, x):
+                steps = np.diff(scaled.astype(np.int64), prepend=0)
+                return bytes([_DECIMAL, digits]) + _pack_ints(_zigzag(steps))
+    bits = x.view(np.uint64)
+    return bytes([_XOR]) + _pack_ints(bits ^ np.concatenate([np.zeros(1, np.uint64), bits[:-1]]))
+
+
+def _decode_floats(data, count):
+    if data[0] == _DECIMAL:
+        return np.cumsum(_unzigzag(_unpack_ints(data[2:], count))) / 10.0 ** data[1]
+    return np.bitwise_xor.accumulate(_unpack_ints(data[1:], count)).view(np.float64)
+
+
+def encode_chunk(t, prices, volumes):
+    """Compressed bytes for time-ordered ticks (int64 ns, float64, float64)"""
+    sections = [_encode_times(t), _encode_floats(prices), _encode_floats(volumes)]
+    return _CHUNK_HEADER.pack(len(t), int(t[0])) + b''.join(_SECTION_HEADER.pack(len(s)) + s for s in sections)
+
+
+def decode_chunk(blob):
+    """(timestamps, prices, volumes) from encode_chunk() bytes"""
+    blob = memoryview(blob)
+    count, t0 = _CHUNK_HEADER.unpack_from(blob)
+    position = _CHUNK_HEADER.size
+    sections = []
+    for _ in range(3):
+        (length,) = _SECTION_HEADER.unpack_from(blob, position)
+        position += _SECTION_HEADER.size
+        sections.append(blob[position:position + length])
+        position += length
+    return (_decode_times(t0, sections[0], count), _decode_floats(sections[1], count),
+            _decode_floats(sections[2], count))
+
+
+def _frame(t, prices, volumes):
+    return pd.DataFrame({'Price': prices, 'Volume': volumes},
+                        index=pd.DatetimeIndex(t.view('datetime64[ns]'), name='Time'))
+
+
+def _empty():
+    return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+
+
+@contextmanager
+def _file_lock(path):
+    # Serializes writers of one symbol across processes (e.g. refresh_job workers and an app)
+    with open(path, 'ab') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class TickArchive:
+    """Compressed, chunked tick history with time-range queries and OHLC resampling"""
+
+    def __init__(self, root, chunk_ticks=CHUNK_TICKS, flush_interval=None):
+        self.root = root
+        self.chunk_ticks = chunk_ticks
+        self.flush_interval = flush_interval
+        self.chunks_read = 0
+        self.chunks_skipped = 0
+        self.dropped = 0
+        self._buffers = {}
+        self._buffers_lock = threading.Lock()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._flusher = None
+        self._closed = threading.Event()
+
+    def path(self, exchange, symbol):
+        """Path prefix of a symbol's files (add .ticks, .idx or .tail)"""
+        return os.path.join(self.root, exchange, symbol)
+
+    def _lock(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def keys(self, exchange=None):
+        """Sorted (exchange, symbol) pairs with stored or buffered ticks"""
+        found = set()
+        exchanges = [exchange] if exchange else (sorted(os.listdir(self.root)) if os.path.isdir(self.root) else [])
+        for name in exchanges:
+            folder = os.path.join(self.root, name)
+            if os.path.isdir(folder):
+                found.update((name, os.path.splitext(f)[0]) for f in os.listdir(folder)
+                             if f.endswith(('.idx', '.tail')))
+        with self._buffers_lock:
+            found.update(key for key in self._buffers if exchange in (None, key[0]))
+        return sorted(found)
+
+    # Writing
+
+    def append(self, exchange, symbol, timestamps, prices, volumes=None):
+        """Buffer ticks for one symbol; a full chunk's worth is written at once"""
+        t = _nanos(timestamps)
+        prices = np.asarray(prices, dtype=np.float64).reshape(-1)
+        volumes = np.full(len(t), np.nan) if volumes is None else np.asarray(volumes, dtype=np.float64).reshape(-1)
+        if not len(t) == len(prices) == len(volumes):
+            raise ValueError("timestamps, prices and volumes must have the same length")
+        key = (exchange, symbol)
+        with self._buffers_lock:
+            buffer = self._buffers.setdefault(key, [])
+            buffer.append((t, prices, volumes))
+            full = sum(len(part[0]) for part in buffer) >= self.chunk_ticks
+        if full:
+            self._flush_key(key)
+        elif self.flush_interval and self._flusher is None:
+            self._start_flusher()
+
+    def append_quote(self, exchange, symbol, price, volume=None, timestamp=None):
+        """Buffer one quote, stamped now unless `timestamp` is given"""
+        self.append(exchange, symbol, [timestamp if timestamp is not None else pd.Timestamp.now()], [price],
+                    [np.nan if volume is None else volume])
+
+    def flush(self):
+        """Write every buffered tick to disk"""
+        with self._buffers_lock:
+            keys = list(self._buffers)
+        with metrics.timer('tick_archive', call='flush'):
+            for key in keys:
+                self._flush_key(key)
+
+    def close(self):
+        self._closed.set()
+        self.flush()
+
+    def _start_flusher(self):
+        with self._buffers_lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name='tick-archive-flush', daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing tick archive: {e}")
+                metrics.note('tick_archive_errors_total')
+
+    def _flush_key(self, key):
+        base = self.path(*key)
+        with self._lock(key):
+            with self._buffers_lock:
+                parts = self._buffers.pop(key, [])
+            if not parts:
+                return
+            os.makedirs(os.path.dirname(base), exist_ok=True)
+            with _file_lock(base + '.idx'):
+                index = self._read_index(base, repair=True)
+                t, prices, volumes = (np.concatenate(c) for c in zip(self._read_tail(base), *parts))
+                # The tail may interleave with new ticks; anything before the sealed chunks is too late
+                order = np.argsort(t, kind='stable')
+                t, prices, volumes = t[order], prices[order], volumes[order]
+                if len(index):
+                    late = t <= index['t_max'][-1]
+                    if late.any():
+                        self.dropped += int(late.sum())
+                        metrics.note('tick_archive_dropped_total', int(late.sum()))
+                        t, prices, volumes = t[~late], prices[~late], volumes[~late]
+                sealed = len(t) - len(t) % self.chunk_ticks
+                if sealed:
+                    self._seal(base, t[:sealed], prices[:sealed], volumes[:sealed])
+                self._write_tail(base, t[sealed:], prices[sealed:], volumes[sealed:])
+
+    def _seal(self, base, t, prices, volumes):
+        records = []
+        with open(base + '.ticks', 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            for start in range(0, len(t), self.chunk_ticks):
+                stop = start + self.chunk_ticks
+                blob = encode_chunk(t[start:stop], prices[start:stop], volumes[start:stop])
+                f.write(blob)
+                with np.errstate(all='ignore'):
+                    low, high = (np.nanmin(prices[start:stop]), np.nanmax(prices[start:stop])) \
+                        if not np.isnan(prices[start:stop]).all() else (np.nan, np.nan)
+                records.append((offset, len(blob), stop - start, zlib.crc32(blob), t[start], t[stop - 1], low, high))
+                offset += len(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        # Index records go last: a chunk counts only once its bytes are on disk
+        with open(base + '.idx', 'ab') as f:
+            f.write(np.array(records, dtype=INDEX_DTYPE).tobytes())
+
+    def _write_tail(self, base, t, prices, volumes):
+        path = base + '.tail'
+        if not len(t):
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(encode_chunk(t, prices, volumes))
+        os.replace(tmp_path, path)
+
+    # Reading
+
+    def _read_index(self, base, repair=False):
+        try:
+            with open(base + '.idx', 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return np.empty(0, dtype=INDEX_DTYPE)
+        usable = len(raw) - len(raw) % INDEX_DTYPE.itemsize
+        if repair and usable < len(raw):
+            # A record torn by a crash; drop it so later records stay aligned
+            with open(base + '.idx', 'r+b') as f:
+                f.truncate(usable)
+        return np.frombuffer(raw[:usable], dtype=INDEX_DTYPE)
+
+    def _read_tail(self, base):
+        try:
+            with open(base + '.tail', 'rb') as f:
+                return decode_chunk(f.read())
+        except FileNotFoundError:
+            return _empty()
+
+    def index(self, exchange, symbol):
+        """The chunk index of a symbol as a DataFrame (sealed chunks only)"""
+        index = pd.DataFrame(self._read_index(self.path(exchange, symbol)))
+        for column in ('t_min', 't_max'):
+            index[column] = pd.to_datetime(index[column].to_numpy(dtype=np.int64))
+        return index
+
+    def _read_chunks(self, base, chunks):
+        if not len(chunks):
+            return []
+        first, last = chunks[0], chunks[-1]
+        with open(base + '.ticks', 'rb') as f:
+            # Selected chunks are adjacent on disk: one read covers them all
+            f.seek(int(first['offset']))
+            data = memoryview(f.read(int(last['offset'] + last['length'] - first['offset'])))
+        decoded = []
+        for chunk in chunks:
+            start = int(chunk['offset'] - first['offset'])
+            blob = data[start:start + int(chunk['length'])]
+            if zlib.crc32(blob) != chunk['crc']:
+                raise ValueError(f"Corrupt chunk at byte {int(chunk['offset'])} of {base}.ticks")
+            decoded.append(decode_chunk(blob))
+        return decoded
+
+    def _ticks(self, exchange, symbol, start, end):
+        key = (exchange, symbol)
+        base = self.path(exchange, symbol)
+        with self._buffers_lock:
+            buffered = list(self._buffers.get(key, []))
+        with self._lock(key):
+            index = self._read_index(base)
+            # Chunks are in time order: two binary searches find the overlapping run
+            lo = int(np.searchsorted(index['t_max'], start, side='left'))
+            hi = int(np.searchsorted(index['t_min'], end, side='right'))
+            chunks = self._read_chunks(base, index[lo:max(lo, hi)])
+            tail = self._read_tail(base)
+        self.chunks_read += len(chunks)
+        self.chunks_skipped += len(index) - len(chunks)
+        metrics.note('tick_archive_chunks_total', len(chunks), result='read')
+        metrics.note('tick_archive_chunks_total', len(index) - len(chunks), result='skipped')
+
+        open_ticks = [np.concatenate(c) for c in zip(tail, *buffered)]
+        if buffered:
+            order = np.argsort(open_ticks[0], kind='stable')
+            open_ticks = [column[order] for column in open_ticks]
+        t, prices, volumes = (np.concatenate(c) for c in zip(_empty(), *chunks, open_ticks))
+        keep = (t >= start) & (t <= end)
+        return t[keep], prices[keep], volumes[keep]
+
+    def query(self, exchange, symbol, start=None, end=None):
+        """Ticks of one symbol with start <= time <= end, indexed by time"""
+        with metrics.timer('tick_archive', call='query'):
+            return _frame(*self._ticks(exchange, symbol, _bound(start, np.iinfo(np.int64).min),
+                                       _bound(end, np.iinfo(np.int64).max)))
+
+    def resample(self, exchange, symbol, freq='1min', start=None, end=None):
+        """OHLC bars of one symbol's ticks; bars without ticks are left out.
+
+        Volume is the last volume seen in the bar (quotes carry the session's
+        running volume) and Ticks the number of quotes.
+        """
+        ticks = self.query(exchange, symbol, start, end)
+        with metrics.timer('tick_archive', call='resample'):
+            bars = ticks['Price'].resample(freq).ohlc()
+            bars.columns = ['Open', 'High', 'Low', 'Close']
+            bars['Volume'] = ticks['Volume'].resample(freq).last()
+            bars['Ticks'] = ticks['Price'].resample(freq).count()
+        return bars[bars['Ticks'] > 0]
+
+    def price_range(self, exchange, symbol, start=None, end=None):
+        """(low, high) price between start and end.
+
+        Chunks wholly inside the range answer from the index; only the chunks
+        at either edge are decompressed.
+        """
+        start, end = _bound(start, np.iinfo(np.int64).min), _bound(end, np.iinfo(np.int64).max)
+        index = self._read_index(self.path(exchange, symbol))
+        inside = index[(index['t_min'] >= start) & (index['t_max'] <= end)]
+        lows, highs = list(inside['price_min']), list(inside['price_max'])
+        edges = [(start, end)] if not len(inside) else [(start, int(inside['t_min'][0]) - 1),
+                                                         (int(inside['t_max'][-1]) + 1, end)]
+        for low, high in edges:
+            if low <= high:
+                _, prices, _ = self._ticks(exchange, symbol, low, high)
+                if len(prices) and not np.isnan(prices).all():
+                    lows.append(np.nanmin(prices))
+                    highs.append(np.nanmax(prices))
+        lows, highs = np.array(lows, dtype=np.float64), np.array(highs, dtype=np.float64)
+        if not len(lows) or np.isnan(lows).all():
+            return np.nan, np.nan
+        return float(np.nanmin(lows)), float(np.nanmax(highs))
+
+    def replay(self, keys, start=None, end=None):
+        """Ticks of several (exchange, symbol) keys in time order, as streaming.py tick rows
+        (timestamp, symbol, price, volume); feed it to streaming.ReplayTickSource"""
+        frames = []
+        for exchange, symbol in keys:
+            ticks = self.query(exchange, symbol, start, end)
+            frames.append(pd.DataFrame({'timestamp': ticks.index, 'symbol': symbol,
+                                        'price': ticks['Price'].to_numpy(), 'volume': ticks['Volume'].to_numpy()}))
+        if not frames:
+            return pd.DataFrame(columns=['timestamp', 'symbol', 'price', 'volume'])
+        return pd.concat(frames, ignore_index=True).sort_values('timestamp', kind='stable', ignore_index=True)
+
+    def disk_usage(self, exchange=None):
+        """{'ticks', 'chunks', 'bytes'} over the sealed chunks and tails on disk"""
+        usage = {'ticks': 0, 'chunks': 0, 'bytes': 0}
+        for key in self.keys(exchange):
+            base = self.path(*key)
+            index = self._read_index(base)
+            usage['ticks'] += int(index['count'].sum()) + len(self._read_tail(base)[0])
+            usage['chunks'] += len(index)
+            for suffix in ('.ticks', '.idx', '.tail'):
+                if os.path.exists(base + suffix):
+                    usage['bytes'] += os.path.getsize(base + suffix)
+        return usage